@@ -0,0 +1,169 @@
+'''Volleyball benchmarks
+
+Times each stage of turning score sheets into reports on synthetic seasons (see
+volley/volley_synth.py), so performance changes are measured against reproducible data:
+
+    yaml_load   yaml.safe_load() of the season sheet
+    build       build_season(), roster/match/VolleyGame construction
+    game_stats  rotation accounting of every game
+    aggregate   match and season stats summed from the games
+    render      VolleyReportText of the whole season (render cache off)
+
+Every stage is run `repeat` times on fresh objects and the best time is kept. Results are
+compared against the baselines stored in benchmarks/baselines.json, which are only meaningful on
+the machine they were recorded on; re-record them with --save before comparing changes.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench                      # small and medium, compare to baselines
+    python -m benchmarks.bench --scenario large     # 10k matches, 200 player roster
+    python -m benchmarks.bench --save               # store the results as the new baselines
+    python -m benchmarks.bench --check 1.25         # exit 1 if a stage is 25% slower
+'''
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import yaml
+
+from volley.volley_loader import build_season
+from volley.volley_report import VolleyReportText
+from volley.volley_synth import SeasonSynth
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+SCENARIOS : Dict[str, Dict[str, Any]] = {
+    'small'  : {'matches': 100,   'players': 20,  'league': 'mens', 'seed': 1},
+    'medium' : {'matches': 1000,  'players': 60,  'league': 'coed', 'seed': 2},
+    'large'  : {'matches': 10000, 'players': 200, 'league': 'mens', 'seed': 3},
+}
+DEFAULT_SCENARIOS = ['small', 'medium']
+
+STAGES = ('yaml_load', 'build', 'game_stats', 'aggregate', 'render')
+
+def run_scenario(name : str, repeat : int = 3) -> Dict[str, float]:
+    '''Generates the scenario's season sheet and times every stage on it.
+
+        Returns:
+            times -> dict()
+                stage -> best time in seconds
+    '''
+    params = SCENARIOS[name]
+    best   = {stage: float('inf') for stage in STAGES}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f'{name}.yaml')
+        with open(path, 'w', encoding='utf-8') as file:
+            SeasonSynth(**params).write(file)
+
+        for _ in range(repeat):
+            state : Dict[str, Any] = {}
+
+            def yaml_load() -> None:
+                with open(path, 'rb') as file:
+                    state['sheet'] = yaml.safe_load(file)
+
+            def build() -> None:
+                state['season'] = build_season(state['sheet'])
+
+            def game_stats() -> None:
+                for match in state['season'].matches:
+                    for game in match.games:
+                        _ = game.game_stats
+
+            def aggregate() -> None:
+                _ = state['season'].season_stats
+
+            def render() -> None:
+                VolleyReportText(cache_size=0).write(state['season'], io.StringIO())
+
+            for stage, func in zip(STAGES, (yaml_load, build, game_stats, aggregate, render)):
+                best[stage] = min(best[stage], _timed(func))
+
+    return best
+
+def load_baselines(path : str = BASELINES) -> Dict[str, Any]:
+    '''Reads the stored baselines, empty if there are none yet.'''
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+def save_baselines(results : Dict[str, Dict[str, float]], path : str = BASELINES) -> None:
+    '''Stores the results as baselines, scenarios not in the results are kept.'''
+    baselines = load_baselines(path)
+    for name, times in results.items():
+        baselines[name] = {'params' : SCENARIOS[name],
+                           'python' : platform.python_version(),
+                           'machine': platform.machine(),
+                           'stages' : {stage: round(sec, 6) for stage, sec in times.items()}}
+
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(baselines, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+def report(results : Dict[str, Dict[str, float]], baselines : Dict[str, Any],
+           threshold : Optional[float] = None) -> bool:
+    '''Prints the results next to the baselines.
+
+        Returns:
+            ok -> bool
+                False if a stage is slower than its baseline by more than the threshold
+    '''
+    ok = True
+    for name, times in results.items():
+        base = baselines.get(name, {})
+        if base and base.get('params') != SCENARIOS[name]:
+            print(f'{name}: baseline was recorded with other parameters, not comparing')
+            base = {}
+
+        print(f'{name} {SCENARIOS[name]}')
+        print(f'  {"stage":<12}{"baseline":>12}{"current":>12}{"ratio":>8}')
+        for stage in STAGES:
+            line = f'  {stage:<12}'
+            old  = base.get('stages', {}).get(stage)
+            if old:
+                ratio = times[stage] / old
+                flag  = ''
+                if threshold is not None and ratio > threshold:
+                    flag = '  !'
+                    ok   = False
+                line += f'{old:>12.4f}{times[stage]:>12.4f}{ratio:>8.2f}{flag}'
+            else:
+                line += f'{"-":>12}{times[stage]:>12.4f}{"-":>8}'
+            print(line)
+    return ok
+
+def _timed(func : Callable[[], None]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def main(argv : Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Volleyball stats benchmarks')
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='scenario to run, can be repeated (default: small and medium)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per stage, best is kept')
+    parser.add_argument('--save', action='store_true', help='store results as the baselines')
+    parser.add_argument('--check', type=float, metavar='RATIO',
+                        help='fail if a stage is slower than RATIO x its baseline')
+    args = parser.parse_args(argv)
+
+    results = {name: run_scenario(name, args.repeat)
+               for name in args.scenario or DEFAULT_SCENARIOS}
+
+    ok = report(results, load_baselines(), args.check)
+    if args.save:
+        save_baselines(results)
+        print(f'baselines saved to {BASELINES}')
+
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,22 @@
+'''Shared fixtures: the hand-entered score sheets of scores/'''
+import glob
+import os
+from typing import List
+
+import pytest
+
+from volley.volley_loader import load_season
+from volley.volley_match import VolleySeason
+
+SCORES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scores')
+SHEETS     = sorted(glob.glob(os.path.join(SCORES_DIR, '*.yaml')))
+
+@pytest.fixture(scope='session')
+def sheets() -> List[str]:
+    '''Paths of every score sheet'''
+    return SHEETS
+
+@pytest.fixture(scope='session')
+def seasons() -> List[VolleySeason]:
+    '''Every score sheet loaded without the snapshot cache, shared so tests must not change them'''
+    return [load_season(path, use_cache=False) for path in SHEETS]
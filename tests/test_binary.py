@@ -0,0 +1,99 @@
+'''Binary sheets: YAML round trip, same stats, corrupt files'''
+import os
+
+import pytest
+import yaml
+
+from volley.volley_binary import BinaryFormatError, BinarySeason, SEASON_KEYS, convert, \
+                                 load_binary, read_sheet
+from volley.volley_engine import _same_stats
+from volley.volley_loader import load_season
+
+@pytest.fixture(scope='module')
+def binaries(sheets, tmp_path_factory):
+    '''Every score sheet converted to a binary sheet'''
+    out = tmp_path_factory.mktemp('binary')
+    return [convert(path, str(out / (os.path.splitext(os.path.basename(path))[0] + '.vlyb')))
+            for path in sheets]
+
+def test_round_trip(sheets, binaries):
+    for path, binary in zip(sheets, binaries):
+        with open(path, 'rb') as file:
+            sheet = yaml.safe_load(file)
+        expected = {key: sheet[key] for key in SEASON_KEYS}
+        expected['matches'] = sheet['matches']
+
+        assert read_sheet(binary) == expected
+
+def test_same_stats(seasons, binaries):
+    for season, binary in zip(seasons, binaries):
+        loaded = load_binary(binary)
+
+        assert loaded.validation.invalid_games == season.validation.invalid_games
+        assert _same_stats(loaded.season_stats, season.season_stats)
+        for match, orig in zip(loaded.matches, season.matches):
+            assert _same_stats(match.match_stats, orig.match_stats)
+
+def test_season_reuses_matches(binaries):
+    with BinarySeason(binaries[0]) as sheet:
+        match  = sheet.match(1)
+        season = sheet.season()
+
+        assert season.matches[1] is match
+        assert sheet.match(1) is match
+        assert sheet.season() is season
+
+@pytest.mark.parametrize('size', [0, 3, 4, 20, -1])
+def test_truncated(binaries, tmp_path, size):
+    with open(binaries[0], 'rb') as file:
+        data = file.read()
+    path = tmp_path / 'truncated.vlyb'
+    path.write_bytes(data[:size])
+
+    with pytest.raises(BinaryFormatError):
+        load_binary(str(path))
+
+def test_corrupt_match(binaries, tmp_path):
+    with open(binaries[0], 'rb') as file:
+        data = bytearray(file.read())
+    with BinarySeason(binaries[0]) as sheet:
+        start, end = sheet._offsets[0], sheet._offsets[1]
+    # zeroed match body, the other matches still decode
+    data[start:end] = bytes(end - start)
+    path = tmp_path / 'corrupt.vlyb'
+    path.write_bytes(bytes(data))
+
+    with BinarySeason(str(path)) as sheet:
+        sheet.match(1)
+        with pytest.raises(BinaryFormatError):
+            sheet.match(0)
+
+def test_empty_match_numbering(sheets, tmp_path):
+    with open(sheets[0], 'rb') as file:
+        sheet = yaml.safe_load(file)
+    # an empty match in the middle, and an error in a game after it
+    sheet['matches'].insert(1, [])
+    game = next(game for game in sheet['matches'][2][1:] if game['include'])
+    game['team_scores'].insert(1, '?')
+    path = tmp_path / 'empty.yaml'
+    path.write_text(yaml.safe_dump(sheet))
+
+    season = load_season(str(path), use_cache=False)
+    with BinarySeason(convert(str(path))) as binary:
+        match = binary.match(2)
+        assert match.match_num == 2
+        with pytest.raises(ValueError):
+            binary.match(1)
+
+        loaded = binary.season()
+        assert loaded.matches[1] is match
+        assert [match.match_num for match in loaded.matches] == \
+               [match.match_num for match in season.matches] == \
+               list(range(1, len(season.matches) + 1))
+        assert [str(issue) for issue in loaded.validation.issues] == \
+               [str(issue).replace('empty.yaml', 'empty.vlyb')
+                for issue in season.validation.issues]
+        assert any(issue.code == 'bad_token' and issue.match == 2
+                   for issue in loaded.validation.errors)
+        assert [game.include for game in match.games] == \
+               [game.include for game in season.matches[1].games]
@@ -0,0 +1,78 @@
+'''Detailed stats: the sheet counters land in the player detail fields'''
+import pytest
+
+from volley.volley_loader import load_season
+from volley.volley_stats import PlayerStats, VolleyStats
+from volley.volley_validate import ValidationReport, validate_game
+
+from .conftest import SHEETS
+
+def _sheet_counts(game):
+    # detail field -> jersey -> count, as written on the sheet
+    counts = {}
+    for stat, val in game.detailed.items():
+        if isinstance(val, dict):
+            counts[stat] = {game.roster.get_player_num(name): count or 0
+                            for name, count in val.items()}
+    return counts
+
+def _detailed_games(seasons):
+    return [game for season in seasons for match in season.matches for game in match.games
+            if game.include and game.detailed]
+
+def test_sheet_counts(seasons):
+    games = _detailed_games(seasons)
+    assert games
+
+    for game in games:
+        stats  = game.game_stats
+        counts = _sheet_counts(game)
+        assert stats.untouched_balls == game.detailed['untouched_balls']
+        assert stats.rotational_fault == game.detailed['rotational_fault']
+        for num, player in stats.player_stats.items():
+            assert player.total_detailed_games == 1
+            for name in PlayerStats.DETAIL_FIELDS:
+                if name != 'total_detailed_games':
+                    assert getattr(player, name) == counts.get(name, {}).get(num, 0)
+
+def test_games_without_details(seasons):
+    for season in seasons:
+        for match in season.matches:
+            for game in match.games:
+                if game.include and not game.detailed:
+                    for player in game.game_stats.player_stats.values():
+                        assert all(getattr(player, name) == 0
+                                   for name in PlayerStats.DETAIL_FIELDS)
+
+def test_aggregates_carry_details(seasons):
+    for season in seasons:
+        games = [game for match in season.matches for game in match.games if game.include]
+        for num, player in season.season_stats.player_stats.items():
+            for name in PlayerStats.DETAIL_FIELDS:
+                assert getattr(player, name) == \
+                       sum(getattr(game.game_stats.player_stats[num], name)
+                           for game in games if num in game.game_stats.player_stats)
+
+def test_bad_details(seasons):
+    game  = _detailed_games(seasons)[0]
+    stats = game.game_stats.copy()
+    name  = next(player.name for player in game.roster.players
+                 if player.number not in stats.player_stats)
+    base  = {'untouched_balls': 0, 'rotational_fault': 0}
+
+    with pytest.raises(ValueError):
+        stats.add_details(base | {'bogus': {}}, game.roster)
+    with pytest.raises(ValueError):
+        stats.add_details(base | {'missed_serves': {name: 1}}, game.roster)
+    with pytest.raises(TypeError):
+        VolleyStats.sum([stats, stats]).add_details(base, game.roster)
+
+def test_validator_flags_unknown_details():
+    # own copy of a sheet, the game is edited
+    seasons = [load_season(path, use_cache=False) for path in SHEETS]
+    game    = _detailed_games(seasons)[0]
+    game.detailed = game.detailed | {'bogus': {}}
+
+    report = ValidationReport()
+    assert not validate_game(game, report)
+    assert [issue.code for issue in report.errors] == ['details']
@@ -0,0 +1,63 @@
+'''Rotation engines: loop, runs and timeline give the same stats'''
+import random
+
+import pytest
+
+from volley.volley_engine import calc_game_stats_runs, calc_game_stats_timeline, \
+                                 check_engine_parity
+from volley.volley_match import VolleyGame
+from volley.volley_stats import VolleyStats
+from volley.volley_timeline import RallyTimeline
+
+def _games(seasons):
+    return [game for season in seasons for match in season.matches for game in match.games]
+
+def _mutate(rand, tokens):
+    tokens = list(tokens)
+    for _ in range(rand.randint(1, 3)):
+        if not tokens:
+            break
+        idx = rand.randrange(len(tokens))
+        action = rand.random()
+        if action < 0.4:
+            del tokens[idx]
+        elif action < 0.7:
+            tokens.insert(idx, 'R')
+        else:
+            tokens[idx] = rand.randint(0, 30)
+    return tokens
+
+def test_parity_on_sheets(seasons):
+    games = _games(seasons)
+    assert games
+    for game in games:
+        assert check_engine_parity(game), f'game {game.game} of match {game.match.match_num}'
+
+def test_parity_on_mutated_games(seasons):
+    rand  = random.Random(8)
+    games = _games(seasons)
+    for _ in range(1000):
+        orig = rand.choice(games)
+        game = VolleyGame({'game': 1, 'full': True, 'include': True, 'lineup': orig.lineup,
+                           'serve': rand.random() < 0.5,
+                           'team_scores': _mutate(rand, orig.team_scores),
+                           'opponent_scores': _mutate(rand, orig.oppo_scores)}, orig.roster)
+        assert check_engine_parity(game), (game.serve_start, game.team_scores, game.oppo_scores)
+
+def test_run_without_side_out_point(seasons):
+    orig   = _games(seasons)[0]
+    lineup = orig.lineup
+    # team serves first, then loses its second serve run without scoring its side-out point
+    team = [1, 'R', 'R', 2, 'X']
+    oppo = [1, 'R', 2, 'R']
+
+    game = VolleyGame({'game': 1, 'full': True, 'include': True, 'lineup': lineup,
+                       'serve': True, 'team_scores': team, 'opponent_scores': oppo}, orig.roster)
+    with pytest.raises(ValueError):
+        game._calc_game_stats_loop(VolleyStats(lineup), team, oppo)
+    with pytest.raises(ValueError):
+        calc_game_stats_runs(VolleyStats(lineup), lineup, True, True, team, oppo)
+    with pytest.raises(ValueError):
+        timeline = RallyTimeline.decode(lineup, True, team, oppo)
+        calc_game_stats_timeline(VolleyStats(lineup), timeline, True)
+    assert check_engine_parity(game)
@@ -0,0 +1,49 @@
+'''Rally event store: filters and group-bys give the rotation stats'''
+import pytest
+
+from volley.volley_events import ON_COURT, COURT_POS_KEY, POSITION_COLUMNS, RallyEventStore
+from volley.volley_stats import PLUS, MINUS
+
+@pytest.fixture(scope='module')
+def store(seasons):
+    return RallyEventStore.from_seasons(seasons)
+
+def test_rotation_pm(store, seasons):
+    for idx, season in enumerate(seasons):
+        groups = store.filter(season=idx).group_by(ON_COURT, COURT_POS_KEY)
+        for num, player in season.season_stats.player_stats.items():
+            for pos, pair in enumerate(player._rotation_pm):
+                assert groups.get((num, pos), [0, 0]) == list(pair)
+
+def test_game_pm(store, seasons):
+    groups = store.group_by('season', 'match', 'game')
+    for idx, season in enumerate(seasons):
+        for match in season.matches:
+            for game in match.games:
+                key = (idx, match.match_num, game.game)
+                if not game.include:
+                    assert key not in groups
+                    continue
+                # every player of the lineup is on court for every rally of the game
+                for num in game.lineup:
+                    assert groups[key] == list(game.game_stats.player_stats[num].pm_stats)
+
+def test_filter(store):
+    rows   = list(store.rows())
+    jersey = rows[0]['rb']
+
+    on_court = store.filter(on_court=jersey, side=PLUS)
+    assert len(on_court) == sum(1 for row in rows if row['side'] == PLUS and
+                                jersey in [row[pos] for pos in POSITION_COLUMNS])
+
+    late = store.filter(lambda **row: row['team_score'] >= 20, season={0, 1})
+    assert list(late.rows()) == [row for row in rows
+                                 if row['team_score'] >= 20 and row['season'] in (0, 1)]
+
+    served = store.filter(server=lambda server: server >= 0)
+    assert set(served.column('side')) == {PLUS, MINUS}
+    assert len(served) + len(store.filter(server=-1)) == len(store)
+
+def test_court_pos_needs_on_court(store):
+    with pytest.raises(ValueError):
+        store.group_by('season', COURT_POS_KEY)
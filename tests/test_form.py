@@ -0,0 +1,59 @@
+'''Player form: windows of prefix sums give the sums of the games'''
+import pytest
+
+from volley.volley_form import PlayerForm
+from volley.volley_stats import PlayerStats
+
+@pytest.fixture(scope='module')
+def form(seasons):
+    return PlayerForm(seasons)
+
+def _played(seasons, num):
+    # included games of a player in order, grouped by match
+    matches = []
+    for season in seasons:
+        for match in season.matches:
+            games = [game for game in match.games
+                     if game.include and num in game.game_stats.player_stats]
+            if games:
+                matches.append(games)
+    return matches
+
+def _total(num, games):
+    total = PlayerStats(num)
+    for game in games:
+        total += game.game_stats.player_stats[num]
+    return list(total._vec)
+
+def test_windows(form, seasons):
+    for num in form.players():
+        matches = _played(seasons, num)
+        games   = [game for match in matches for game in match]
+
+        assert form.games(num) == games
+        assert form.count(num) == len(games)
+        assert form.count(num, matches=True) == len(matches)
+
+        for start, stop in [(None, None), (0, 3), (2, 5), (-4, None), (5, 2), (-100, 100)]:
+            assert list(form.window(num, start, stop)._vec) == _total(num, games[start:stop])
+            assert list(form.window(num, start, stop, matches=True)._vec) == \
+                   _total(num, [game for match in matches[start:stop] for game in match])
+
+        assert list(form.last(num, 3)._vec) == _total(num, games[-3:])
+        assert list(form.last(num, 2, matches=True)._vec) == \
+               _total(num, [game for match in matches[-2:] for game in match])
+
+def test_rolling(form, seasons):
+    for num in form.players():
+        games = [game for match in _played(seasons, num) for game in match]
+        assert [list(stats._vec) for stats in form.rolling(num, 3)] == \
+               [_total(num, games[idx - 3:idx]) for idx in range(3, len(games) + 1)]
+        assert form.rolling(num, 2, key=lambda stats: stats.total_serves) == \
+               [sum(game.game_stats.player_stats[num].total_serves for game in games[idx - 2:idx])
+                for idx in range(2, len(games) + 1)]
+
+def test_unknown_player_and_bad_size(form):
+    assert not form.window(-1)
+    assert form.rolling(-1, 3) == []
+    with pytest.raises(ValueError):
+        form.rolling(form.players()[0], 0)
@@ -0,0 +1,109 @@
+'''Incremental corrections: edited games give the stats of summing freshly built games'''
+import pytest
+
+from volley.volley_engine import _same_stats
+from volley.volley_loader import load_season
+from volley.volley_match import VolleyArchive, VolleyGame
+from volley.volley_stats import PlayerStats, VolleyStats
+
+from .conftest import SHEETS
+
+@pytest.fixture
+def archive():
+    '''Own copy of the sheets in an archive, every sum built'''
+    archive = VolleyArchive(load_season(path, use_cache=False) for path in SHEETS)
+    _ = archive.all_time_stats
+    for season in archive.seasons:
+        _ = season.season_stats
+        for match in season.matches:
+            _ = match.match_stats
+    return archive
+
+def _fresh(game):
+    # same game built from its current data, no cached stats
+    return VolleyGame({'game': game.game, 'full': game.full, 'include': game.include,
+                       'lineup': list(game.lineup), 'serve': game.serve_start,
+                       'team_scores': list(game.team_scores),
+                       'opponent_scores': list(game.oppo_scores), 'detailed': game.detailed},
+                      game.roster).game_stats
+
+def _check(archive):
+    for season in archive.seasons:
+        for match in season.matches:
+            fresh = VolleyStats.sum(_fresh(game) for game in match.games)
+            assert _same_stats(match.match_stats, fresh)
+            assert match.match_stats.stats_type == (VolleyStats.MATCH if fresh.valid else
+                                                    VolleyStats.GAME)
+        fresh = VolleyStats.sum(_fresh(game) for match in season.matches for game in match.games)
+        assert _same_stats(season.season_stats, fresh)
+    fresh = VolleyStats.sum(_fresh(game) for season in archive.seasons
+                            for match in season.matches for game in match.games)
+    assert _same_stats(archive.all_time_stats, fresh)
+    assert archive.all_time_stats.stats_type == VolleyStats.ALL_TIME
+
+def _included(archive):
+    return [game for season in archive.seasons for match in season.matches
+            for game in match.games if game.include]
+
+def test_edit_scores(archive):
+    games = _included(archive)
+    first, other = games[0], next(game for game in games[1:]
+                                  if game.serve_start == games[0].serve_start)
+    order = list(first.match.match_stats.player_stats)
+
+    first.team_scores, other.team_scores = other.team_scores, first.team_scores
+    first.oppo_scores, other.oppo_scores = other.oppo_scores, first.oppo_scores
+    _check(archive)
+    # same lineups, the players keep their order
+    assert list(first.match.match_stats.player_stats) == order
+
+def test_reassign_lineup(archive):
+    for game in _included(archive)[::4]:
+        roster = [player.number for player in game.roster.players]
+        bench  = [num for num in roster if num not in game.lineup]
+        lineup = game.lineup[1:] + game.lineup[:1]
+        # detailed stats name the players, only games without them take a bench player
+        if bench and not game.detailed:
+            lineup[2] = bench[0]
+        game.lineup = lineup
+    _check(archive)
+
+def test_in_place_edit_and_include(archive):
+    games = _included(archive)
+    games[1].lineup.reverse()
+    games[1].invalidate()
+    games[2].include = False
+    _check(archive)
+
+    games[2].include = True
+    _check(archive)
+
+def test_add_game_and_season(archive):
+    match = archive.seasons[0].matches[0]
+    game  = match.games[0]
+    match.add_game({'game': len(match.games) + 1, 'full': False, 'include': True,
+                    'lineup': list(game.lineup), 'serve': game.serve_start,
+                    'team_scores': list(game.team_scores),
+                    'opponent_scores': list(game.oppo_scores)})
+    _check(archive)
+
+    archive.add_season(load_season(SHEETS[0], use_cache=False))
+    _check(archive)
+
+def test_isub_reverses_iadd(archive):
+    games = archive.seasons[0].matches[0].games
+    total = VolleyStats.sum(game.game_stats for game in games)
+    for game in games[1:]:
+        total -= game.game_stats
+    assert _same_stats(total, VolleyStats.sum([games[0].game_stats]))
+
+def test_half_games_add_up_exactly():
+    player = PlayerStats(7)
+    half   = PlayerStats(7)
+    half.total_games_played = VolleyStats.HALF_GAME
+    for _ in range(10):
+        player += half
+    assert player.total_games_played == 6
+    for _ in range(10):
+        player -= half
+    assert not player
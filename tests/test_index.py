@@ -0,0 +1,67 @@
+'''Game indexes: queries give the games and stats of a full scan'''
+import itertools
+
+import pytest
+
+from volley.volley_engine import _same_stats
+from volley.volley_loader import load_season
+from volley.volley_match import VolleyArchive
+from volley.volley_stats import VolleyStats
+
+from .conftest import SHEETS
+
+def _scan(seasons, players=(), opponent=None):
+    return [game for season in seasons for match in season.matches for game in match.games
+            if set(players) <= set(game.lineup)
+            and (opponent is None or match.opponent_name == opponent)]
+
+def _queries(season):
+    jerseys   = season.index.jerseys()
+    opponents = [None] + season.index.opponents()
+    players   = [()] + [(num,) for num in jerseys] + list(itertools.combinations(jerseys[:6], 2)) \
+              + list(itertools.combinations(jerseys[:5], 3))
+    return itertools.product(players, opponents)
+
+def test_season_queries(seasons):
+    for season in seasons:
+        for players, opponent in _queries(season):
+            games = _scan([season], players, opponent)
+            assert season.index.games(players, opponent) == games
+            assert _same_stats(season.query(players, opponent),
+                               VolleyStats.sum(game.game_stats for game in games))
+
+def test_archive_queries():
+    seasons = [load_season(path, use_cache=False) for path in SHEETS]
+    archive = VolleyArchive(seasons)
+    for players, opponent in _queries(seasons[0]):
+        games = _scan(seasons, players, opponent)
+        assert archive.index.games(players, opponent) == games
+        assert _same_stats(archive.query(players, opponent),
+                           VolleyStats.sum(game.game_stats for game in games))
+
+@pytest.fixture
+def season():
+    '''Own copy of a sheet, the tests edit it'''
+    return load_season(SHEETS[-1], use_cache=False)
+
+def test_follows_lineup_changes(season):
+    game  = season.matches[0].games[0]
+    bench = next(player.number for player in season.roster.players
+                 if player.number not in game.lineup)
+    old   = game.lineup[0]
+
+    game.lineup = [bench] + game.lineup[1:]
+    assert game in season.index.games([bench])
+    assert game not in season.index.games([old])
+    for players, opponent in _queries(season):
+        assert season.index.games(players, opponent) == _scan([season], players, opponent)
+
+def test_follows_added_games(season):
+    match = season.matches[-1]
+    game  = match.games[0]
+    match.add_game({'game': len(match.games) + 1, 'full': False, 'include': True,
+                    'lineup': list(game.lineup), 'serve': game.serve_start,
+                    'team_scores': list(game.team_scores),
+                    'opponent_scores': list(game.oppo_scores)})
+    assert len(season.index) == len(_scan([season]))
+    assert season.index.games(game.lineup[:2], match.opponent_name)[-1] is match.games[-1]
@@ -0,0 +1,66 @@
+'''Lineup optimizer: branch and bound finds the brute force best lineups'''
+import itertools
+import random
+
+import pytest
+
+from volley.volley_lineup import COURT_POS, optimize_lineup, position_ratings, rotation_weights, \
+                                slot_values
+from volley.volley_validate import _is_coed
+
+def _subset(season, rand, size=8):
+    # small roster of played players, half of each gender in coed leagues
+    played = [num for num in season.season_stats.player_stats
+              if season.roster.get_player(num) is not None]
+    if not _is_coed(season.roster):
+        return rand.sample(played, size)
+    by_gender = {}
+    for num in played:
+        by_gender.setdefault(season.roster.get_player(num).gender, []).append(num)
+    return [num for group in by_gender.values() for num in rand.sample(group, size // 2)]
+
+def _brute_force(season, jerseys, weights, top):
+    coed    = _is_coed(season.roster)
+    ratings = position_ratings(season.season_stats)
+    values  = {num: slot_values(ratings[num], weights) for num in jerseys}
+    gender  = {num: season.roster.get_player(num).gender for num in jerseys}
+
+    totals = []
+    for order in itertools.permutations(jerseys, COURT_POS):
+        if coed and any(gender[order[slot]] == gender[order[slot - 1]]
+                        for slot in range(COURT_POS)):
+            continue
+        totals.append(sum(values[num][slot] for slot, num in enumerate(order)))
+    return sorted(totals, reverse=True)[:top]
+
+@pytest.mark.parametrize('uniform', [False, True])
+def test_matches_brute_force(seasons, uniform):
+    rand = random.Random(25)
+    for season in seasons:
+        weights = [1.0] * COURT_POS if uniform else \
+                  rotation_weights(game for match in season.matches for game in match.games)
+        for _ in range(3):
+            jerseys = _subset(season, rand)
+            found   = optimize_lineup(season.roster, season.season_stats, jerseys, weights, top=3,
+                                      processes=1)
+            best    = _brute_force(season, jerseys, weights, 3)
+
+            assert [result.expected for result in found] == pytest.approx(best)
+            for result in found:
+                assert sum(result.values) == pytest.approx(result.expected)
+                assert len(set(result.lineup)) == COURT_POS
+
+def test_workers_agree(seasons):
+    season  = seasons[0]
+    weights = rotation_weights(game for match in season.matches for game in match.games)
+    single  = optimize_lineup(season.roster, season.season_stats, weights=weights, top=5,
+                              processes=1)
+    pooled  = optimize_lineup(season.roster, season.season_stats, weights=weights, top=5,
+                              processes=2)
+    assert [(result.lineup, result.expected) for result in single] == \
+           [(result.lineup, result.expected) for result in pooled]
+
+def test_not_enough_players(seasons):
+    season  = seasons[0]
+    jerseys = [player.number for player in season.roster.players][:COURT_POS - 1]
+    assert optimize_lineup(season.roster, season.season_stats, jerseys) == []
@@ -0,0 +1,56 @@
+'''Live scoring: replaying a game point by point gives the batch stats'''
+from volley.volley_engine import _same_stats
+from volley.volley_match import VolleyGame, VolleyMatch
+from volley.volley_stats import PLUS, VolleyStats
+
+def _blank(game):
+    return {'game': game.game, 'full': game.full, 'include': True, 'lineup': list(game.lineup),
+            'serve': game.serve_start, 'team_scores': [], 'opponent_scores': []}
+
+def _batch(game):
+    # same game computed from its final score lists
+    sheet = _blank(game)
+    sheet['team_scores']     = list(game.team_scores)
+    sheet['opponent_scores'] = list(game.oppo_scores)
+    return VolleyGame(sheet, game.roster).game_stats
+
+def test_replay_matches_batch(seasons):
+    replayed = 0
+    for season in seasons:
+        for orig in season.matches:
+            games = [game for game in orig.games if game.include]
+            if not games:
+                continue
+
+            match = VolleyMatch(orig.opponent, season.roster)
+            for game in games:
+                match.add_game(_blank(game))
+            # aggregates computed up front are updated by every point
+            _ = match.match_stats
+
+            for game, live in zip(games, match.games):
+                for side in game.timeline.side:
+                    live.point(side == PLUS)
+                live.end()
+
+                assert _same_stats(live.game_stats, _batch(live))
+                replayed += 1
+
+            assert _same_stats(match.match_stats,
+                               VolleyStats.sum(_batch(game) for game in match.games))
+    assert replayed
+
+def test_excluded_detailed_game(seasons):
+    # details go with the game's stats, an excluded game scored live has neither
+    game  = next(game for season in seasons for match in season.matches for game in match.games
+                 if game.include and game.detailed)
+    sheet = _blank(game) | {'include': False, 'detailed': game.detailed}
+    live  = VolleyGame(sheet, game.roster)
+    for side in game.timeline.side:
+        live.point(side == PLUS)
+    live.end()
+
+    batch = VolleyGame(sheet | {'team_scores': list(live.team_scores),
+                                'opponent_scores': list(live.oppo_scores)}, game.roster)
+    assert _same_stats(live.game_stats, batch.game_stats)
+    assert not any(player.total_detailed_games for player in live.game_stats.player_stats.values())
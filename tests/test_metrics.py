@@ -0,0 +1,106 @@
+'''Metrics: stages and counters are recorded when enabled, nothing when disabled'''
+import io
+import json
+import os
+
+import pytest
+
+from volley import volley_metrics
+from volley.volley_loader import load_season
+from volley.volley_metrics import FORMAT_JSON, METRICS, Metrics
+from volley.volley_report import VolleyReportText
+
+from .conftest import SHEETS
+
+@pytest.fixture
+def recording():
+    '''The process wide recorder enabled and empty, put back as it was afterwards'''
+    enabled = METRICS.enabled
+    stages, counters = dict(METRICS.stages), dict(METRICS.counters)
+    METRICS.reset()
+    METRICS.enable()
+    yield METRICS
+    METRICS.enabled = enabled
+    METRICS.reset()
+    METRICS.stages.update(stages)
+    METRICS.counters.update(counters)
+
+def test_disabled_records_nothing():
+    metrics = Metrics()
+    with metrics.stage('load', 'x'):
+        pass
+    metrics.count('stats_add')
+    assert metrics.stage('load') is metrics.stage('parse')
+    assert metrics.snapshot() == {'stages': [], 'counters': []}
+
+def test_stages_and_counters():
+    metrics = Metrics()
+    metrics.enable()
+    for _ in range(3):
+        with metrics.stage('render', lambda: 'match 1'):
+            pass
+    metrics.count('stats_add', amount=2)
+    metrics.count('stats_add')
+
+    data = metrics.snapshot()
+    assert [(row['stage'], row['scope'], row['calls']) for row in data['stages']] == \
+           [('render', 'match 1', 3)]
+    assert data['counters'] == [{'counter': 'stats_add', 'scope': '', 'count': 3}]
+
+    # disabling keeps what was recorded, reset drops it
+    metrics.disable()
+    metrics.count('stats_add')
+    assert metrics.snapshot() == data
+    metrics.reset()
+    assert metrics.snapshot() == {'stages': [], 'counters': []}
+
+def test_dump():
+    metrics = Metrics()
+    metrics.enable()
+    with metrics.stage('parse', 'sheet.yaml'):
+        pass
+    metrics.count('render_cache_hit')
+
+    stream = io.StringIO()
+    metrics.dump(stream, FORMAT_JSON)
+    assert json.loads(stream.getvalue()) == metrics.snapshot()
+
+    stream = io.StringIO()
+    metrics.dump(stream)
+    lines = stream.getvalue().splitlines()
+    assert lines[0].split() == ['stage', 'scope', 'calls', 'total', 'ms', 'mean', 'us', 'blocks']
+    assert lines[1].split()[:3] == ['parse', 'sheet.yaml', '1']
+    assert lines[-1].split() == ['render_cache_hit', '1']
+
+    with pytest.raises(ValueError):
+        metrics.enable('csv')
+
+def test_env_setting(monkeypatch):
+    monkeypatch.setattr(volley_metrics, 'METRICS', Metrics())
+
+    monkeypatch.setenv(volley_metrics.ENV_VAR, 'csv')
+    with pytest.warns(RuntimeWarning):
+        volley_metrics._enable_from_env()
+    assert not volley_metrics.METRICS.enabled
+
+    monkeypatch.setenv(volley_metrics.ENV_VAR, 'json:out.json')
+    volley_metrics._enable_from_env()
+    assert volley_metrics.METRICS.enabled
+    assert volley_metrics.METRICS.output == (FORMAT_JSON, 'out.json')
+
+def test_pipeline_stages(recording):
+    season = load_season(SHEETS[0], use_cache=False)
+    _ = season.season_stats
+    report = VolleyReportText()
+    report.add_match(season.matches[0])
+    report.add_match(season.matches[0])
+
+    data   = recording.snapshot()
+    stages = {row['stage'] for row in data['stages']}
+    assert {'load', 'parse', 'build', 'game_stats', 'aggregate', 'render'} <= stages
+    assert {row['scope'] for row in data['stages'] if row['stage'] == 'load'} == \
+           {os.path.basename(SHEETS[0])}
+
+    renders = [row for row in data['stages'] if row['stage'] == 'render']
+    assert sum(row['calls'] for row in renders) == 1
+    assert {'counter': 'render_cache_hit', 'scope': '', 'count': 1} in data['counters']
@@ -0,0 +1,71 @@
+'''Render cache: unchanged matches hit, edited matches miss, least recently used go first'''
+import pytest
+
+from volley.volley_loader import load_season
+from volley.volley_report import VolleyReportText
+
+from .conftest import SHEETS
+
+@pytest.fixture
+def season():
+    '''Own copy of a sheet, the tests edit it'''
+    return load_season(SHEETS[-1], use_cache=False)
+
+def _fresh(match):
+    return VolleyReportText(cache_size=0).add_match(match)
+
+def test_unchanged_match_hits(season):
+    report = VolleyReportText()
+    match  = season.matches[0]
+    msg    = report.add_match(match)
+
+    assert report.add_match(match) is msg
+    # content addressed, the same match loaded again hits too
+    again = load_season(SHEETS[-1], use_cache=False).matches[0]
+    assert report.match_key(again) == report.match_key(match)
+    assert report.add_match(again) is msg
+    assert len(report._cache) == 1
+
+def test_edited_game_misses(season):
+    report = VolleyReportText()
+    match  = season.matches[0]
+    game   = next(game for game in match.games if game.include)
+    msg    = report.add_match(match)
+    key    = report.match_key(match)
+
+    # score lists swapped in place, assigning serve_start drops the cached stats
+    game.team_scores[:], game.oppo_scores[:] = game.oppo_scores, game.team_scores
+    game.serve_start = not game.serve_start
+    assert report.match_key(match) != key
+    assert report.add_match(match) == _fresh(match) != msg
+
+def test_lineup_change_misses(season):
+    report = VolleyReportText()
+    match  = season.matches[0]
+    game   = next(game for game in match.games if game.include and not game.detailed)
+    msg    = report.add_match(match)
+    key    = report.match_key(match)
+
+    game.lineup = game.lineup[1:] + game.lineup[:1]
+    assert report.match_key(match) != key
+    assert report.add_match(match) == _fresh(match) != msg
+
+def test_evicts_least_recently_used(season):
+    report = VolleyReportText(cache_size=2)
+    first, second, third = season.matches[:3]
+    keys = [report.match_key(match) for match in (first, second, third)]
+
+    report.add_match(first)
+    report.add_match(second)
+    # first is used again, second is now the oldest entry
+    report.add_match(first)
+    report.add_match(third)
+    assert list(report._cache) == [keys[0], keys[2]]
+
+    report.add_match(second)
+    assert list(report._cache) == [keys[2], keys[1]]
+
+def test_disabled_cache(season):
+    report = VolleyReportText(cache_size=0)
+    assert report.add_match(season.matches[0]) == VolleyReportText().add_match(season.matches[0])
+    assert not report._cache
@@ -0,0 +1,56 @@
+'''Text report: batch renders on a process pool give the serial output'''
+import io
+import pickle
+
+import pytest
+
+from volley.volley_loader import load_season
+from volley.volley_match import VolleyArchive
+from volley.volley_report import VolleyReportText
+
+from .conftest import SHEETS
+
+@pytest.fixture
+def archived():
+    '''Own copies of the sheets in an archive, with their stats computed'''
+    seasons = [load_season(path, use_cache=False) for path in SHEETS]
+    _ = VolleyArchive(seasons).all_time_stats
+    return seasons
+
+def test_batch_matches_serial(seasons):
+    serial = VolleyReportText(cache_size=0).add_seasons(seasons, processes=1)
+    pooled = VolleyReportText(cache_size=0).add_seasons(seasons, processes=2)
+
+    assert pooled == serial
+    assert serial == [VolleyReportText().add_match(match)
+                      for season in seasons for match in season.matches]
+
+def test_write_batch_matches_write(seasons):
+    expected = io.StringIO()
+    VolleyReportText().write(seasons, expected)
+
+    for processes in (1, 2):
+        sink = io.StringIO()
+        VolleyReportText().write_batch(seasons, sink, processes=processes)
+        assert sink.getvalue() == expected.getvalue()
+
+def test_batch_with_archive(archived):
+    serial = VolleyReportText(cache_size=0).add_seasons(archived, processes=1)
+    assert VolleyReportText(cache_size=0).add_seasons(archived, processes=2) == serial
+
+def test_match_pickles_alone(archived):
+    # what a worker gets for a match: not its season nor the archive
+    match = archived[0].matches[0]
+    assert len(pickle.dumps(match)) * 5 < len(pickle.dumps(archived[0]))
+
+    copy = pickle.loads(pickle.dumps(match))
+    assert copy.season is None
+    assert VolleyReportText().add_match(copy) == VolleyReportText().add_match(match)
+
+def test_season_pickle_links_matches(archived):
+    season = pickle.loads(pickle.dumps(archived[0]))
+    assert season.archive is None
+    assert all(match.season is season for match in season.matches)
+
+    archive = pickle.loads(pickle.dumps(archived[0].archive))
+    assert all(season.archive is archive for season in archive.seasons)
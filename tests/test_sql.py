@@ -0,0 +1,74 @@
+'''SeasonStore: SQL aggregates give the stats of summing the games'''
+import pytest
+
+from volley.volley_engine import _same_stats
+from volley.volley_loader import build_season
+from volley.volley_sql import SeasonStore
+from volley.volley_stats import VolleyStats
+
+@pytest.fixture(scope='module')
+def store(seasons):
+    with SeasonStore() as store:
+        ids = store.ingest_seasons(seasons)
+        yield store, list(zip(ids, seasons))
+
+def _games(seasons, match=lambda match: True, game=lambda game: True):
+    return VolleyStats.sum(item.game_stats for season in seasons for each in season.matches
+                           if match(each) for item in each.games if item.include and game(item))
+
+def test_season_and_match_stats(store):
+    store, stored = store
+    for season_id, season in stored:
+        stats = store.stats(season_id)
+        assert stats.stats_type == VolleyStats.SEASON
+        assert _same_stats(stats, season.season_stats)
+
+        match_ids = [row[0] for row in store.conn.execute(
+            'SELECT id FROM matches WHERE season_id = ? ORDER BY id', (season_id,))]
+        for match_id, match in zip(match_ids, season.matches):
+            stats = store.stats(match_id=match_id)
+            if not any(game.include for game in match.games):
+                assert not stats.valid
+                continue
+            assert stats.stats_type == VolleyStats.MATCH
+            assert _same_stats(stats, match.match_stats)
+
+def test_filters(store, seasons):
+    store, stored = store
+    assert _same_stats(store.stats(), _games(seasons))
+
+    for opponent in store.opponents():
+        assert _same_stats(store.stats(opponent=opponent),
+                           _games(seasons, match=lambda match: match.opponent_name == opponent))
+
+    for season_id, season in stored:
+        for player in season.roster.players:
+            jersey = player.number
+            assert _same_stats(store.stats(season_id, jersey=jersey),
+                               _games([season], game=lambda game: jersey in game.lineup))
+
+def test_player_stats(store):
+    store, stored = store
+    for season_id, season in stored:
+        for jersey, player in season.season_stats.player_stats.items():
+            assert store.player_stats(jersey, season_id)._vec == player._vec
+
+def test_load(store):
+    store, stored = store
+    for season_id, season in stored:
+        loaded = store.load(season_id)
+        assert loaded.league == season.league
+        assert _same_stats(loaded.season_stats, season.season_stats)
+
+def test_league_name_with_spaces():
+    sheet = {'league': 'Rec League B', 'season': 'late fall', 'year': '2023-24',
+             'roster': {'players': [{'name': 'Sam', 'status': 'full', 'jersey': 1}]},
+             'matches': []}
+    season = build_season(sheet)
+    with SeasonStore() as store:
+        season_id = store.ingest(season)
+        loaded = store.load(season_id)
+
+    assert (loaded.league_name, loaded.season_name, loaded.year) == \
+           ('Rec League B', 'late fall', '2023-24')
+    assert loaded.league == season.league
@@ -0,0 +1,115 @@
+'''Stats storage: named fields are views on the vector, + is += into a new object'''
+import os
+
+import pytest
+import yaml
+
+from volley.volley_match import VolleyGame
+from volley.volley_player import VolleyRoster
+from volley.volley_stats import PlayerStats, VolleyStats
+
+SHEET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scores',
+                     'mens-wn23.yaml')
+
+def _player(num, seed):
+    player = PlayerStats(num)
+    for idx, name in enumerate(PlayerStats.PAIR_FIELDS):
+        setattr(player, name, [seed + idx, -(seed + 2 * idx)])
+    for idx, name in enumerate(PlayerStats.COUNT_FIELDS):
+        setattr(player, name, seed * 3 + idx)
+    return player
+
+def _fields(player):
+    return {name: list(getattr(player, name)) for name in PlayerStats.PAIR_FIELDS} | \
+           {name: getattr(player, name) for name in PlayerStats.COUNT_FIELDS}
+
+def test_fields_round_trip():
+    player = _player(7, 1)
+    fields = _fields(player)
+
+    assert fields == {name: [1 + idx, -(1 + 2 * idx)]
+                      for idx, name in enumerate(PlayerStats.PAIR_FIELDS)} | \
+                     {name: 3 + idx for idx, name in enumerate(PlayerStats.COUNT_FIELDS)}
+    assert [list(pair) for pair in player._rotation_pm] == \
+           [fields[name] for name in PlayerStats.PAIR_FIELDS[:len(PlayerStats.ROTATION)]]
+
+    # one side of a pair is written through the view
+    player.rb_pm[1] -= 5
+    assert list(player.rb_pm) == [1, -6]
+    assert _fields(player) == fields | {'rb_pm': [1, -6]}
+
+def test_player_add():
+    left, right = _player(7, 1), _player(7, 10)
+    before = _fields(left), _fields(right)
+    total  = left + right
+
+    assert (_fields(left), _fields(right)) == before
+    for name in PlayerStats.PAIR_FIELDS:
+        assert list(getattr(total, name)) == list(map(sum, zip(getattr(left, name),
+                                                               getattr(right, name))))
+    for name in PlayerStats.COUNT_FIELDS:
+        assert getattr(total, name) == getattr(left, name) + getattr(right, name)
+    # the position +/- of a sum are the sums, not left at 0
+    assert all(list(pair) != [0, 0] for pair in total._rotation_pm)
+
+    with pytest.raises(Exception):
+        _ = left + _player(8, 1)
+
+def _games():
+    with open(SHEET, 'rb') as file:
+        sheet = yaml.safe_load(file)
+    roster = VolleyRoster()
+    for player in sheet['roster']['players']:
+        roster.add_player(player['name'], 'x', player['status'], player['jersey'])
+    return [[VolleyGame(game, roster).game_stats for game in match[1:]]
+            for match in sheet['matches'] if match]
+
+def _state(stats):
+    # every attribute, players in order with their vector and serve lists
+    state = {name: value for name, value in vars(stats).items() if name != 'player_stats'}
+    state['player_stats'] = [(num, list(player._vec), list(player.served_scores),
+                              list(player.serve_runs))
+                             for num, player in stats.player_stats.items()]
+    return state
+
+def _iadd(left, right):
+    # what += leaves in left, an aggregate takes other in, anything else goes into a new one
+    if left.valid and left.stats_type > right.stats_type:
+        total = left.copy()
+    else:
+        total = VolleyStats()
+        total += left
+    total += right
+    return total
+
+def test_add_is_iadd():
+    matches = [VolleyStats.sum(games) for games in _games()]
+    games   = _games()[0]
+    pairs   = [(games[0], games[1]), (matches[0], games[2]), (matches[0], matches[1]),
+               (VolleyStats.sum(matches), matches[2]), (VolleyStats(), games[0]),
+               (games[0], VolleyStats())]
+
+    for left, right in pairs:
+        before = _state(left), _state(right)
+        total  = left + right
+
+        assert (_state(left), _state(right)) == before
+        assert _state(total) == _state(_iadd(left, right))
+        assert total is not left and total is not right
+
+    # an aggregate plus one more game, same as accumulating it in place
+    match = VolleyStats.sum(games[:2])
+    total = match + games[2]
+    match += games[2]
+    assert _state(total) == _state(match) == _state(VolleyStats.sum(games))
+
+def test_sum_levels():
+    matches = [VolleyStats.sum(games) for games in _games()]
+    season  = VolleyStats.sum(matches)
+
+    assert {stats.stats_type for stats in matches if stats.valid} == {VolleyStats.MATCH}
+    assert season.stats_type == VolleyStats.SEASON
+    # a season counts the games won and lost
+    assert season.final_team_score + season.final_oppo_score == \
+           sum(1 for games in _games() for game in games if game.valid)
+    assert not VolleyStats.sum([]).valid
@@ -0,0 +1,31 @@
+'''Synthetic seasons: valid sheets, same seed same sheet'''
+import pytest
+
+from volley.volley_loader import build_season
+from volley.volley_synth import SeasonSynth, LEAGUE_COED, LEAGUE_MENS
+from volley.volley_validate import validate_season
+
+@pytest.mark.parametrize('league', [LEAGUE_MENS, LEAGUE_COED])
+@pytest.mark.parametrize('seed', [0, 1, 7])
+def test_synthetic_season_is_valid(league, seed):
+    season = build_season(SeasonSynth(matches=20, league=league, seed=seed, detailed=0.5).season())
+    report = validate_season(season, 'synthetic')
+
+    assert report.games == 60
+    assert not report.issues, str(report)
+
+def test_first_server_alternates():
+    sheet = SeasonSynth(matches=20, seed=3).season()
+    for match in sheet['matches']:
+        serves = [game['serve'] for game in match[1:]]
+        assert serves == [serves[0], not serves[0], serves[0]]
+
+def test_same_seed_same_sheet():
+    assert SeasonSynth(matches=5, seed=4).season() == SeasonSynth(matches=5, seed=4).season()
+    assert SeasonSynth(matches=5, seed=4).season() != SeasonSynth(matches=5, seed=5).season()
+
+def test_bad_parameters():
+    with pytest.raises(ValueError):
+        SeasonSynth(league='womens')
+    with pytest.raises(ValueError):
+        SeasonSynth(players=10, league=LEAGUE_COED)
@@ -0,0 +1,48 @@
+'''Fast table renderer: same output as tabulate'''
+import random
+import string
+
+import pytest
+
+from volley.volley_report import VolleyReportText
+from volley.volley_table import TableLayout, RENDER_FAST, RENDER_TABULATE
+
+WORDS = ['a', 'pm', 'serve', 'side-out', 'rotation', 'Marianne', 'x' * 14, 'two words',
+         'line\nbreak', ' padded ', 'RB', 'well-known-player']
+
+def _cell(rand):
+    kind = rand.random()
+    if kind < 0.3:
+        return rand.randint(-50, 500)
+    if kind < 0.5:
+        return round(rand.uniform(-10, 10), rand.randint(0, 3))
+    if kind < 0.9:
+        return ' '.join(rand.choice(WORDS) for _ in range(rand.randint(1, 3)))
+    return ''.join(rand.choice(string.ascii_letters) for _ in range(rand.randint(1, 20)))
+
+def _layout(rand, style, cols):
+    headers = ['\n'.join(rand.choice(WORDS).split()) for _ in range(cols)]
+    widths  = [rand.choice([None, 4, 6, 10]) for _ in range(cols)] if rand.random() < 0.7 else None
+    header_widths = [rand.choice([None, 5, 8]) for _ in range(cols)] if rand.random() < 0.5 \
+                    else None
+    align = [rand.choice(['left', 'right', 'center']) for _ in range(cols)]
+    return TableLayout(headers, style, widths, header_widths, align,
+                       rand.choice(['g', '.1f', '.2f']))
+
+@pytest.mark.parametrize('style', ['fancy_grid', 'presto'])
+def test_random_tables(style):
+    rand = random.Random(style)
+    for _ in range(2000):
+        cols   = rand.randint(1, 6)
+        layout = _layout(rand, style, cols)
+        rows   = [[_cell(rand) for _ in range(cols)] for _ in range(rand.randint(0, 5))]
+        assert layout.render(rows, RENDER_FAST) == layout.render_tabulate(rows)
+
+def test_unknown_style():
+    with pytest.raises(ValueError):
+        TableLayout(['a'], 'grid')
+
+def test_report_renderers(seasons):
+    fast      = ''.join(VolleyReportText().iter_seasons(seasons))
+    reference = ''.join(VolleyReportText(renderer=RENDER_TABULATE).iter_seasons(seasons))
+    assert fast == reference
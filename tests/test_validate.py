@@ -0,0 +1,45 @@
+'''Validation: invalid games are found again on snapshot (warm) loads'''
+from volley.volley_loader import load_season
+from volley.volley_validate import validate_season
+
+def _invalid(season):
+    return [(match.match_num, game.game) for match in season.matches for game in match.games
+            if not season.validation.is_valid(game)]
+
+def test_warm_load_keeps_invalid_games(sheets, tmp_path):
+    found = 0
+    for path in sheets:
+        cold = load_season(path, cache_dir=str(tmp_path))
+        warm = load_season(path, cache_dir=str(tmp_path))
+        assert warm is not cold
+
+        assert warm.validation.invalid_games == cold.validation.invalid_games
+        assert _invalid(warm) == _invalid(cold)
+        assert [str(issue) for issue in warm.validation.issues] \
+            == [str(issue) for issue in cold.validation.issues]
+        found += len(_invalid(cold))
+    # the sample sheets hold at least one game with errors
+    assert found
+
+def test_invalid_games_left_out_of_stats(seasons):
+    for season in seasons:
+        for match in season.matches:
+            for game in match.games:
+                if not season.validation.is_valid(game):
+                    assert not game.include
+
+def test_duplicate_game_numbers(sheets):
+    # a sheet numbering two games of a match the same, only the game with errors is left out
+    season = load_season(sheets[0], use_cache=False, validate=False)
+    match  = next(match for match in season.matches
+                  if len(match.games) > 1 and all(game.include for game in match.games[:2])
+                  and validate_season(season, exclude=False).is_valid(match.games[0]))
+    first, second = match.games[:2]
+    second.game = first.game
+    second.team_scores[1:1] = ['?']
+
+    report = validate_season(season)
+    assert [(issue.game, issue.code) for issue in report.errors
+            if issue.match == match.match_num] == [(first.game, 'bad_token')]
+    assert report.is_valid(first) and first.include
+    assert not report.is_valid(second) and not second.include
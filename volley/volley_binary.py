@@ -0,0 +1,577 @@
+'''Volleyball Binary Season module
+
+Compact binary encoding of season score sheets, for archives too large to parse as YAML on every
+load. A binary sheet holds the same data as the YAML sheet (same VolleyGameType/DetailStatsType
+schema) and is laid out so a reader can memory-map it and decode single matches on demand:
+
+    magic 'VLYB', format version (1 byte)
+    header      varint length, then
+                    string table     every name, status, opponent, stat key, stored once
+                    season           season, year, league and roster
+                    match count
+    match index (match count + 1) little endian uint32 offsets of the match bodies
+    matches     one body per match:
+                    opponent, game count, then per game
+                        flags           serve, include, full and which optional keys follow
+                        game number, lineup
+                        team_scores     run-length encoded token streams
+                        opponent_scores
+                        final_score, detailed, other keys of the game
+
+Numbers are unsigned LEB128 varints (zigzag for signed values). A score list is stored as its
+serve runs, one varint per run packing the run's length and its closing token ('R', 'X', ...);
+runs whose points count up by one from the previous point (the usual case) store no points at
+all, others store their points as deltas. Lists holding anything else than points and 'R'/'X'
+tokens are stored as is, so malformed sheets still convert and fail validation the same way.
+
+Values outside the fixed layout (opponents, detailed stats, final scores, extra keys) use a
+tagged encoding of None/bool/int/float/str/list/dict. Top level YAML keys other than season,
+year, league, roster and matches (anchors of match blocks) are not kept.
+'''
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from .volley_match import VolleyMatch, VolleySeason
+from .volley_player import VolleyRoster
+from .volley_validate import validate_season
+
+MAGIC          = b'VLYB'
+FORMAT_VERSION = 1
+BINARY_EXT     = '.vlyb'
+
+SEASON_KEYS = ('season', 'year', 'league', 'roster')
+GAME_KEYS   = ('game', 'full', 'serve', 'include', 'lineup', 'team_scores', 'opponent_scores')
+
+# closing tokens of a serve run, OPEN_RUN for points after the last token of a list
+RUN_ENDS = ('R', 'X', 'r', 'x')
+OPEN_RUN = len(RUN_ENDS)
+
+# game flags
+_SERVE        = 0x01
+_INCLUDE      = 0x02
+_FULL         = 0x04
+_FINAL_SCORE  = 0x08
+_DETAILED     = 0x10
+_EXTRA        = 0x20
+_RAW_LINEUP   = 0x40
+_RAW_SCORES   = 0x80
+
+# value tags
+_NONE, _FALSE, _TRUE, _INT, _STR, _LIST, _DICT, _FLOAT = range(8)
+
+# body of an empty match, no opponent and no games
+_EMPTY_MATCH = bytes((_NONE, 0))
+
+class BinaryFormatError(ValueError):
+    '''Raised when a file is not a binary season sheet this version can read.'''
+
+def encode_sheet(sheet : Dict[str, Any]) -> bytes:
+    '''Encodes a parsed YAML season sheet.'''
+    strings : Dict[str, int] = {}
+
+    bodies = []
+    for match in sheet['matches']:
+        body = bytearray()
+        _encode_match(body, match or [], strings)
+        bodies.append(body)
+
+    season = bytearray()
+    _put_value(season, {key: sheet[key] for key in SEASON_KEYS}, strings)
+
+    header = bytearray()
+    _put_uint(header, len(strings))
+    for text in strings:
+        data = text.encode('utf-8')
+        _put_uint(header, len(data))
+        header += data
+    header += season
+    _put_uint(header, len(bodies))
+
+    out = bytearray(MAGIC)
+    out.append(FORMAT_VERSION)
+    _put_uint(out, len(header))
+    out += header
+
+    offset = len(out) + 4 * (len(bodies) + 1)
+    index  = array('I')
+    for body in bodies:
+        index.append(offset)
+        offset += len(body)
+    index.append(offset)
+    if sys.byteorder != 'little':
+        index.byteswap()
+
+    out += index.tobytes()
+    for body in bodies:
+        out += body
+    return bytes(out)
+
+def write_sheet(sheet : Dict[str, Any], path : str) -> None:
+    '''Writes a parsed YAML season sheet as a binary sheet.'''
+    data = encode_sheet(sheet)
+    with open(path, 'wb') as file:
+        file.write(data)
+
+def convert(yaml_path : str, out_path : Optional[str] = None) -> str:
+    '''Converts a YAML score sheet into a binary sheet.
+
+        Params:
+            yaml_path   (str): YAML score sheet
+
+            out_path    (str): optional, defaults to the sheet's path with BINARY_EXT
+
+        Returns:
+            out_path -> str
+    '''
+    if out_path is None:
+        out_path = os.path.splitext(yaml_path)[0] + BINARY_EXT
+    with open(yaml_path, 'rb') as file:
+        sheet = yaml.safe_load(file)
+    write_sheet(sheet, out_path)
+    return out_path
+
+def read_sheet(path : str) -> Dict[str, Any]:
+    '''Decodes a binary sheet back into the parsed YAML form.'''
+    with BinarySeason(path) as season:
+        return season.sheet()
+
+def load_binary(path : str, validate : bool = True) -> VolleySeason:
+    '''Builds the whole season of a binary sheet, see load_season() for validate.
+
+    Every match and game is built, validation and the season's indexes need all of them. Open a
+    BinarySeason instead to build only the matches asked for.'''
+    with BinarySeason(path) as season:
+        return season.season(validate)
+
+class BinarySeason():
+    '''Memory-mapped binary sheet, decoding matches on demand.
+
+    Opening a sheet only reads its header (strings, season, roster) and match index, every match
+    is decoded the first time it is asked for. This is the way to read a few matches out of a
+    large archive: match() builds one match without touching the others, season() builds the
+    rest and reuses the matches match() already built. Matches built by match() alone are not
+    validated, see volley_validate.validate_match().
+
+    Corrupt or truncated sheets raise BinaryFormatError, on open for the header and match index,
+    when a match is decoded for its body.
+
+        Params:
+            path        (str): binary season sheet
+    '''
+    def __init__(self, path : str) -> None:
+        self.path = path
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size <= len(MAGIC):
+                raise BinaryFormatError(f'{path}: not a binary season sheet')
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self._read_header()
+        except (IndexError, KeyError, TypeError, AttributeError, struct.error,
+                UnicodeDecodeError) as exc:
+            self.close()
+            raise BinaryFormatError(f'{path}: truncated or corrupt binary sheet') from exc
+        except BinaryFormatError:
+            self.close()
+            raise
+
+        # built matches by index, None for empty matches
+        self._matches : Dict[int, Optional[VolleyMatch]] = {}
+        self._season  : Optional[VolleySeason] = None
+
+    def __enter__(self) -> "BinarySeason":
+        return self
+
+    def __exit__(self, *exc : Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def close(self) -> None:
+        '''Unmaps the file, matches already decoded stay usable.'''
+        if not self._map.closed:
+            self._map.close()
+
+    def match_sheet(self, idx : int) -> List[Any]:
+        '''Returns a match in the parsed YAML form: [{'opponent': ...}, game, ...]'''
+        if not 0 <= idx < len(self):
+            raise IndexError(f'match index out of range: {idx}')
+        start, end = self._offsets[idx], self._offsets[idx + 1]
+        cursor = _Cursor(self._map[start:end], self._strings)
+        try:
+            sheet = _decode_match(cursor)
+        except (IndexError, TypeError, struct.error, UnicodeDecodeError) as exc:
+            raise BinaryFormatError(f'{self.path}: match {idx + 1} is truncated or corrupt') \
+                from exc
+        if cursor.pos != end - start:
+            raise BinaryFormatError(f'{self.path}: match {idx + 1} size mismatch')
+        return sheet
+
+    def match(self, idx : int) -> VolleyMatch:
+        '''Returns a match (0 based index in the sheet's matches) built from the sheet, decoded on
+        first access. It is numbered as in season(), empty matches before it take no number.'''
+        match = self._build(idx)
+        if match is None:
+            raise ValueError(f'{self.path}: match {idx + 1} is empty')
+        return match
+
+    def sheet(self) -> Dict[str, Any]:
+        '''Returns the whole sheet in the parsed YAML form.'''
+        sheet = dict(self.info)
+        sheet['matches'] = [self.match_sheet(idx) for idx in range(len(self))]
+        return sheet
+
+    def season(self, validate : bool = True) -> VolleySeason:
+        '''Builds the season with all its matches, built once per sheet: later calls return the
+        same season (validated on the first call asking for it).'''
+        season = self._season
+        if season is None:
+            info   = self.info
+            season = self._season = VolleySeason(info['league'], info['season'], info['year'],
+                                                 self.roster)
+            for idx in range(len(self)):
+                # empty matches are skipped, same as build_season()
+                match = self._build(idx)
+                if match is not None:
+                    season.add_match(match)
+        if validate and season.validation is None:
+            season.validation = validate_season(season, os.path.basename(self.path))
+        return season
+
+    def _build(self, idx : int) -> Optional[VolleyMatch]:
+        if idx in self._matches:
+            return self._matches[idx]
+
+        sheet = self.match_sheet(idx)
+        match = None
+        if sheet:
+            match = VolleyMatch(sheet[0]['opponent'], self.roster)
+            for game in sheet[1:]:
+                match.add_game(game)
+            match.match_num = self._match_num(idx)
+        self._matches[idx] = match
+        return match
+
+    def _match_num(self, idx : int) -> int:
+        # numbered as season() (and build_season()) number them, empty matches take no number,
+        # they are told from the size and bytes of their body without decoding any match
+        offsets = self._offsets
+        data    = self._map
+        return 1 + sum(1 for pos in range(idx)
+                       if data[offsets[pos]:offsets[pos + 1]] != _EMPTY_MATCH)
+
+    def _read_header(self) -> None:
+        data = self._map
+        if data[:4] != MAGIC:
+            raise BinaryFormatError(f'{self.path}: not a binary season sheet')
+        if data[4] != FORMAT_VERSION:
+            raise BinaryFormatError(f'{self.path}: unsupported format version {data[4]}')
+
+        cursor = _Cursor(data, [])
+        cursor.pos = 5
+        length = cursor.uint()
+        end    = cursor.pos + length
+
+        strings = cursor.strings
+        for _ in range(cursor.uint()):
+            size = cursor.uint()
+            strings.append(bytes(data[cursor.pos:cursor.pos + size]).decode('utf-8'))
+            cursor.pos += size
+
+        self._strings = strings
+        self.info : Dict[str, Any] = cursor.value()
+        if not isinstance(self.info, dict) or any(key not in self.info for key in SEASON_KEYS):
+            raise BinaryFormatError(f'{self.path}: header without season info')
+        count = cursor.uint()
+        if cursor.pos != end:
+            raise BinaryFormatError(f'{self.path}: header size mismatch')
+
+        index_end = end + 4 * (count + 1)
+        if index_end > len(data):
+            raise BinaryFormatError(f'{self.path}: truncated match index')
+        self._offsets = array('I', data[end:index_end])
+        if sys.byteorder != 'little':
+            self._offsets.byteswap()
+
+        offsets = self._offsets
+        if offsets[0] != index_end or offsets[-1] > len(data) \
+           or any(offsets[idx] > offsets[idx + 1] for idx in range(count)):
+            raise BinaryFormatError(f'{self.path}: match index points outside the file')
+
+        self.roster = _build_roster(self.info['roster'])
+
+def _build_roster(roster : Dict[str, List[Dict[str, Any]]]) -> VolleyRoster:
+    # same as build_season(), coed sheets split players by gender
+    ret = VolleyRoster()
+    for group, gender in (('females', 'f'), ('males', 'm'), ('players', 'x')):
+        for player in roster.get(group, []):
+            ret.add_player(player['name'], gender, player['status'], player['jersey'])
+    return ret
+
+### Encoding
+
+def _encode_match(out : bytearray, match : List[Any], strings : Dict[str, int]) -> None:
+    if not match:
+        _put_value(out, None, strings)
+        _put_uint(out, 0)
+        return
+
+    _put_value(out, match[0], strings)
+    _put_uint(out, len(match) - 1)
+    for game in match[1:]:
+        _encode_game(out, game, strings)
+
+def _encode_game(out : bytearray, game : Dict[str, Any], strings : Dict[str, int]) -> None:
+    missing = [key for key in GAME_KEYS if key not in game]
+    if missing:
+        raise ValueError(f'game {game.get("game")} without {", ".join(missing)}')
+
+    lineup = game['lineup']
+    team   = _encode_scores(game['team_scores'])
+    oppo   = _encode_scores(game['opponent_scores'])
+    extra  = {key: value for key, value in game.items()
+              if key not in GAME_KEYS and key not in ('final_score', 'detailed')}
+
+    flags = 0
+    if game['serve']:
+        flags |= _SERVE
+    if game['include']:
+        flags |= _INCLUDE
+    if game['full']:
+        flags |= _FULL
+    if 'final_score' in game:
+        flags |= _FINAL_SCORE
+    if 'detailed' in game:
+        flags |= _DETAILED
+    if extra:
+        flags |= _EXTRA
+    if not (isinstance(lineup, list) and all(_is_int(num) for num in lineup)):
+        flags |= _RAW_LINEUP
+    if team is None or oppo is None:
+        flags |= _RAW_SCORES
+    if not all(isinstance(game[key], bool) for key in ('serve', 'include', 'full')):
+        # flags only hold booleans
+        extra = dict(extra, **{key: game[key] for key in ('serve', 'include', 'full')})
+        flags |= _EXTRA
+
+    _put_uint(out, flags)
+    _put_value(out, game['game'], strings)
+
+    if flags & _RAW_LINEUP:
+        _put_value(out, lineup, strings)
+    else:
+        _put_uint(out, len(lineup))
+        for num in lineup:
+            _put_int(out, num)
+
+    if flags & _RAW_SCORES:
+        _put_value(out, game['team_scores'], strings)
+        _put_value(out, game['opponent_scores'], strings)
+    else:
+        out += team     # type: ignore[operator]
+        out += oppo     # type: ignore[operator]
+
+    if flags & _FINAL_SCORE:
+        _put_value(out, game['final_score'], strings)
+    if flags & _DETAILED:
+        _put_value(out, game['detailed'], strings)
+    if flags & _EXTRA:
+        _put_value(out, extra, strings)
+
+def _encode_scores(tokens : List[Any]) -> Optional[bytearray]:
+    '''Run-length encodes a score list, None if it holds anything else than points and tokens'''
+    runs : List[Tuple[int, List[int]]] = []
+    points : List[int] = []
+    for token in tokens:
+        if isinstance(token, str):
+            if token not in RUN_ENDS:
+                return None
+            runs.append((RUN_ENDS.index(token), points))
+            points = []
+        elif _is_int(token):
+            points.append(token)
+        else:
+            return None
+    if points:
+        runs.append((OPEN_RUN, points))
+
+    out  = bytearray()
+    prev = 0
+    _put_uint(out, len(runs))
+    for end, run in runs:
+        regular = run == list(range(prev + 1, prev + 1 + len(run)))
+        _put_uint(out, (len(run) << 4) | (0 if regular else 8) | end)
+        for point in run:
+            if not regular:
+                _put_int(out, point - prev)
+            prev = point
+    return out
+
+def _is_int(value : Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _put_uint(out : bytearray, value : int) -> None:
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _put_int(out : bytearray, value : int) -> None:
+    # zigzag, small negative numbers stay small
+    _put_uint(out, value * 2 if value >= 0 else -value * 2 - 1)
+
+def _put_value(out : bytearray, value : Any, strings : Dict[str, int]) -> None:
+    if value is None:
+        out.append(_NONE)
+    elif value is True:
+        out.append(_TRUE)
+    elif value is False:
+        out.append(_FALSE)
+    elif isinstance(value, int):
+        out.append(_INT)
+        _put_int(out, value)
+    elif isinstance(value, float):
+        out.append(_FLOAT)
+        out += struct.pack('<d', value)
+    elif isinstance(value, str):
+        out.append(_STR)
+        _put_uint(out, strings.setdefault(value, len(strings)))
+    elif isinstance(value, (list, tuple)):
+        out.append(_LIST)
+        _put_uint(out, len(value))
+        for item in value:
+            _put_value(out, item, strings)
+    elif isinstance(value, dict):
+        out.append(_DICT)
+        _put_uint(out, len(value))
+        for key, item in value.items():
+            _put_value(out, key, strings)
+            _put_value(out, item, strings)
+    else:
+        raise ValueError(f'no binary encoding for {type(value).__name__}: {value!r}')
+
+### Decoding
+
+class _Cursor():
+    '''Read position in a buffer'''
+    __slots__ = ('data', 'pos', 'strings')
+
+    def __init__(self, data : Any, strings : List[str]) -> None:
+        self.data    = data
+        self.pos     = 0
+        self.strings = strings
+
+    def uint(self) -> int:
+        data  = self.data
+        value = shift = 0
+        while True:
+            byte = data[self.pos]
+            self.pos += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def int(self) -> int:
+        value = self.uint()
+        return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+    def value(self) -> Any:
+        tag = self.data[self.pos]
+        self.pos += 1
+        if tag == _NONE:
+            return None
+        if tag == _TRUE:
+            return True
+        if tag == _FALSE:
+            return False
+        if tag == _INT:
+            return self.int()
+        if tag == _STR:
+            return self.strings[self.uint()]
+        if tag == _LIST:
+            return [self.value() for _ in range(self.uint())]
+        if tag == _DICT:
+            ret = {}
+            for _ in range(self.uint()):
+                key = self.value()
+                ret[key] = self.value()
+            return ret
+        if tag == _FLOAT:
+            value = struct.unpack_from('<d', self.data, self.pos)[0]
+            self.pos += 8
+            return value
+        raise BinaryFormatError(f'unknown value tag {tag}')
+
+    def scores(self) -> List[Any]:
+        tokens : List[Any] = []
+        prev = 0
+        for _ in range(self.uint()):
+            head   = self.uint()
+            length = head >> 4
+            if head & 8:
+                for _ in range(length):
+                    prev += self.int()
+                    tokens.append(prev)
+            else:
+                tokens += range(prev + 1, prev + 1 + length)
+                prev += length
+            end = head & 7
+            if end != OPEN_RUN:
+                tokens.append(RUN_ENDS[end])
+        return tokens
+
+def _decode_match(cursor : _Cursor) -> List[Any]:
+    head  = cursor.value()
+    count = cursor.uint()
+    if head is None and not count:
+        return []
+    if not isinstance(head, dict) or 'opponent' not in head:
+        raise BinaryFormatError('match without opponent')
+    return [head] + [_decode_game(cursor) for _ in range(count)]
+
+def _decode_game(cursor : _Cursor) -> Dict[str, Any]:
+    flags = cursor.uint()
+    game : Dict[str, Any] = {'game': cursor.value(), 'full': bool(flags & _FULL),
+                             'serve': bool(flags & _SERVE), 'include': bool(flags & _INCLUDE)}
+
+    if flags & _RAW_LINEUP:
+        game['lineup'] = cursor.value()
+    else:
+        game['lineup'] = [cursor.int() for _ in range(cursor.uint())]
+
+    if flags & _RAW_SCORES:
+        game['team_scores']     = cursor.value()
+        game['opponent_scores'] = cursor.value()
+    else:
+        game['team_scores']     = cursor.scores()
+        game['opponent_scores'] = cursor.scores()
+
+    if flags & _FINAL_SCORE:
+        game['final_score'] = cursor.value()
+    if flags & _DETAILED:
+        game['detailed'] = cursor.value()
+    if flags & _EXTRA:
+        game.update(cursor.value())
+    return game
+
+def main(argv : Optional[List[str]] = None) -> int:
+    '''Converts the YAML score sheets given on the command line into binary sheets.'''
+    paths = sys.argv[1:] if argv is None else argv
+    if not paths:
+        print('usage: python -m volley.volley_binary SHEET.yaml [SHEET.yaml ...]')
+        return 2
+    for path in paths:
+        out = convert(path)
+        print(f'{path} -> {out} ({os.path.getsize(path)} -> {os.path.getsize(out)} bytes)')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
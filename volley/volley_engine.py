@@ -0,0 +1,220 @@
+'''Volleyball Rotation Engine module
+
+Alternative to the token-by-token rotation accounting of VolleyGame._calc_game_stats().
+
+Each score list is encoded into run-length arrays (one entry per serve run, closed by an 'R'/'X'
+token). A run's rotation is only its offset from the starting lineup, so the player at lineup index
+L plays the run at position (L - offset) % 6. Runs are summed per offset with strided slices of the
+run arrays and every player's +/- per position is then filled from those six sums, so the cost is
+O(runs) plus a fixed 6x6 spread instead of O(points x 6) with list slicing per rotation.
+
+The timeline engine credits the rallies of a game's RallyTimeline (see volley_timeline) to the
+same six rotation sums, so the stats come from the one decoded rally order shared with the
+event store and score progressions.
+
+Results are identical to the loop engine, check_engine_parity() compares all engines on a game.
+'''
+from array import array
+from typing import Callable, List, Tuple, Union, Sequence, TYPE_CHECKING
+
+from .volley_stats import VolleyStats, PlayerStats, PLUS
+from .volley_timeline import RallyTimeline
+
+if TYPE_CHECKING:
+    from .volley_match import VolleyGame
+
+ENGINE_LOOP     = 'loop'
+ENGINE_RUNS     = 'runs'
+ENGINE_TIMELINE = 'timeline'
+ENGINES         = (ENGINE_LOOP, ENGINE_RUNS, ENGINE_TIMELINE)
+
+COURT_POS = len(PlayerStats.ROTATION)
+
+END_TOKENS = ('R', 'r', 'X', 'x')
+
+def encode_runs(tokens : Sequence[Union[str, int]]) -> Tuple[array, array]:
+    '''Encodes a score list into run-length arrays.
+
+        Returns:
+            (lengths, scores) -> (array, array)
+                lengths holds the number of points of every closed run, scores holds the points
+                of those runs back to back. Points after the last 'R'/'X' are not part of any run,
+                same as with the loop engine.
+    '''
+    lengths = array('i')
+    scores  = array('i')
+    run = 0
+    for token in tokens:
+        if token in END_TOKENS:
+            lengths.append(run)
+            run = 0
+        else:
+            scores.append(int(token))
+            run += 1
+
+    # drop the points of an unclosed run
+    del scores[sum(lengths):]
+
+    return lengths, scores
+
+def calc_game_stats_runs(stats : VolleyStats, lineup : List[int], serve_start : bool, full : bool,
+                         team_scores : Sequence[Union[str, int]],
+                         oppo_scores : Sequence[Union[str, int]]) -> None:
+    '''Calculates game stats with the run-length engine, same results as
+    VolleyGame._calc_game_stats().
+    '''
+    # calculate game final scores
+    stats.add_final_score(max([int(x) for x in team_scores if str(x).isdigit()], default=0),
+                          max([int(x) for x in oppo_scores if str(x).isdigit()], default=0))
+
+    # receiving teams start one rotation back
+    start = 0
+    if not serve_start:
+        start = -1
+        if team_scores:
+            assert int(team_scores[0])
+
+    team_runs, team_vals = encode_runs(team_scores)
+    oppo_runs, _         = encode_runs(oppo_scores)
+
+    plus  = [0] * COURT_POS
+    minus = [0] * COURT_POS
+
+    ### PROCESS Team Scored Points Against Opponent
+    # run k plays at offset start + k, every run but the opening serve of the game gives its first
+    # point (the side-out) to the previous offset
+    for res in range(COURT_POS):
+        plus[(start + res) % COURT_POS] += sum(team_runs[res::COURT_POS])
+
+    for res in range(COURT_POS):
+        first = res
+        if serve_start and res == 0:
+            first += COURT_POS
+        count = len(range(first, len(team_runs), COURT_POS))
+        plus[(start + res) % COURT_POS]     -= count
+        plus[(start + res - 1) % COURT_POS] += count
+
+    ### PROCESS Opponent Scored Points Against Team
+    for res in range(COURT_POS):
+        minus[(start + res) % COURT_POS] -= sum(oppo_runs[res::COURT_POS])
+
+    _spread_points(stats, lineup, plus, minus)
+
+    ### Serve runs, in run order since they are kept as lists
+    pos = 0
+    for run, length in enumerate(team_runs):
+        served = team_vals[pos:pos + length]
+        if not (run == 0 and serve_start):
+            if not length:
+                raise ValueError(f'team serve run {run + 1} has no side-out point')
+            served = served[1:]
+        pos += length
+
+        server = stats.player_stats[lineup[(start + run) % COURT_POS]]
+        server.served_scores += served.tolist()
+        server.serve_runs.append(len(served))
+        server.total_serves += 1
+
+    ### FINALIZE Game Stats
+    stats.finish_game(full)
+
+def calc_game_stats_timeline(stats : VolleyStats, timeline : RallyTimeline, full : bool) -> None:
+    '''Calculates game stats from a game's rally timeline, same results as
+    VolleyGame._calc_game_stats().
+    '''
+    stats.add_final_score(*timeline.final_score)
+
+    lineup = timeline.lineup
+    start  = 0 if timeline.serve_start else -1
+
+    ### Every rally goes to the rotation it is credited to
+    plus  = [0] * COURT_POS
+    minus = [0] * COURT_POS
+    for side, offset in zip(timeline.side, timeline.offset):
+        if side == PLUS:
+            plus[offset] += 1
+        else:
+            minus[offset] -= 1
+
+    _spread_points(stats, lineup, plus, minus)
+
+    ### Serve runs, points as written on the sheet like the other engines, back to back
+    tokens = timeline.team_tokens
+    scores = [int(tokens[idx]) for idx in timeline.team_index]
+    pos = 0
+    for run, length in enumerate(timeline.team_runs):
+        served = scores[pos:pos + length]
+        if not (run == 0 and timeline.serve_start):
+            if not length:
+                raise ValueError(f'team serve run {run + 1} has no side-out point')
+            served = served[1:]
+        pos += length
+
+        server = stats.player_stats[lineup[(start + run) % COURT_POS]]
+        server.served_scores += served
+        server.serve_runs.append(len(served))
+        server.total_serves += 1
+
+    ### FINALIZE Game Stats
+    stats.finish_game(full)
+
+def _spread_points(stats : VolleyStats, lineup : List[int], plus : List[int],
+                   minus : List[int]) -> None:
+    '''Credits the +/- of every rotation offset to the players and trios on court.'''
+    # lineup index idx plays position pos at offset idx - pos
+    for idx, jersey_num in enumerate(lineup):
+        offsets = [(idx - pos) % COURT_POS for pos in range(COURT_POS)]
+        stats.player_stats[jersey_num].add_position_points([plus[off] for off in offsets],
+                                                           [minus[off] for off in offsets])
+
+    for offset in range(COURT_POS):
+        court = lineup[offset:] + lineup[:offset]
+        stats.add_trio_points(court, plus[offset], minus[offset])
+
+def check_engine_parity(game : "VolleyGame") -> bool:
+    '''Computes a game's stats with every engine and tells whether they are identical. Engines
+    rejecting the game have to raise the same exception type, messages may differ.'''
+    loop = _run_engine(game, lambda stats: game._calc_game_stats_loop(
+        stats, game.team_scores, game.oppo_scores))
+    runs = _run_engine(game, lambda stats: calc_game_stats_runs(
+        stats, game.lineup, game.serve_start, game.full, game.team_scores, game.oppo_scores))
+    timeline = _run_engine(game, lambda stats: calc_game_stats_timeline(
+        stats, game.timeline, game.full))
+
+    for other in (runs, timeline):
+        if isinstance(loop, VolleyStats) and isinstance(other, VolleyStats):
+            if not _same_stats(loop, other):
+                return False
+        elif type(loop) is not type(other):
+            return False
+    return True
+
+def _run_engine(game : "VolleyGame", engine : Callable[[VolleyStats], None]
+                ) -> Union[VolleyStats, Exception]:
+    # stats of the engine, or the exception it raised
+    stats = VolleyStats(game.lineup)
+    try:
+        engine(stats)
+    except Exception as exc:   # pylint: disable=broad-except
+        return exc
+    return stats
+
+def _same_stats(left : VolleyStats, right : VolleyStats) -> bool:
+    if (left.final_team_score, left.final_oppo_score, left.won, left.valid) != \
+       (right.final_team_score, right.final_oppo_score, right.won, right.valid):
+        return False
+
+    if left.player_stats.keys() != right.player_stats.keys():
+        return False
+
+    for num, player in left.player_stats.items():
+        other = right.player_stats[num]
+        if player._vec != other._vec or player.served_scores != other.served_scores \
+           or player.serve_runs != other.serve_runs:
+            return False
+
+    if left.back_row_stats != right.back_row_stats or \
+       left.front_row_stats != right.front_row_stats:
+        return False
+
+    return True
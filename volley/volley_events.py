@@ -0,0 +1,196 @@
+'''Volleyball Rally Event Store module
+
+Keeps every rally of every loaded game as one row of a columnar table backed by typed arrays, so
+ad-hoc questions can be answered with filters and group-bys over one in-memory table instead of
+re-parsing the score sheets and re-walking VolleySeason -> VolleyMatch -> VolleyGame.
+
+Row columns:
+    season      index of the season in the list the store was built from
+    match       match number within the season
+    game        game number within the match
+    rally       rally index within the game, starting at 0
+    side        PLUS (0) if the team won the rally, MINUS (1) if the opponent did
+    server      jersey of the team's server, -1 when the opponent served
+    team_score  team score after the rally
+    oppo_score  opponent score after the rally
+    rb .. cb    jerseys on court per position, same order as PlayerStats.ROTATION
+
+Rows are copied column by column from each game's RallyTimeline (see volley_timeline), so court
+positions are the ones the rotation engines credit the rally to and +/- aggregates of the store
+are the same as the PlayerStats rotation +/-. Games that are not included in stats are not
+stored.
+'''
+from array import array
+from itertools import compress, repeat
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .volley_match import VolleyGame, VolleySeason
+from .volley_stats import PlayerStats, PLUS, MINUS
+
+POSITION_COLUMNS = tuple(pos.lower() for pos in PlayerStats.ROTATION)
+
+# virtual group-by keys expanding each rally into one row per player on court
+ON_COURT      = 'on_court'
+COURT_POS_KEY = 'court_pos'
+
+RallyRow = Tuple[int, int, int, int, int, int, int, int, int, int, int, int, int, int]
+
+class RallyEventStore():
+    '''Columnar table of rallies, see module documentation for the columns.
+    '''
+    COLUMNS = (('season', 'H'), ('match', 'H'), ('game', 'B'), ('rally', 'H'), ('side', 'b'),
+               ('server', 'h'), ('team_score', 'H'), ('oppo_score', 'H')) + \
+              tuple((pos, 'h') for pos in POSITION_COLUMNS)
+
+    def __init__(self) -> None:
+        self.columns : Dict[str, array] = {name: array(code) for name, code in self.COLUMNS}
+        self.seasons : List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.columns['rally'])
+
+    @classmethod
+    def from_seasons(cls, seasons : Iterable[VolleySeason]) -> "RallyEventStore":
+        '''Builds the store from all included games of the given seasons.'''
+        store = cls()
+        for season in seasons:
+            store.add_season(season)
+        return store
+
+    def add_season(self, season : VolleySeason) -> None:
+        '''Appends all included games of a season.'''
+        self.seasons.append(season.league)
+        season_idx = len(self.seasons) - 1
+        for match in season.matches:
+            for game in match.games:
+                self.add_game(game, season_idx, match.match_num)
+
+    def add_game(self, game : VolleyGame, season_idx : int, match_num : int) -> None:
+        '''Appends the rallies of a single game.'''
+        if not game.include:
+            return
+
+        timeline = game.timeline
+        rallies  = len(timeline)
+
+        cols = self.columns
+        cols['season'].extend(repeat(season_idx, rallies))
+        cols['match'].extend(repeat(match_num, rallies))
+        cols['game'].extend(repeat(game.game, rallies))
+        cols['rally'].extend(range(rallies))
+        cols['side'].extend(timeline.side)
+        cols['server'].extend(timeline.server)
+        cols['team_score'].extend(timeline.team_score)
+        cols['oppo_score'].extend(timeline.oppo_score)
+        for pos, name in enumerate(POSITION_COLUMNS):
+            cols[name].extend(timeline.player_at(rally, pos) for rally in range(rallies))
+
+    def column(self, name : str) -> array:
+        '''Returns a column of the store.'''
+        return self.columns[name]
+
+    def rows(self) -> Iterator[Dict[str, int]]:
+        '''Iterates over the rallies as dictionaries, meant for inspection not bulk work.'''
+        names = [name for name, _ in self.COLUMNS]
+        for row in zip(*(self.columns[name] for name in names)):
+            yield dict(zip(names, row))
+
+    def filter(self, predicate : Optional[Callable[..., bool]] = None,
+               **conditions : Union[int, Iterable[int], Callable[[int], bool]]) -> "RallyEventStore":
+        '''Returns a new store holding only the matching rallies.
+
+            Params:
+                predicate  (callable): optional, called with the row's values as keyword arguments
+
+                conditions     (dict): column=value, column={values} or column=callable. The
+                    ON_COURT key matches rallies where the given jersey(s) were on court.
+        '''
+        mask = bytearray(b'\x01') * len(self)
+
+        for name, cond in conditions.items():
+            if name == ON_COURT:
+                mask = _and(mask, self._on_court_mask(cond))
+            else:
+                mask = _and(mask, _mask(self.columns[name], cond))
+
+        if predicate is not None:
+            names = [name for name, _ in self.COLUMNS]
+            mask = _and(mask, bytes(bool(predicate(**dict(zip(names, row))))
+                                    for row in zip(*(self.columns[name] for name in names))))
+
+        store = RallyEventStore()
+        store.seasons = list(self.seasons)
+        for name, code in self.COLUMNS:
+            store.columns[name] = array(code, compress(self.columns[name], mask))
+        return store
+
+    def group_by(self, *keys : str) -> Dict[Tuple[int, ...], List[int]]:
+        '''Aggregates rallies won/lost per group.
+
+        Keys are column names, ON_COURT (each rally counts once for each jersey on court) and
+        COURT_POS (position index of that jersey, only together with ON_COURT).
+
+            Returns:
+                groups -> dict()
+                    key tuple -> [points won, -points lost], same sign convention as the
+                    PlayerStats +/- pairs
+        '''
+        expand = ON_COURT in keys or COURT_POS_KEY in keys
+        if COURT_POS_KEY in keys and ON_COURT not in keys:
+            raise ValueError(f'{COURT_POS_KEY} can only be grouped together with {ON_COURT}')
+
+        plain = [self.columns[key] for key in keys if key not in (ON_COURT, COURT_POS_KEY)]
+        side  = self.columns['side']
+        groups : Dict[Tuple[int, ...], List[int]] = {}
+
+        if not expand:
+            for row, won in zip(zip(*plain), side):
+                _count(groups, row, won)
+            return groups
+
+        on_court = [self.columns[name] for name in POSITION_COLUMNS]
+        for row, won, court in zip(zip(*plain) if plain else repeat(()), side,
+                                   zip(*on_court)):
+            for pos, jersey in enumerate(court):
+                values = iter(row)
+                key = tuple(jersey if k == ON_COURT else pos if k == COURT_POS_KEY else next(values)
+                            for k in keys)
+                _count(groups, key, won)
+        return groups
+
+    def _on_court_mask(self, cond : Any) -> bytes:
+        wanted = _as_set(cond)
+        on_court = [self.columns[name] for name in POSITION_COLUMNS]
+        return bytes(not wanted.isdisjoint(court) for court in zip(*on_court))
+
+def iter_game_rallies(game : VolleyGame, season_idx : int = 0, match_num : int = 0
+                      ) -> Iterator[RallyRow]:
+    '''Iterates over a game's rallies in play order as store rows, read from its timeline.'''
+    for rally, (side, server, team, oppo, court) in enumerate(game.timeline):
+        yield (season_idx, match_num, game.game, rally, side, server, team, oppo, *court)
+
+def _as_set(cond : Any) -> set:
+    if isinstance(cond, int):
+        return {cond}
+    return set(cond)
+
+def _mask(col : array, cond : Any) -> bytes:
+    if callable(cond):
+        return bytes(bool(cond(value)) for value in col)
+    if isinstance(cond, int):
+        return bytes(value == cond for value in col)
+    wanted = _as_set(cond)
+    return bytes(value in wanted for value in col)
+
+def _and(left : Union[bytes, bytearray], right : Union[bytes, bytearray]) -> bytes:
+    return (int.from_bytes(left, 'little') & int.from_bytes(right, 'little')
+            ).to_bytes(len(left), 'little')
+
+def _count(groups : Dict[Tuple[int, ...], List[int]], key : Tuple[int, ...], side : int) -> None:
+    pair = groups.get(key)
+    if pair is None:
+        pair = groups[key] = [0, 0]
+    if side == PLUS:
+        pair[PLUS] += 1
+    else:
+        pair[MINUS] -= 1
@@ -0,0 +1,170 @@
+'''Volleyball Player Form module
+
+Windowed stats of a player over a range of the games (or matches) they played, e.g. their last
+10 games, for form tables and trend charts.
+
+Every player keeps the prefix sums of their game stats vectors (see PlayerStats) over the games
+they played, in the order the seasons, matches and games were added. The stats of any range of
+games are then the difference of two prefix sums: one vector subtraction, no matter how many
+games the range holds, and a rolling series costs one subtraction per point.
+
+Only the stats vector is windowed, served_scores and serve_runs of a windowed PlayerStats are
+empty. Games left out of the stats (include = False) are skipped. Games can only be appended in
+order, build a new PlayerForm after changing games already added.
+'''
+from array import array
+from operator import sub
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .volley_match import VolleyGame, VolleyMatch, VolleySeason
+from .volley_stats import PlayerStats
+
+VECTOR_LEN = PlayerStats.VECTOR_LEN
+
+class _PlayerSeries():
+    '''Games of one player and the prefix sums of their stats'''
+    __slots__ = ('games', 'prefix', 'match_starts', 'last_match')
+
+    def __init__(self) -> None:
+        self.games  : List[VolleyGame] = []
+        # prefix sum i (sum of the first i games) at [i * VECTOR_LEN, (i + 1) * VECTOR_LEN)
+        self.prefix = array('d', PlayerStats._ZERO)
+        # index of the first game of every match the player played
+        self.match_starts : List[int] = []
+        self.last_match   : Optional[VolleyMatch] = None
+
+class PlayerForm():
+    '''Prefix sums of every player's game stats, see module documentation.
+
+        Params:
+            seasons     (list): seasons in chronological order, e.g. VolleyArchive.seasons
+    '''
+    def __init__(self, seasons : Iterable[VolleySeason] = ()) -> None:
+        self._players : Dict[int, _PlayerSeries] = {}
+
+        for season in seasons:
+            self.add_season(season)
+
+    def add_season(self, season : VolleySeason) -> None:
+        '''Appends the games of a season.'''
+        for match in season.matches:
+            for game in match.games:
+                self.add_game(game)
+
+    def add_game(self, game : VolleyGame) -> None:
+        '''Appends a game, it has to be played after every game already added.'''
+        if not game.include:
+            return
+
+        for num, stats in game.game_stats.player_stats.items():
+            series = self._players.get(num)
+            if series is None:
+                series = self._players[num] = _PlayerSeries()
+
+            if game.match is None or game.match is not series.last_match:
+                series.match_starts.append(len(series.games))
+                series.last_match = game.match
+            series.games.append(game)
+
+            prefix = series.prefix
+            prefix.extend(map(float.__add__, prefix[-VECTOR_LEN:], stats._vec))
+
+    def players(self) -> List[int]:
+        '''Jerseys of every player with at least one game'''
+        return sorted(self._players)
+
+    def count(self, jersey_num : int, matches : bool = False) -> int:
+        '''Number of games (or matches) the player played'''
+        series = self._players.get(jersey_num)
+        if series is None:
+            return 0
+        return len(series.match_starts) if matches else len(series.games)
+
+    def games(self, jersey_num : int) -> List[VolleyGame]:
+        '''Games the player played, in order'''
+        series = self._players.get(jersey_num)
+        return list(series.games) if series is not None else []
+
+    def window(self, jersey_num : int, start : Optional[int] = None, stop : Optional[int] = None,
+               matches : bool = False) -> PlayerStats:
+        '''Returns the player's stats over a range of their games.
+
+            Params:
+                jersey_num  (int): player
+
+                start       (int): first game of the range, counted like a list slice (negative
+                    counts from the last game)
+
+                stop        (int): end of the range (excluded)
+
+                matches    (bool): start and stop count the player's matches instead of games
+
+            Returns:
+                stats -> PlayerStats
+                    summed stats of the range, all zero for an empty range
+        '''
+        series = self._players.get(jersey_num)
+        if series is None:
+            return PlayerStats(jersey_num)
+
+        first, last = _game_range(series, start, stop, matches)
+        return _difference(jersey_num, series.prefix, first, last)
+
+    def last(self, jersey_num : int, count : int, matches : bool = False) -> PlayerStats:
+        '''Returns the player's stats over their last count games (or matches).'''
+        if count <= 0:
+            return PlayerStats(jersey_num)
+        return self.window(jersey_num, -count, None, matches)
+
+    def rolling(self, jersey_num : int, size : int, key : Optional[Callable[[PlayerStats], Any]]
+                = None, matches : bool = False) -> List[Any]:
+        '''Returns the player's stats over every window of size consecutive games (or matches).
+
+            Params:
+                jersey_num  (int): player
+
+                size        (int): games (or matches) per window
+
+                key    (function): optional, applied to every window's stats, e.g.
+                    lambda stats: stats.points_per_serve
+
+                matches    (bool): windows of matches instead of games
+
+            Returns:
+                series -> list()
+                    one entry per full window, oldest first
+        '''
+        if size <= 0:
+            raise ValueError(f'window size has to be positive: {size}')
+
+        series = self._players.get(jersey_num)
+        if series is None:
+            return []
+
+        if matches:
+            bounds = series.match_starts + [len(series.games)]
+        else:
+            bounds = list(range(len(series.games) + 1))
+
+        ret = []
+        for idx in range(size, len(bounds)):
+            stats = _difference(jersey_num, series.prefix, bounds[idx - size], bounds[idx])
+            ret.append(stats if key is None else key(stats))
+        return ret
+
+def _game_range(series : _PlayerSeries, start : Optional[int], stop : Optional[int],
+                matches : bool) -> Tuple[int, int]:
+    count = len(series.match_starts) if matches else len(series.games)
+    first, last, _ = slice(start, stop).indices(count)
+    last = max(first, last)
+
+    if matches:
+        bounds = series.match_starts
+        first  = bounds[first] if first < count else len(series.games)
+        last   = bounds[last] if last < count else len(series.games)
+    return first, last
+
+def _difference(jersey_num : int, prefix : array, first : int, last : int) -> PlayerStats:
+    vec = array('d', map(sub, prefix[last * VECTOR_LEN:(last + 1) * VECTOR_LEN],
+                         prefix[first * VECTOR_LEN:(first + 1) * VECTOR_LEN]))
+    return PlayerStats._from_vector(jersey_num, vec)
@@ -0,0 +1,150 @@
+'''Volleyball Game Index module
+
+Inverted indexes over the games of a season or archive, so per player and matchup questions
+("games 38 played against X", "games where 29 and 93 were both on court") only touch the games
+that match instead of walking every match and lineup.
+
+Three indexes are kept, each mapping a key to the games holding it, in the order the games were
+added:
+
+    jersey      every jersey of the game's lineup
+    opponent    name of the match's opponent
+    pair        every pair of lineup jerseys, as a sorted tuple
+
+Seasons and archives keep their index up to date as games are added or changed (a changed
+lineup moves the game to its new keys). Queries intersect the smallest matching index entry
+with the others, and stats() sums the game stats of the result.
+'''
+from itertools import combinations
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple, TYPE_CHECKING
+
+from .volley_stats import VolleyStats
+
+if TYPE_CHECKING:
+    from .volley_match import VolleyGame
+
+# (jerseys, opponent, pairs) a game is indexed under
+GameKeys = Tuple[Tuple[int, ...], Optional[str], Tuple[Tuple[int, int], ...]]
+
+class GameIndex():
+    '''Jersey, opponent and jersey pair indexes of a set of games.'''
+
+    def __init__(self, games : Iterable["VolleyGame"] = ()) -> None:
+        # key -> games, dicts used as insertion ordered sets
+        self.by_jersey   : Dict[int, Dict["VolleyGame", None]]             = {}
+        self.by_opponent : Dict[str, Dict["VolleyGame", None]]             = {}
+        self.by_pair     : Dict[Tuple[int, int], Dict["VolleyGame", None]] = {}
+        # game -> keys it is indexed under, games in the order they were first added
+        self._keys : Dict["VolleyGame", GameKeys] = {}
+        # game -> position in that order, a game moved to new keys is appended to their entries
+        # but keeps its place in query results
+        self._rank : Dict["VolleyGame", int] = {}
+        self._added = 0
+
+        for game in games:
+            self.add(game)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, game : "VolleyGame") -> bool:
+        return game in self._keys
+
+    def add(self, game : "VolleyGame") -> None:
+        '''Indexes a game, or moves it to its current keys if it is already indexed.'''
+        keys = _game_keys(game)
+        old  = self._keys.get(game)
+        if old == keys:
+            return
+        if old is not None:
+            self._unlink(game, old)
+        else:
+            self._rank[game] = self._added
+            self._added += 1
+
+        self._keys[game] = keys
+        jerseys, opponent, pairs = keys
+        for jersey in jerseys:
+            self.by_jersey.setdefault(jersey, {})[game] = None
+        if opponent is not None:
+            self.by_opponent.setdefault(opponent, {})[game] = None
+        for pair in pairs:
+            self.by_pair.setdefault(pair, {})[game] = None
+
+    def remove(self, game : "VolleyGame") -> None:
+        '''Drops a game from the indexes.'''
+        keys = self._keys.pop(game, None)
+        if keys is not None:
+            self._unlink(game, keys)
+            del self._rank[game]
+
+    def games(self, players : Iterable[int] = (), opponent : Optional[str] = None
+              ) -> List["VolleyGame"]:
+        '''Returns the games matching every given key.
+
+            Params:
+                players     (list): jerseys that were all in the lineup
+
+                opponent     (str): optional, name of the match's opponent
+
+            Returns:
+                games -> list()
+                    matching games, in the order they were added, every game if no key is given
+        '''
+        players = sorted(set(players))
+        entries : List[Dict["VolleyGame", None]] = []
+
+        if len(players) == 1:
+            entries.append(self.by_jersey.get(players[0], {}))
+        else:
+            # pairs of consecutive jerseys chain every player of the query together, and a pair
+            # entry is at most as large as either jersey's
+            entries += [self.by_pair.get(pair, {}) for pair in zip(players, players[1:])]
+        if opponent is not None:
+            entries.append(self.by_opponent.get(opponent, {}))
+
+        if not entries:
+            return list(self._keys)
+
+        entries.sort(key=len)
+        first, rest = entries[0], entries[1:]
+        return sorted((game for game in first if all(game in entry for entry in rest)),
+                      key=self._rank.__getitem__)
+
+    def stats(self, players : Iterable[int] = (), opponent : Optional[str] = None
+              ) -> VolleyStats:
+        '''Returns the summed stats of the games matching every given key, see games().'''
+        return VolleyStats.sum(game.game_stats for game in self.games(players, opponent))
+
+    def jerseys(self) -> List[int]:
+        '''Jerseys seen in any indexed lineup'''
+        return sorted(self.by_jersey)
+
+    def opponents(self) -> List[str]:
+        '''Opponents of the indexed games, in the order they were first seen'''
+        return list(self.by_opponent)
+
+    def _unlink(self, game : "VolleyGame", keys : GameKeys) -> None:
+        jerseys, opponent, pairs = keys
+        for jersey in jerseys:
+            _discard(self.by_jersey, jersey, game)
+        if opponent is not None:
+            _discard(self.by_opponent, opponent, game)
+        for pair in pairs:
+            _discard(self.by_pair, pair, game)
+
+def _game_keys(game : "VolleyGame") -> GameKeys:
+    lineup  = game.lineup if isinstance(game.lineup, list) else []
+    jerseys = tuple(sorted(set(lineup)))
+    match   = game.match
+    return (jerseys, match.opponent_name if match is not None else None,
+            tuple(combinations(jerseys, 2)))
+
+def _discard(index : Dict[Any, Dict["VolleyGame", None]], key : Hashable,
+             game : "VolleyGame") -> None:
+    games = index.get(key)
+    if games is None:
+        return
+    games.pop(game, None)
+    if not games:
+        del index[key]
@@ -0,0 +1,274 @@
+'''Volleyball Lineup Optimizer module
+
+Picks the six players and their serving order that maximize the expected +/- of a game, from the
+players' historical +/- at every court position (PlayerStats rb_pm ... cb_pm).
+
+A player's rating at a position is their net +/- per rally played there, shrunk towards 0 by
+PRIOR_RALLIES so that a handful of rallies does not outweigh a season. A lineup starts with
+lineup[k] serving k-th; during rotation offset o the player of slot k plays position (k - o) % 6
+(see RallyTimeline). With weights[o] the expected number of rallies a game spends in rotation
+offset o (rotation_weights()), the expected +/- of a lineup is the sum over its slots of
+
+    value[player][k] = sum(weights[o] * rating[player][(k - o) % 6] for o in range(6))
+
+The early rotations of a game see more rallies than the late ones, which is what makes the
+serving order matter. With uniform weights every order of the same six players ties and only
+the choice of players counts.
+
+The search fills the slots in serving order (branch and bound). At every node the best unused
+value of each open slot bounds what the rest of the lineup can add, and branches whose bound
+cannot beat the best lineups found so far are pruned. In coed leagues genders have to alternate
+around the rotation (the lineup check of volley_validate), so once slot 0 is filled each open
+slot only takes players of one gender. Branches are split by the player of slot 0 and searched
+on a process pool. Ties keep the lineup found first, results do not depend on the number of
+workers.
+'''
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .volley_match import VolleyGame
+from .volley_player import VolleyRoster
+from .volley_stats import PlayerStats, VolleyStats, PLUS, MINUS
+from .volley_validate import _is_coed
+
+COURT_POS = len(PlayerStats.ROTATION)
+
+# rallies of evidence needed for a rating to count half its observed +/- per rally
+PRIOR_RALLIES = 20
+
+_EPS = 1e-9
+
+class LineupResult():
+    '''One optimized lineup.
+
+        Attributes:
+            lineup      (list): jerseys in serving order, slot 0 serves first from RB
+
+            expected   (float): expected +/- of a game played with this lineup
+
+            values      (list): expected +/- contributed by every slot
+    '''
+    __slots__ = ('lineup', 'expected', 'values')
+
+    def __init__(self, lineup : List[int], expected : float, values : List[float]) -> None:
+        self.lineup   = lineup
+        self.expected = expected
+        self.values   = values
+
+    def __repr__(self) -> str:
+        return f'LineupResult({self.lineup}, {self.expected:+.2f})'
+
+def position_ratings(stats : VolleyStats, prior : float = PRIOR_RALLIES
+                     ) -> Dict[int, List[float]]:
+    '''Returns every player's net +/- per rally at each position, indexed like
+    PlayerStats.ROTATION and shrunk towards 0 by prior rallies.'''
+    ratings = {}
+    for num, player in stats.player_stats.items():
+        row = []
+        for pair in player._rotation_pm:
+            plus  = pair[PLUS]
+            minus = -pair[MINUS]
+            row.append((plus - minus) / (plus + minus + prior) if plus + minus + prior else 0.0)
+        ratings[num] = row
+    return ratings
+
+def rotation_weights(games : Iterable[VolleyGame]) -> List[float]:
+    '''Returns the average number of rallies per game played in every rotation offset, from the
+    timelines of the included games. Uniform when no game is given.'''
+    counts = [0] * COURT_POS
+    total  = 0
+    for game in games:
+        if not game.include:
+            continue
+        total += 1
+        for offset in game.timeline.offset:
+            counts[offset] += 1
+
+    if not total:
+        return [1.0] * COURT_POS
+    return [count / total for count in counts]
+
+def slot_values(ratings : Sequence[float], weights : Sequence[float]) -> List[float]:
+    '''Expected +/- of a player in each serving slot, see module documentation.'''
+    return [sum(weights[off] * ratings[(slot - off) % COURT_POS] for off in range(COURT_POS))
+            for slot in range(COURT_POS)]
+
+def optimize_lineup(roster : VolleyRoster, stats : VolleyStats,
+                    available : Optional[Iterable[int]] = None,
+                    weights : Optional[Sequence[float]] = None, coed : Optional[bool] = None,
+                    top : int = 1, prior : float = PRIOR_RALLIES,
+                    processes : Optional[int] = None) -> List[LineupResult]:
+    '''Searches the best lineups of the available players.
+
+        Params:
+            roster      (VolleyRoster): players and their genders
+
+            stats       (VolleyStats): historical stats the ratings come from, e.g. a season's or
+                the archive's stats
+
+            available   (list): optional, jerseys that can play, defaults to the whole roster
+
+            weights     (list): optional, rallies per rotation offset, see rotation_weights()
+
+            coed        (bool): optional, genders have to alternate, defaults to whether the
+                roster has both genders
+
+            top          (int): number of lineups to return
+
+            prior      (float): see position_ratings()
+
+            processes    (int): max number of workers, defaults to the number of CPUs
+
+        Returns:
+            lineups -> list(LineupResult)
+                best first, empty if no lineup can be formed
+    '''
+    if top <= 0:
+        raise ValueError(f'top has to be positive: {top}')
+    if weights is None:
+        weights = [1.0] * COURT_POS
+    if len(weights) != COURT_POS:
+        raise ValueError(f'weights need {COURT_POS} entries: {weights}')
+    if coed is None:
+        coed = _is_coed(roster)
+
+    if available is None:
+        available = [player.number for player in roster.players]
+    # a jersey listed twice is one player
+    jerseys = list(dict.fromkeys(available))
+    missing = [num for num in jerseys if roster.get_player(num) is None]
+    if missing:
+        raise ValueError(f'jerseys not on the roster: {missing}')
+
+    ratings = position_ratings(stats, prior)
+    neutral = [0.0] * COURT_POS
+    values  = [slot_values(ratings.get(num, neutral), weights) for num in jerseys]
+    genders = [roster.get_player(num).gender if coed else '' for num in jerseys]  # type: ignore[union-attr]
+
+    search = _Search(values, genders, top, _greedy_floor(values, genders) if top == 1 else None)
+    roots  = [idx for idx in range(len(jerseys)) if search.can_lead(idx)]
+
+    workers = min(len(roots), processes or os.cpu_count() or 1)
+    if workers <= 1:
+        found = [search.run(root) for root in roots]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            found = list(pool.map(search.run, roots))
+
+    best = heapq.nlargest(top, (item for items in found for item in items))
+    return [LineupResult([jerseys[idx] for idx in order], total,
+                         [values[idx][slot] for slot, idx in enumerate(order)])
+            for total, _, _, order in best]
+
+# (expected, -root, -leaf, player indexes in serving order), the best lineup compares largest and
+# ties keep the one found first
+_Found = Tuple[float, int, int, List[int]]
+
+class _Search():
+    '''Branch and bound over the slots of one optimize_lineup() call, sent to the workers'''
+
+    def __init__(self, values : List[List[float]], genders : List[str], top : int,
+                 floor : Optional[float]) -> None:
+        self.values  = values
+        self.genders = genders
+        self.top     = top
+        self.floor   = floor
+        # root of the running search and full lineups seen so far, the tie breakers of _Found
+        self._root   = -1
+        self._leaf   = 0
+
+        # players of every slot from best to worst value
+        self.order = [sorted(range(len(values)), key=lambda idx: -values[idx][slot])
+                      for slot in range(COURT_POS)]
+
+    def can_lead(self, idx : int) -> bool:
+        '''Whether a lineup with idx in slot 0 can be filled at all'''
+        if len(self.values) < COURT_POS:
+            return False
+        if not self.genders[idx]:
+            return True
+        same  = sum(1 for gender in self.genders if gender == self.genders[idx])
+        other = sum(1 for gender in self.genders if gender and gender != self.genders[idx])
+        return same >= COURT_POS // 2 and other >= COURT_POS // 2
+
+    def run(self, root : int) -> List[_Found]:
+        '''Best lineups with root serving first, at most top of them.'''
+        found : List[_Found] = []
+        self._root = root
+        self._leaf = 0
+        used  = [False] * len(self.values)
+        used[root] = True
+
+        # gender every slot needs, '' for any
+        lead = self.genders[root]
+        need = [''] * COURT_POS
+        if lead:
+            other = next(gender for gender in self.genders if gender and gender != lead)
+            need  = [lead if slot % 2 == 0 else other for slot in range(COURT_POS)]
+
+        self._branch([root], self.values[root][0], used, need, found)
+        return found
+
+    def _branch(self, order : List[int], total : float, used : List[bool], need : List[str],
+                found : List[_Found]) -> None:
+        slot = len(order)
+        if slot == COURT_POS:
+            self._leaf += 1
+            item = (total, -self._root, -self._leaf, list(order))
+            if len(found) < self.top:
+                heapq.heappush(found, item)
+            else:
+                heapq.heappushpop(found, item)
+            return
+
+        bound = total + self._bound(slot, used, need)
+        if len(found) == self.top:
+            if bound <= found[0][0] + _EPS:
+                return
+        elif self.floor is not None and bound < self.floor - _EPS:
+            return
+
+        values = self.values
+        for idx in self.order[slot]:
+            if used[idx] or (need[slot] and self.genders[idx] != need[slot]):
+                continue
+            used[idx] = True
+            order.append(idx)
+            self._branch(order, total + values[idx][slot], used, need, found)
+            order.pop()
+            used[idx] = False
+
+    def _bound(self, slot : int, used : List[bool], need : List[str]) -> float:
+        # best unused value of every open slot, players may be counted for several slots
+        bound = 0.0
+        for open_slot in range(slot, COURT_POS):
+            for idx in self.order[open_slot]:
+                if not used[idx] and (not need[open_slot] or self.genders[idx] == need[open_slot]):
+                    bound += self.values[idx][open_slot]
+                    break
+            else:
+                return float('-inf')
+        return bound
+
+def _greedy_floor(values : List[List[float]], genders : List[str]) -> Optional[float]:
+    # value of a lineup filled slot by slot with the best fitting player, a lower bound of the
+    # best lineup that prunes branches before the first full lineup is found
+    best : Optional[float] = None
+    for lead in sorted({gender for gender in genders}):
+        other = sorted({gender for gender in genders if gender and gender != lead})
+        used  = [False] * len(values)
+        total = 0.0
+        for slot in range(COURT_POS):
+            need = lead if slot % 2 == 0 or not lead else (other[0] if other else None)
+            picks = [idx for idx in range(len(values))
+                     if not used[idx] and (not lead or genders[idx] == need)]
+            if not picks:
+                break
+            idx = max(picks, key=lambda idx: values[idx][slot])
+            used[idx] = True
+            total += values[idx][slot]
+        else:
+            best = total if best is None else max(best, total)
+    return best
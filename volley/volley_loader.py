@@ -0,0 +1,230 @@
+'''Volleyball Season Loader module
+
+Builds a VolleySeason from a YAML score sheet. Each loaded sheet is also compiled into a binary
+snapshot (pickled season with all games and stats already computed) stored in a cache directory
+next to the sheet, so later runs can skip the YAML parse and the stat computation entirely.
+
+Sheets are validated (see volley_validate.py) before any stats are computed, games with errors
+are left out of the stats and the season keeps the ValidationReport as `validation`.
+
+Binary sheets (see volley_binary.py, BINARY_EXT files) are read directly, without snapshots.
+load_season() builds every game of a binary sheet like it does for YAML. To read a few matches
+of a large archive without building the others, open the sheet as a volley_binary.BinarySeason.
+
+A snapshot is used only if its header matches the sheet: same mtime and size, or failing that the
+same content hash. Snapshots written by other code (the header holds a hash of the volley
+package's sources, so any change to the classes or the stats they pickle counts), with an older
+CACHE_VERSION of the snapshot file itself or a different PlayerStats vector layout are ignored
+and rebuilt.
+'''
+import hashlib
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import yaml
+
+from .volley_binary import BINARY_EXT, load_binary
+from .volley_match import VolleyMatch, VolleySeason
+from .volley_metrics import METRICS
+from .volley_validate import validate_season
+from .volley_player import VolleyRoster
+from .volley_stats import PlayerStats
+
+# layout of the snapshot file (header, then season), code changes are caught by _code_version()
+CACHE_VERSION = 1
+CACHE_DIR     = '.volley-cache'
+CACHE_EXT     = '.snap'
+
+def load_season(path : str, use_cache : bool = True, cache_dir : Optional[str] = None,
+                validate : bool = True) -> VolleySeason:
+    '''Loads a season score sheet, going through the snapshot cache when enabled.
+
+        Params:
+            path        (str): path to the season's YAML score sheet, or to a binary sheet
+
+            use_cache  (bool): read/write the compiled snapshot of the sheet
+
+            cache_dir   (str): directory holding snapshots, defaults to CACHE_DIR next to the sheet
+
+            validate   (bool): validate the sheet and leave games with errors out of the stats
+    '''
+    scope = os.path.basename(path)
+    with METRICS.stage('load', scope):
+        return _load_season(path, use_cache, cache_dir, validate, scope)
+
+def _load_season(path : str, use_cache : bool, cache_dir : Optional[str], validate : bool,
+                 scope : str) -> VolleySeason:
+    if path.endswith(BINARY_EXT):
+        return load_binary(path, validate)
+
+    if not use_cache:
+        with open(path, 'rb') as file:
+            return _build(file, validate, scope)
+
+    snap_path = _snapshot_path(path, cache_dir)
+    stat      = os.stat(path)
+
+    header = _read_header(snap_path)
+    if header and header.get('validate') != validate:
+        header = None
+    if header and header['mtime'] == stat.st_mtime_ns and header['size'] == stat.st_size:
+        with METRICS.stage('snapshot_read', scope):
+            season = _read_snapshot(snap_path)
+        if season is not None:
+            return season
+
+    with open(path, 'rb') as file:
+        source = file.read()
+    digest = hashlib.sha256(source).hexdigest()
+
+    # file was touched but not changed
+    if header and header['digest'] == digest:
+        with METRICS.stage('snapshot_read', scope):
+            season = _read_snapshot(snap_path)
+        if season is not None:
+            _write_snapshot(snap_path, _make_header(stat, digest, validate), season)
+            return season
+
+    season = _build(source, validate, scope)
+    # stats are lazy, compute them so the snapshot holds them
+    _ = season.season_stats
+    with METRICS.stage('snapshot_write', scope):
+        _write_snapshot(snap_path, _make_header(stat, digest, validate), season)
+
+    return season
+
+def load_seasons(paths : Iterable[str], use_cache : bool = True, cache_dir : Optional[str] = None,
+                 processes : Optional[int] = None, validate : bool = True) -> List[VolleySeason]:
+    '''Loads several season score sheets, each one in its own worker process.
+
+    Seasons are returned in the same order as `paths` no matter which worker finishes first, so
+    results are the same as loading the sheets one after the other.
+
+        Params:
+            paths      (list): paths to the seasons' YAML score sheets
+
+            use_cache  (bool): read/write the compiled snapshot of each sheet
+
+            cache_dir   (str): directory holding snapshots, defaults to CACHE_DIR next to each sheet
+
+            processes   (int): max number of workers, defaults to the number of CPUs
+
+            validate   (bool): validate the sheets, see load_season()
+    '''
+    paths = list(paths)
+    load = partial(load_season, use_cache=use_cache, cache_dir=cache_dir, validate=validate)
+
+    workers = min(len(paths), processes or os.cpu_count() or 1)
+    if workers <= 1:
+        return [load(path) for path in paths]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(load, paths))
+
+def build_season(season : Dict[str, Any]) -> VolleySeason:
+    '''Builds a VolleySeason (roster, matches and games) from a parsed score sheet.'''
+    roster = VolleyRoster()
+
+    ## add players to roster, coed sheets split players by gender
+    for player in season['roster'].get('females', []):
+        roster.add_player(player['name'], 'f', player['status'], player['jersey'])
+    for player in season['roster'].get('males', []):
+        roster.add_player(player['name'], 'm', player['status'], player['jersey'])
+    for player in season['roster'].get('players', []):
+        roster.add_player(player['name'], 'x', player['status'], player['jersey'])
+
+    volley_season = VolleySeason(season['league'], season['season'], season['year'], roster)
+
+    ## add season matches/games
+    for match in season['matches']:
+        if match:
+            # create Volleyball Match and add game info
+            volley_match = VolleyMatch(match[0]['opponent'], roster)
+            for i in range(1, len(match)):
+                volley_match.add_game(match[i])
+            # add match to the volley season
+            volley_season.add_match(volley_match)
+
+    return volley_season
+
+def _build(source : Any, validate : bool, scope : str) -> VolleySeason:
+    with METRICS.stage('parse', scope):
+        sheet = yaml.safe_load(source)
+    with METRICS.stage('build', scope):
+        season = build_season(sheet)
+    if validate:
+        with METRICS.stage('validate', scope):
+            season.validation = validate_season(season, scope)
+    return season
+
+def _snapshot_path(path : str, cache_dir : Optional[str]) -> str:
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR)
+    return os.path.join(cache_dir, os.path.basename(path) + CACHE_EXT)
+
+def _make_header(stat : os.stat_result, digest : str, validate : bool) -> Dict[str, Any]:
+    return {'version'  : CACHE_VERSION,
+            'code'     : _code_version(),
+            'layout'   : _layout(),
+            'mtime'    : stat.st_mtime_ns,
+            'size'     : stat.st_size,
+            'digest'   : digest,
+            'validate' : validate}
+
+@lru_cache(maxsize=None)
+def _code_version() -> str:
+    # hash of every module of the package, computed once per process
+    package = os.path.dirname(os.path.abspath(__file__))
+    digest  = hashlib.sha256()
+    for name in sorted(os.listdir(package)):
+        if name.endswith('.py'):
+            with open(os.path.join(package, name), 'rb') as file:
+                digest.update(name.encode('utf-8') + b'\0' + file.read() + b'\0')
+    return digest.hexdigest()
+
+def _layout() -> Tuple[Any, ...]:
+    return PlayerStats.PAIR_FIELDS + PlayerStats.COUNT_FIELDS \
+         + tuple(sorted(PlayerStats.SCALED_FIELDS.items()))
+
+def _read_header(snap_path : str) -> Optional[Dict[str, Any]]:
+    '''Reads only the snapshot header, the season body follows it in the same file.'''
+    try:
+        with open(snap_path, 'rb') as file:
+            header = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+    if not isinstance(header, dict) or header.get('version') != CACHE_VERSION \
+       or header.get('code') != _code_version() or header.get('layout') != _layout():
+        return None
+
+    return header
+
+def _read_snapshot(snap_path : str) -> Optional[VolleySeason]:
+    try:
+        with open(snap_path, 'rb') as file:
+            pickle.load(file)
+            season = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+    if not isinstance(season, VolleySeason):
+        return None
+
+    return season
+
+def _write_snapshot(snap_path : str, header : Dict[str, Any], season : VolleySeason) -> None:
+    '''Writes the snapshot atomically, a failure to write only costs the next run a rebuild.'''
+    tmp_path = f'{snap_path}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(os.path.dirname(snap_path), exist_ok=True)
+        with open(tmp_path, 'wb') as file:
+            pickle.dump(header, file, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(season, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, snap_path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
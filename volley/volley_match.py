@@ -1,17 +1,15 @@
 '''Volleyball Match module'''
-# TODO: add game validation logic
-## validate score swip-swap, score order, win by 2,
-## check if half or full game from scores reported
-## determine include based on validation
-## no need to require 'X' at end of scores
-## record final scored recorded and detect discrepancies
-## check serve alternates between games -- warn if otherwise
-## coed games, check lineup alternates between girl/boy
+# score sheet validation lives in volley_validate.py
 
-from typing import List, Dict, TypedDict, Union, Optional
+from typing import Any, Callable, Iterable, List, Dict, TypedDict, Union, Optional
 
 from .volley_player import VolleyRoster
-from .volley_stats import VolleyStats, DetailStatsType, PLUS, MINUS
+from .volley_stats import VolleyStats, PlayerStats, DetailStatsType, PLUS, MINUS
+from .volley_engine import ENGINES, ENGINE_LOOP, ENGINE_RUNS, ENGINE_TIMELINE, \
+                           calc_game_stats_runs, calc_game_stats_timeline
+from .volley_timeline import RallyTimeline
+from .volley_metrics import METRICS
+from .volley_index import GameIndex
 
 class VolleyGameType(TypedDict):
     """
@@ -33,7 +31,20 @@ class VolleyGame():
     '''
     total_court_pos = 6
 
-    def __init__(self, game : VolleyGameType, roster : VolleyRoster) -> None:
+    # rotation accounting engine used by default, see volley_engine
+    ENGINE = ENGINE_LOOP
+
+    # attributes the game stats are computed from, assigning any of them drops the cached stats
+    _STATS_INPUTS = frozenset(('lineup', 'team_scores', 'oppo_scores', 'serve_start', 'include',
+                               'full', 'detailed', 'roster', 'engine'))
+
+    def __init__(self, game : VolleyGameType, roster : VolleyRoster,
+                 engine : Optional[str] = None) -> None:
+        self._game_stats : Optional[VolleyStats]   = None
+        self._timeline   : Optional[RallyTimeline] = None
+        self._live       : Optional[_LiveState]    = None
+        self.match       : Optional[VolleyMatch]   = None
+
         self.lineup      = game['lineup']
         self.team_scores = game['team_scores']
         self.oppo_scores = game['opponent_scores']
@@ -41,25 +52,98 @@ class VolleyGame():
         self.include     = game['include']
         self.full        = game['full']
         self.game        = game['game']
-
-        self.game_stats  = VolleyStats(self.lineup)
-
-        # calculate stats if games is to be included in stats
-        if self.include:
-            self._calc_game_stats()
-
-        # add details to stats
-        detailed_stats = game.get('detailed')
-        if detailed_stats:
-            detailed_stats['roster'] = roster
-            self.game_stats.add_details(detailed_stats)
-
-    def _calc_game_stats(self) -> None:
-        '''Calculates game stats for this game.
+        self.detailed    = game.get('detailed')
+        self.final_score = game.get('final_score')
+        self.roster      = roster
+
+        if engine is not None and engine not in ENGINES:
+            raise ValueError(f'Unknown rotation engine {engine}, expected one of {ENGINES}')
+        self.engine      = engine
+
+    def __setattr__(self, name : str, value : Any) -> None:
+        super().__setattr__(name, value)
+        if name in self._STATS_INPUTS:
+            self.invalidate()
+
+    @property
+    def game_stats(self) -> VolleyStats:
+        '''Stats of this game, computed on first access and cached until the game data changes.'''
+        if self._game_stats is None:
+            stats = VolleyStats(self.lineup)
+
+            # calculate stats if games is to be included in stats
+            if self.include:
+                with METRICS.stage('game_stats', self._metrics_scope):
+                    self._calc_game_stats(stats)
+
+            # add details to stats, games left out of the stats are not checked against them
+            if self.include and self.detailed:
+                with METRICS.stage('details', self._metrics_scope):
+                    stats.add_details(self.detailed, self.roster)
+
+            self._game_stats = stats
+
+        return self._game_stats
+
+    @property
+    def timeline(self) -> RallyTimeline:
+        '''Rallies of this game in play order, decoded on first access and cached until the game
+        data changes.'''
+        if self._timeline is None:
+            self._timeline = RallyTimeline.decode(self.lineup, self.serve_start,
+                                                  self.team_scores, self.oppo_scores)
+        return self._timeline
+
+    def _metrics_scope(self) -> str:
+        if self.match is None:
+            return f'game {self.game}'
+        return self.match._metrics_scope()
+
+    def invalidate(self) -> None:
+        '''Drops the cached game stats. The match, season and archive stats holding the game are
+        corrected with the game's new stats on their next access.
+
+        Assigning one of the game's attributes does this already, call it after changing the
+        score lists or lineup in place.
+        '''
+        old = self._game_stats
+        self._game_stats = None
+        self._timeline   = None
+        self._live       = None
+        if self.match is not None:
+            self.match._game_changed(self, old)
+
+    def _calc_game_stats(self, stats : VolleyStats,
+                         team_scores : Optional[List[Union[str, int]]] = None,
+                         oppo_scores : Optional[List[Union[str, int]]] = None) -> None:
+        '''Calculates game stats for this game, from the game's score lists unless others are given.
+        '''
+        if team_scores is None:
+            team_scores = self.team_scores
+        if oppo_scores is None:
+            oppo_scores = self.oppo_scores
+
+        engine = self.engine or self.ENGINE
+        if engine == ENGINE_RUNS:
+            calc_game_stats_runs(stats, self.lineup, self.serve_start, self.full,
+                                 team_scores, oppo_scores)
+        elif engine == ENGINE_TIMELINE:
+            if team_scores is self.team_scores and oppo_scores is self.oppo_scores:
+                timeline = self.timeline
+            else:
+                timeline = RallyTimeline.decode(self.lineup, self.serve_start,
+                                                team_scores, oppo_scores)
+            calc_game_stats_timeline(stats, timeline, self.full)
+        else:
+            self._calc_game_stats_loop(stats, team_scores, oppo_scores)
+
+    def _calc_game_stats_loop(self, stats : VolleyStats, team_scores : List[Union[str, int]],
+                              oppo_scores : List[Union[str, int]]) -> None:
+        '''Token by token rotation accounting (the ENGINE_LOOP engine).
         '''
         # calculate game final scores
-        self.game_stats.add_final_score(max([int(x) for x in self.team_scores if str(x).isdigit()]),
-                                        max([int(x) for x in self.oppo_scores if str(x).isdigit()]))
+        stats.add_final_score(max([int(x) for x in team_scores if str(x).isdigit()], default=0),
+                              max([int(x) for x in oppo_scores if str(x).isdigit()], default=0))
 
         ### PROCESS Team Scored Points Against Opponent
         # initialize team rotation
@@ -67,13 +151,14 @@ class VolleyGame():
         if not self.serve_start:
             # rotate the rotation back 1 if we start receiving
             rotation = rotation[-1:] + rotation[:-1]
-            assert int(self.team_scores[0])
+            if team_scores:
+                assert int(team_scores[0])
 
         sco : List[int] = []
         start = self.serve_start
-        for score in self.team_scores:
+        for score in team_scores:
             if score in ('R', 'r', 'X', 'x'):
-                self.game_stats.add_score_run(rotation, sco, PLUS, beg=start)
+                stats.add_score_run(rotation, sco, PLUS, beg=start)
                 rotation = rotation[1:] + rotation[:1]
                 start = False
                 sco = []
@@ -88,16 +173,16 @@ class VolleyGame():
             rotation = rotation[-1:] + rotation[:-1]
 
         sco = []
-        for score in self.oppo_scores:
+        for score in oppo_scores:
             if score in ('R', 'r', 'X', 'x'):
-                self.game_stats.add_score_run(rotation, sco, MINUS)
+                stats.add_score_run(rotation, sco, MINUS)
                 rotation = rotation[1:] + rotation[:1]
                 sco = []
             else:
                 sco.append(int(score))
 
         ### FINALIZE Game Stats
-        self.game_stats.finish_game(self.full)
+        stats.finish_game(self.full)
 
 
         # for item in self.player_stats.items():
@@ -119,6 +204,153 @@ class VolleyGame():
 
         #     player['points'] = len(player['scores'])
 
+    def point(self, team : bool = True) -> None:
+        '''Records one rally won by the team (team=True) or by the opponent while the game is played.
+
+        The score lists get the point (and any side-out token), and the game stats plus any
+        already computed match/season stats are updated in place: rotation +/-, serve runs and
+        final scores. Each call costs O(1) no matter how long the game or season is.
+
+        Live stats are always the same as the stats computed from the score lists once the
+        game is closed with end().
+        '''
+        live = self._live
+        if live is None:
+            live = self._start_live()
+        # the score lists grow in place
+        self._timeline = None
+
+        targets = self._live_targets()
+
+        if team:
+            live.team_score += 1
+            if not live.serving:
+                # side-out: opponent run ends, the point goes to the team's previous rotation and
+                # the next server starts a new serve run
+                self.oppo_scores.append('R')
+                live.oppo_rot = live.oppo_rot[1:] + live.oppo_rot[:1]
+                self.team_scores.append(live.team_score)
+                _credit_rotation(targets, live.team_rot[-1:] + live.team_rot[:-1], 1)
+                for stats in targets:
+                    stats.player_stats[live.team_rot[0]].total_serves += 1
+                if targets:
+                    targets[0].player_stats[live.team_rot[0]].serve_runs.append(0)
+                live.serving = True
+            else:
+                self.team_scores.append(live.team_score)
+                _credit_rotation(targets, live.team_rot, 1)
+                for stats in targets:
+                    stats.player_stats[live.team_rot[0]].total_serve_points += 1
+                if targets:
+                    server = targets[0].player_stats[live.team_rot[0]]
+                    server.served_scores.append(live.team_score)
+                    server.serve_runs[-1] += 1
+        else:
+            live.oppo_score += 1
+            if live.serving:
+                # team loses the serve and rotates for its next serve run
+                self.team_scores.append('R')
+                live.team_rot = live.team_rot[1:] + live.team_rot[:1]
+                live.serving = False
+            self.oppo_scores.append(live.oppo_score)
+            _credit_rotation(targets, live.oppo_rot, -1)
+
+        if targets:
+            game_stats = targets[0]
+            won = live.team_score > live.oppo_score
+            game_stats.final_team_score = live.team_score
+            game_stats.final_oppo_score = live.oppo_score
+            if won != game_stats.won:
+                game_stats.won = won
+                # the game flipped between a win and a loss for every level above it
+                for stats in targets[1:]:
+                    stats.final_team_score += 1 if won else -1
+                    stats.final_oppo_score -= 1 if won else -1
+                    stats.won = stats.final_team_score > stats.final_oppo_score
+
+    def side_out(self) -> None:
+        '''Records a rally won by the receiving side, the serve changes hands.'''
+        live = self._live
+        if live is None:
+            live = self._start_live()
+        self.point(team=not live.serving)
+
+    def end(self) -> None:
+        '''Closes a live game by ending the serving side's run in the score lists.'''
+        live = self._live
+        if live is None:
+            live = self._start_live()
+
+        if live.serving:
+            self.team_scores.append('X')
+        else:
+            self.oppo_scores.append('X')
+        self._live     = None
+        self._timeline = None
+
+    def _start_live(self) -> "_LiveState":
+        '''Picks up live scoring from the game's current score lists.'''
+        if any(tok in ('X', 'x') for tok in list(self.team_scores) + list(self.oppo_scores)):
+            raise ValueError(f'Game {self.game} has already ended')
+
+        team_runs = sum(1 for tok in self.team_scores if tok in ('R', 'r'))
+        oppo_runs = sum(1 for tok in self.oppo_scores if tok in ('R', 'r'))
+        if self.serve_start:
+            serving = team_runs == oppo_runs
+        else:
+            serving = oppo_runs > team_runs
+
+        # stats so far are those of the score lists with the serving side's run closed
+        team_scores = list(self.team_scores)
+        oppo_scores = list(self.oppo_scores)
+        if serving:
+            team_scores.append('X')
+        else:
+            oppo_scores.append('X')
+
+        stats = VolleyStats(self.lineup)
+        if self.include:
+            self._calc_game_stats(stats, team_scores, oppo_scores)
+        # same as game_stats, an excluded game has no stats to add details to
+        if self.include and self.detailed:
+            stats.add_details(self.detailed, self.roster)
+
+        # aggregates above were summed from the stats being replaced
+        self.invalidate()
+        self._game_stats = stats
+
+        rotation = self.lineup.copy()
+        if not self.serve_start:
+            rotation = rotation[-1:] + rotation[:-1]
+
+        self._live = _LiveState(
+            serving    = serving,
+            team_rot   = rotation[team_runs % 6:] + rotation[:team_runs % 6],
+            oppo_rot   = rotation[oppo_runs % 6:] + rotation[:oppo_runs % 6],
+            team_score = max([int(x) for x in self.team_scores if str(x).isdigit()], default=0),
+            oppo_score = max([int(x) for x in self.oppo_scores if str(x).isdigit()], default=0))
+
+        return self._live
+
+    def _live_targets(self) -> List[VolleyStats]:
+        '''Game stats followed by every computed aggregate holding this game.'''
+        if not self.include or self._game_stats is None:
+            return []
+
+        # going through the properties applies pending corrections before the live update
+        targets = [self._game_stats]
+        match = self.match
+        if match is not None and match._cache.ready:
+            targets.append(match.match_stats)
+        season = match.season if match is not None else None
+        if season is not None and season._cache.ready:
+            targets.append(season.season_stats)
+        archive = season.archive if season is not None else None
+        if archive is not None and archive._cache.ready:
+            targets.append(archive.all_time_stats)
+
+        return targets
+
     def get_game_lineup(self) -> List[int]:
         '''Gets the game lineup.
 
@@ -128,6 +360,76 @@ class VolleyGame():
         '''
         return self.lineup
 
+class _LiveState():
+    '''Rotation and score state of a game being scored live, see VolleyGame.point()'''
+    __slots__ = ('serving', 'team_rot', 'oppo_rot', 'team_score', 'oppo_score')
+
+    def __init__(self, serving : bool, team_rot : List[int], oppo_rot : List[int],
+                 team_score : int, oppo_score : int) -> None:
+        self.serving    = serving
+        self.team_rot   = team_rot
+        self.oppo_rot   = oppo_rot
+        self.team_score = team_score
+        self.oppo_score = oppo_score
+
+class _StatsCache():
+    '''Cached sum of the stats of all games below a match, season or archive.
+
+    Games that change (or are added) after the sum was built are queued with the stats they had
+    when they were summed. On the next access the sum is corrected by taking the old stats out
+    and adding the new ones, instead of being summed again from scratch.
+    '''
+    __slots__ = ('level', 'stats', 'pending')
+
+    def __init__(self, level : int) -> None:
+        self.level = level
+        self.stats   : Optional[VolleyStats] = None
+        self.pending : Dict[VolleyGame, Optional[VolleyStats]] = {}
+
+    @property
+    def ready(self) -> bool:
+        '''Whether the sum has been built'''
+        return self.stats is not None
+
+    def get(self, build : Callable[[], VolleyStats], scope : Callable[[], str]) -> VolleyStats:
+        '''Returns the sum, building it or applying the pending corrections first.'''
+        if self.stats is None:
+            with METRICS.stage('aggregate', scope):
+                self.pending.clear()
+                self.stats = build()
+        elif self.pending:
+            with METRICS.stage('aggregate', scope):
+                # players are only dropped once every game is back in, so a player of a changed
+                # game keeps its place in the sum
+                for game, old in self.pending.items():
+                    if old is not None:
+                        self.stats._take_out(old)
+                for game in self.pending:
+                    self.stats += game.game_stats
+                self.stats._drop_empty()
+                self.pending.clear()
+        else:
+            return self.stats
+
+        if self.stats.valid:
+            self.stats.stats_type = self.level
+        return self.stats
+
+    def game_changed(self, game : VolleyGame, old : Optional[VolleyStats]) -> None:
+        '''Queues a correction for a game, old being the stats the sum holds for it (None when the
+        game is new to the sum).'''
+        if self.stats is not None and game not in self.pending:
+            self.pending[game] = old
+
+    def clear(self) -> None:
+        '''Drops the sum, it will be built from scratch on next access.'''
+        self.stats = None
+        self.pending.clear()
+
+def _credit_rotation(targets : List[VolleyStats], rotation : List[int], points : int) -> None:
+    for stats in targets:
+        stats.add_rotation_points(rotation, points)
+
 class VolleyMatch(object):
     '''Class representing a volleyball match composed of multiple games.
 
@@ -142,7 +444,9 @@ class VolleyMatch(object):
         self.opponent                = oppo
         self.roster                  = roster
         self.games: List[VolleyGame] = []
-        self.match_stats             = VolleyStats()
+        self.season : Optional[VolleySeason] = None
+
+        self._cache = _StatsCache(VolleyStats.MATCH)
 
         self.match_num = self._counter + 1
         VolleyMatch._counter += 1
@@ -164,8 +468,44 @@ class VolleyMatch(object):
                 full        (bool): indicates whether this game was played to the end of a reg set
         '''
         self.games.append(VolleyGame(game, self.roster))
-        # add last added game's stats to match stats
-        self.match_stats += self.games[-1].game_stats
+        self.games[-1].match = self
+        # the game is added to the match stats (and above) on next access
+        self._game_changed(self.games[-1], None)
+
+    @property
+    def opponent_name(self) -> str:
+        '''Name of the opponent'''
+        # coed sheets give the opponent's name, mens sheets a dict of opponent info
+        if isinstance(self.opponent, dict):
+            return str(self.opponent['name'])
+        return str(self.opponent)
+
+    @property
+    def match_stats(self) -> VolleyStats:
+        '''Stats of all games of the match, computed on first access and kept up to date.'''
+        return self._cache.get(lambda: VolleyStats.sum(game.game_stats for game in self.games),
+                               self._metrics_scope)
+
+    def _metrics_scope(self) -> str:
+        if self.season is None:
+            return f'match {self.match_num}'
+        return f'{self.season.league} match {self.match_num}'
+
+    def invalidate(self) -> None:
+        '''Drops the cached match stats, they are summed again from the games on next access.'''
+        self._cache.clear()
+
+    def _game_changed(self, game : VolleyGame, old : Optional[VolleyStats]) -> None:
+        self._cache.game_changed(game, old)
+        if self.season is not None:
+            self.season._game_changed(game, old)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # pickled without its season, which would bring the whole season (and its archive) along
+        # when the match is sent to a worker process, VolleySeason.__setstate__ links it again
+        state = self.__dict__.copy()
+        state['season'] = None
+        return state
 
 class VolleySeason(object):
     '''Class representing a volleyball season composed of multiple matches.
@@ -179,8 +519,17 @@ class VolleySeason(object):
         self.matches: List[VolleyMatch] = []
         self.roster = roster
         self.league = str.upper(league) + ' ' + str.capitalize(season) + ' ' + str(year)
-
-        self.season_stats  = VolleyStats()
+        # league, season and year as given on the sheet
+        self.league_name = league
+        self.season_name = season
+        self.year        = year
+        self.archive : Optional[VolleyArchive] = None
+        # ValidationReport of the season's sheet, set by the loader
+        self.validation : Optional[Any] = None
+        # jersey, opponent and jersey pair indexes of the season's games
+        self.index = GameIndex()
+
+        self._cache = _StatsCache(VolleyStats.SEASON)
 
     def __str__(self) -> str:
         return str(self.season_stats)
@@ -188,11 +537,118 @@ class VolleySeason(object):
     def add_match(self, match: VolleyMatch) -> None:
         '''Adds a match info to the volleyball season.
         '''
+        # matches are numbered within their season
+        match.match_num = len(self.matches) + 1
         self.matches.append(match)
-        # add last added match's stats to season stats
-        self.season_stats += self.matches[-1].match_stats
+        match.season = self
+        # the match's games are added to the season stats (and above) on next access
+        for game in match.games:
+            self._game_changed(game, None)
+
+    @property
+    def season_stats(self) -> VolleyStats:
+        '''Stats of all matches of the season, computed on first access and kept up to date.'''
+        return self._cache.get(lambda: VolleyStats.sum(match.match_stats for match in self.matches),
+                               self._metrics_scope)
+
+    def _metrics_scope(self) -> str:
+        return self.league
+
+    def invalidate(self) -> None:
+        '''Drops the cached season stats, they are summed again from the matches on next access.'''
+        self._cache.clear()
+
+    def query(self, players : Iterable[int] = (), opponent : Optional[str] = None
+              ) -> VolleyStats:
+        '''Returns the summed stats of the season's games with all the players in the lineup
+        against the opponent, see GameIndex.games().'''
+        return self.index.stats(players, opponent)
+
+    def _game_changed(self, game : VolleyGame, old : Optional[VolleyStats]) -> None:
+        self._cache.game_changed(game, old)
+        self.index.add(game)
+        if self.archive is not None:
+            self.archive._game_changed(game, old)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # pickled without its archive, VolleyArchive.__setstate__ links it again
+        state = self.__dict__.copy()
+        state['archive'] = None
+        return state
+
+    def __setstate__(self, state : Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        for match in self.matches:
+            match.season = self
 
     def print_match(self, match : int) -> None:
         """Function prints the provided Volleyball's Match Game information and Statistics."""
 
         # self.matches[match].print_stats(self.roster)
+
+class VolleyArchive(object):
+    '''Class representing every loaded season, keeping the ALL_TIME stats.
+
+    The all-time stats sit at the root of the game -> match -> season -> archive tree of cached
+    sums: adding or correcting a game only updates its match, its season and this root.
+
+        Attributes:
+            seasons     (list)
+    '''
+    def __init__(self, seasons: Iterable[VolleySeason] = ()) -> None:
+        self.seasons: List[VolleySeason] = []
+        # jersey, opponent and jersey pair indexes of the games of every season
+        self.index = GameIndex()
+
+        self._cache = _StatsCache(VolleyStats.ALL_TIME)
+
+        for season in seasons:
+            self.add_season(season)
+
+    def __str__(self) -> str:
+        return str(self.all_time_stats)
+
+    def add_season(self, season: VolleySeason) -> None:
+        '''Adds a season to the archive.'''
+        if season.archive is not None:
+            raise ValueError(f'{season.league} already belongs to an archive')
+
+        self.seasons.append(season)
+        season.archive = self
+        for match in season.matches:
+            for game in match.games:
+                self._game_changed(game, None)
+
+    @property
+    def all_time_stats(self) -> VolleyStats:
+        '''Stats of all seasons, computed on first access and kept up to date.'''
+        return self._cache.get(
+            lambda: VolleyStats.sum(season.season_stats for season in self.seasons),
+            self._metrics_scope)
+
+    def leaderboard(self, key : Callable[[PlayerStats], float], count : int = 10
+                    ) -> List[PlayerStats]:
+        '''Returns the all-time stats of the best players sorted by key, best first.'''
+        return sorted(self.all_time_stats.player_stats.values(), key=key, reverse=True)[:count]
+
+    def query(self, players : Iterable[int] = (), opponent : Optional[str] = None
+              ) -> VolleyStats:
+        '''Returns the summed stats of all games with all the players in the lineup against the
+        opponent, see GameIndex.games().'''
+        return self.index.stats(players, opponent)
+
+    def _metrics_scope(self) -> str:
+        return 'archive'
+
+    def invalidate(self) -> None:
+        '''Drops the cached all-time stats, they are summed again from the seasons on next access.'''
+        self._cache.clear()
+
+    def _game_changed(self, game : VolleyGame, old : Optional[VolleyStats]) -> None:
+        self._cache.game_changed(game, old)
+        self.index.add(game)
+
+    def __setstate__(self, state : Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        for season in self.seasons:
+            season.archive = self
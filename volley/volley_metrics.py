@@ -0,0 +1,217 @@
+'''Volleyball Metrics module
+
+Opt-in instrumentation of the pipeline from score sheet to report. When enabled, every stage
+records its number of calls, wall time and the net number of memory blocks it allocated, per
+scope (season file, match, stats level). Plain counters record how often hot operations run.
+
+Metrics are off by default and a disabled stage is a shared no-op context manager, so the
+instrumented code pays one function call per stage. Enable them with the environment variable
+
+    VOLLEY_METRICS=table            summary table on stderr at exit
+    VOLLEY_METRICS=json             same as JSON
+    VOLLEY_METRICS=json:out.json    written to a file instead
+
+(any other value warns and leaves metrics off) or from code with enable() / disable(), and read
+them with snapshot() or dump(). Nested stages are inclusive, a season's aggregate holds the
+aggregates of its matches. Only the current process is measured, work done in worker processes
+(load_seasons(), batch reports) is not included.
+
+Stages:
+    load            load_season(), whole call, scope is the sheet's file name
+    snapshot_read   reading a compiled snapshot
+    parse           YAML parse of a sheet
+    build           VolleySeason/VolleyMatch/VolleyGame construction from the parsed sheet
+    validate        score sheet validation of a season
+    snapshot_write  writing a compiled snapshot
+    game_stats      rotation accounting of a game, scope is the game's match
+    details         detailed stats of a game
+    aggregate       building or correcting a match/season/archive sum
+    render          rendering the text report of a match
+    sql_ingest      storing a season in a SeasonStore (volley_sql), scope is the season
+'''
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+import warnings
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple, Union
+
+ENV_VAR = 'VOLLEY_METRICS'
+
+# a scope can be given as a function building it, only called when metrics are enabled
+Scope = Union[str, Callable[[], str]]
+
+FORMAT_TABLE = 'table'
+FORMAT_JSON  = 'json'
+FORMATS      = (FORMAT_TABLE, FORMAT_JSON)
+
+class Metrics():
+    '''Recorder of stage timings and counters, see module documentation.'''
+
+    def __init__(self) -> None:
+        self.enabled = False
+        # (stage, scope) -> [calls, seconds, blocks]
+        self.stages   : Dict[Tuple[str, str], List[float]] = {}
+        # (counter, scope) -> count
+        self.counters : Dict[Tuple[str, str], int] = {}
+
+        self.output : Optional[Tuple[str, Optional[str]]] = None
+        self._lock  = threading.Lock()
+        self._atexit = False
+
+    def enable(self, fmt : Optional[str] = None, path : Optional[str] = None) -> None:
+        '''Starts recording.
+
+            Params:
+                fmt     (str): optional, FORMAT_TABLE or FORMAT_JSON, dump the metrics at exit
+
+                path    (str): optional, file to dump into instead of stderr
+        '''
+        if fmt is not None:
+            if fmt not in FORMATS:
+                raise ValueError(f'unknown metrics format: {fmt}')
+            self.output = (fmt, path)
+            if not self._atexit:
+                atexit.register(self._dump_at_exit)
+                self._atexit = True
+        self.enabled = True
+
+    def disable(self) -> None:
+        '''Stops recording, recorded metrics are kept.'''
+        self.enabled = False
+
+    def reset(self) -> None:
+        '''Drops all recorded metrics.'''
+        with self._lock:
+            self.stages.clear()
+            self.counters.clear()
+
+    def stage(self, name : str, scope : Scope = '') -> Any:
+        '''Context manager timing a stage, a shared no-op when metrics are disabled.'''
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, scope() if callable(scope) else scope)
+
+    def count(self, name : str, scope : Scope = '', amount : int = 1) -> None:
+        '''Adds to a counter.'''
+        if not self.enabled:
+            return
+        with self._lock:
+            key = (name, scope() if callable(scope) else scope)
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def record(self, name : str, scope : str, seconds : float, blocks : int) -> None:
+        '''Adds one call of a stage.'''
+        with self._lock:
+            entry = self.stages.get((name, scope))
+            if entry is None:
+                entry = self.stages[(name, scope)] = [0, 0.0, 0]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += blocks
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        '''Returns the recorded metrics as plain data, stages ordered by stage then total time.'''
+        with self._lock:
+            stages = [{'stage': name, 'scope': scope, 'calls': int(calls), 'seconds': seconds,
+                       'blocks': int(blocks)}
+                      for (name, scope), (calls, seconds, blocks) in self.stages.items()]
+            counters = [{'counter': name, 'scope': scope, 'count': count}
+                        for (name, scope), count in self.counters.items()]
+
+        stages.sort(key=lambda row: (row['stage'], -row['seconds'], row['scope']))
+        counters.sort(key=lambda row: (row['counter'], row['scope']))
+        return {'stages': stages, 'counters': counters}
+
+    def dump(self, stream : TextIO, fmt : str = FORMAT_TABLE) -> None:
+        '''Writes the recorded metrics as a summary table or JSON.'''
+        data = self.snapshot()
+        if fmt == FORMAT_JSON:
+            json.dump(data, stream, indent=2)
+            stream.write('\n')
+            return
+
+        stream.write(f'{"stage":<16}{"scope":<32}{"calls":>8}{"total ms":>12}{"mean us":>12}'
+                     f'{"blocks":>12}\n')
+        for row in data['stages']:
+            mean = row['seconds'] / row['calls'] * 1e6 if row['calls'] else 0.0
+            stream.write(f'{row["stage"]:<16}{row["scope"][:31]:<32}{row["calls"]:>8}'
+                         f'{row["seconds"] * 1e3:>12.3f}{mean:>12.1f}{row["blocks"]:>12}\n')
+
+        if data['counters']:
+            stream.write(f'\n{"counter":<16}{"scope":<32}{"count":>8}\n')
+            for row in data['counters']:
+                stream.write(f'{row["counter"]:<16}{row["scope"][:31]:<32}{row["count"]:>8}\n')
+
+    def _dump_at_exit(self) -> None:
+        if self.output is None or not (self.stages or self.counters):
+            return
+        fmt, path = self.output
+        if path is None:
+            self.dump(sys.stderr, fmt)
+        else:
+            with open(path, 'w', encoding='utf-8') as file:
+                self.dump(file, fmt)
+
+class _Stage():
+    __slots__ = ('metrics', 'name', 'scope', 'start', 'blocks')
+
+    def __init__(self, metrics : Metrics, name : str, scope : str) -> None:
+        self.metrics = metrics
+        self.name    = name
+        self.scope   = scope
+
+    def __enter__(self) -> "_Stage":
+        self.blocks = sys.getallocatedblocks()
+        self.start  = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc : Any) -> None:
+        seconds = time.perf_counter() - self.start
+        self.metrics.record(self.name, self.scope, seconds,
+                            sys.getallocatedblocks() - self.blocks)
+
+class _NullStage():
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc : Any) -> None:
+        return None
+
+_NULL_STAGE = _NullStage()
+
+# process wide recorder used by the instrumented modules
+METRICS = Metrics()
+
+def enable(fmt : Optional[str] = None, path : Optional[str] = None) -> None:
+    '''Starts recording into METRICS, see Metrics.enable().'''
+    METRICS.enable(fmt, path)
+
+def disable() -> None:
+    '''Stops recording into METRICS.'''
+    METRICS.disable()
+
+def stage(name : str, scope : Scope = '') -> Any:
+    '''Times a stage into METRICS, see Metrics.stage().'''
+    return METRICS.stage(name, scope)
+
+def _enable_from_env() -> None:
+    value = os.environ.get(ENV_VAR, '').strip()
+    if not value or value == '0':
+        return
+
+    fmt, _, path = value.partition(':')
+    if fmt in ('1', 'on', 'true'):
+        fmt = FORMAT_TABLE
+    if fmt not in FORMATS:
+        # instrumentation is optional, a bad setting must not break importing the package
+        warnings.warn(f'{ENV_VAR}={value!r}: unknown metrics format {fmt!r}, expected one of '
+                      f'{FORMATS}, metrics stay disabled', RuntimeWarning)
+        return
+    METRICS.enable(fmt, path or None)
+
+_enable_from_env()
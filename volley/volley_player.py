@@ -1,45 +1,60 @@
 '''Volleyball Roster module'''
-from typing import List
+from typing import List, Dict, Optional, Union
 
 class VolleyRoster(object):
     '''Class representing the volleyball roster.
 
+    Players are indexed by name and by jersey number so lookups don't scan the roster.
     '''
     def __init__(self) -> None:
         self.players: List[VolleyPlayer] = []
+        self._by_name: Dict[str, VolleyPlayer] = {}
+        self._by_num: Dict[int, VolleyPlayer]  = {}
 
-    def add_player(self, name : str, gender : str, status : str, number : str) -> None:
+    def add_player(self, name : str, gender : str, status : str, number : Union[str, int]) -> None:
         '''Adds a volleyball player to the roster.
         '''
-        self.players.append(VolleyPlayer(name, gender, status, number))
+        player = VolleyPlayer(name, gender, status, number)
+        self.players.append(player)
+
+        # the first player added keeps a name/number, same as the old linear scan
+        self._by_name.setdefault(player.name, player)
+        self._by_num.setdefault(player.number, player)
+
+    def get_player(self, number : int) -> Optional["VolleyPlayer"]:
+        '''Finds a player from their jersey number, None if not on the roster.
+        '''
+        return self._by_num.get(number)
 
     def get_player_name(self, number : int) -> str:
         '''Finds a player's name from their jersey number.
         '''
-        for player in self.players:
-            if player.number == number:
-                return player.name
+        player = self._by_num.get(number)
+        if player is None:
+            return ""
 
-        return ""
+        return player.name
 
     def get_player_num(self, name : str) -> int:
         """
         Finds a player's number from their given name.
         """
-        for player in self.players:
-            if player.name == name:
-                return int(player.number)
+        player = self._by_name.get(name)
+        if player is None:
+            return -1
 
-        return -1
+        return player.number
 
 
 class VolleyPlayer(object):
     '''Class representing a volleyball player keeping stats and records.
-    TODO: How to interpret jersey numbers (as string or as an int)
+
+    Jersey numbers are always stored as int, the score sheets and lineups use ints and a
+    sheet number like `00` is the same jersey as `0`.
     '''
 
-    def __init__(self, name : str, gender : str, status : str, number : str) -> None:
+    def __init__(self, name : str, gender : str, status : str, number : Union[str, int]) -> None:
         self.name   = name
         self.gender = gender
         self.status = status
-        self.number = number
+        self.number = int(number)
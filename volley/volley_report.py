@@ -1,8 +1,12 @@
 """
 Module to Generate Volleyball PDF Reports of Game/Match/Season Stats
 """
-from typing import List, Dict, Tuple, TypedDict, Optional
-import tabulate
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import (List, Dict, Deque, Tuple, TypedDict, Optional, Iterable, Iterator, TextIO,
+                    Union)
+import hashlib
+import os
 
 # from reportlab.pdfgen import canvas
 # from reportlab.pdfbase.ttfonts import TTFont
@@ -11,8 +15,10 @@ import tabulate
 # from reportlab.lib.pagesizes import landscape, letter
 # from reportlab.lib.units import mm, inch
 
-from .volley_match import VolleyMatch, VolleyGame
+from .volley_match import VolleyMatch, VolleyGame, VolleySeason
 from .volley_player import VolleyRoster
+from .volley_metrics import METRICS
+from .volley_table import TableLayout, RENDER_FAST, RENDERERS
 
 # class VolleyReportPDF():
 #     """Class Generates a PDF Report of Desired Stats"""
@@ -43,19 +49,256 @@ from .volley_player import VolleyRoster
 #         self.pdf.save()
 
 class VolleyReportText():
-    """Class Generates a Text Report of Desired Stats"""
+    """Class Generates a Text Report of Desired Stats
+
+    Rendered match reports are kept in an LRU cache keyed by a hash of everything the report is
+    made from (the match's games, its opponent/number and the roster names of its players), so
+    rendering an unchanged match again is a dictionary lookup.
+
+    Reports of whole seasons are streamed instead, iter_report() yields them line by line and
+    write() sends them to a file-like sink, so only one match is rendered at a time.
+
+    add_seasons() and write_batch() render the matches of many seasons on a process pool, output
+    is the same as rendering them one after the other.
+
+    Stat tables are drawn by fixed TableLayouts, renderer='tabulate' draws them with tabulate
+    instead (same output, slower).
+    """
 
     WIDTH  = 90
     HEIGHT = 56
     NAME_W = 7
 
-    def __init__(self) -> None:
+    CACHE_SIZE = 256
+
+    # "pretty"
+    # "fancy_grid"
+    # "presto"
+    STATS1_TABLE = TableLayout(
+        ['Name', 'Total Games', 'T Det Games', 'Serve Rots.', 'Miss Serve', 'Out Balls',
+         'Into Net', 'Bad Pass', 'Net T (Tot.)', 'Errors (Tot.)'], 'fancy_grid',
+        widths=[14, 5, 5, 5, 5, 5, 4, 4, 6, 6], header_widths=[14, 5, 5, 5, 5, 5, 4, 4, 6, 6],
+        align=["left"] + ["right"] * 9)
+
+    STATS2_TABLE = TableLayout(
+        ['Name', 'Total Games', 'Serve Rots.', 'Unret Serv', 'Recov', 'Pts/ Serve', 'Pts/ Game',
+         '+/- Stats'], 'presto',
+        widths=[14, 5, 5, 5, 5, 5, 4, 7], header_widths=[14, 5, 5, 5, 5, 5, 4, 7],
+        align=["left"] + ["right"] * 6 + ["center"], floatfmt='.2f')
+
+    STATS3_TABLE = TableLayout(
+        ['Name', '% (Normalized)\n   RB      RF      CF      LF      LB      CB    ',
+         '% (Normalized)\n    BR   |    FR   '], 'presto',
+        align=["left"] + ["center"] * 2)
+
+    def __init__(self, cache_size : int = CACHE_SIZE, renderer : str = RENDER_FAST) -> None:
         file_name = "volleyball_output.pdf"
 
+        if renderer not in RENDERERS:
+            raise ValueError(f'unknown table renderer: {renderer}')
+        self.renderer = renderer
+
+        self.cache_size = cache_size
+        self._cache : "OrderedDict[str, str]" = OrderedDict()
+
     def add_match(self, match : VolleyMatch) -> str:
         """Creates Match Stats Message."""
+        if self.cache_size <= 0:
+            return '\n'.join(self.iter_match(match))
+
+        key = self.match_key(match)
+        msg = self._cache.get(key)
+        if msg is not None:
+            METRICS.count('render_cache_hit')
+            self._cache.move_to_end(key)
+            return msg
+
+        msg = '\n'.join(self.iter_match(match))
+        self._cache[key] = msg
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+        return msg
+
+    def match_key(self, match : VolleyMatch) -> str:
+        """Content hash of everything a match report is rendered from."""
+        content = [match.match_num, match.opponent]
+
+        jerseys = set()
+        for game in match.games:
+            content.append((game.game, game.lineup, game.team_scores, game.oppo_scores,
+                            game.serve_start, game.include, game.full, game.detailed))
+            jerseys.update(game.lineup)
+
+        content.append(sorted((num, match.roster.get_player_name(num)) for num in jerseys))
+
+        return hashlib.sha1(repr(content).encode()).hexdigest()
+
+    def clear_cache(self) -> None:
+        """Drops all cached renders."""
+        self._cache.clear()
+
+    def __getstate__(self) -> Dict[str, object]:
+        # renders are sent to worker processes without the cache
+        state = self.__dict__.copy()
+        state['_cache'] = OrderedDict()
+        return state
+
+    def add_seasons(self, seasons : Iterable[VolleySeason], processes : Optional[int] = None
+                    ) -> List[str]:
+        """Creates the Match Stats Messages of all matches of the seasons, in season/match order.
+
+            Params:
+                seasons    (list): seasons to report on
+
+                processes   (int): max number of workers, defaults to the number of CPUs
+        """
+        return [msg for _, msgs in self._iter_batch(seasons, processes) for msg in msgs]
+
+    def write_batch(self, seasons : Iterable[VolleySeason], sink : TextIO,
+                    processes : Optional[int] = None) -> int:
+        """Same as write() for a list of seasons, with the matches rendered on a process pool.
+
+        Seasons are written as soon as all of their matches are rendered.
+
+            Returns:
+                lines -> int
+                    number of lines written
+        """
+        count = 0
+        for season, msgs in self._iter_batch(seasons, processes):
+            for line in self._season_header(season):
+                sink.write(line)
+                sink.write('\n')
+                count += 1
+            for msg in msgs:
+                sink.write(msg)
+                sink.write('\n')
+                count += msg.count('\n') + 1
+        return count
+
+    def _iter_batch(self, seasons : Iterable[VolleySeason], processes : Optional[int]
+                    ) -> Iterator[Tuple[VolleySeason, List[str]]]:
+        """Yields every season with its match reports, rendering the uncached ones in parallel."""
+        seasons = list(seasons)
+        keys    = [[self.match_key(match) for match in season.matches] for season in seasons]
+
+        # matches that have to be rendered, per season
+        todo = [[idx for idx, key in enumerate(season_keys) if key not in self._cache]
+                for season_keys in keys]
+
+        total   = sum(len(indexes) for indexes in todo)
+        workers = min(total, processes or os.cpu_count() or 1)
+
+        # cached reports are taken now, rendering the first seasons may evict them
+        cached = [{key: self._cache[key] for key in season_keys if key in self._cache}
+                  for season_keys in keys]
+
+        if workers <= 1:
+            for pos, season in enumerate(seasons):
+                rendered = dict(zip((keys[pos][idx] for idx in todo[pos]),
+                                    _render_matches(self, [season.matches[idx]
+                                                           for idx in todo[pos]])))
+                yield season, self._collect(keys[pos], rendered, cached[pos])
+            return
+
+        # a few chunks per worker, a chunk only holds matches of one season. Workers get the
+        # matches alone, VolleyMatch pickles without its season and archive
+        size  = max(1, -(-total // (workers * 4)))
+        tasks = [(pos, indexes[i:i + size]) for pos, indexes in enumerate(todo)
+                 for i in range(0, len(indexes), size)]
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending : Deque[Tuple[int, List[int], Future]] = deque()
+            next_task = 0
+            for pos, season in enumerate(seasons):
+                # chunks go out in season order, a couple per worker ahead of the season being
+                # written, so only the reports of seasons not yet written are held
+                while next_task < len(tasks) and (tasks[next_task][0] <= pos
+                                                  or len(pending) < workers * 2):
+                    task_pos, chunk = tasks[next_task]
+                    matches = [seasons[task_pos].matches[idx] for idx in chunk]
+                    pending.append((task_pos, chunk, pool.submit(_render_matches, self, matches)))
+                    next_task += 1
+
+                rendered : Dict[str, str] = {}
+                while pending and pending[0][0] == pos:
+                    _, chunk, future = pending.popleft()
+                    for idx, msg in zip(chunk, future.result()):
+                        rendered[keys[pos][idx]] = msg
+                yield season, self._collect(keys[pos], rendered, cached[pos])
+
+    def _collect(self, season_keys : List[str], rendered : Dict[str, str],
+                 cached : Dict[str, str]) -> List[str]:
+        """Match reports of a season in match order, newly rendered ones go into the cache."""
+        msgs = []
+        for key in season_keys:
+            msg = rendered.get(key)
+            if msg is None:
+                msg = cached[key]
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+            elif self.cache_size > 0:
+                self._cache[key] = msg
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            msgs.append(msg)
+        return msgs
+
+    def write(self, report : Union[VolleyMatch, VolleySeason, Iterable[VolleySeason]],
+              sink : TextIO) -> int:
+        """Streams the report of a match, a season or several seasons to a file-like sink.
+
+            Params:
+                report  (match/season/list): what to report on
+
+                sink              (TextIO): anything with a write(str) method
+
+            Returns:
+                lines -> int
+                    number of lines written
+        """
+        count = 0
+        for line in self.iter_report(report):
+            sink.write(line)
+            sink.write('\n')
+            count += 1
+        return count
+
+    def iter_report(self, report : Union[VolleyMatch, VolleySeason, Iterable[VolleySeason]]
+                    ) -> Iterator[str]:
+        """Yields the report lines of a match, a season or several seasons."""
+        if isinstance(report, VolleyMatch):
+            return self.iter_match(report)
+        if isinstance(report, VolleySeason):
+            return self.iter_season(report)
+        return self.iter_seasons(report)
+
+    def iter_seasons(self, seasons : Iterable[VolleySeason]) -> Iterator[str]:
+        """Yields the report lines of several seasons, one after the other."""
+        for season in seasons:
+            yield from self.iter_season(season)
+
+    def iter_season(self, season : VolleySeason) -> Iterator[str]:
+        """Yields the report lines of all matches of a season, rendering one match at a time."""
+        yield from self._season_header(season)
+
+        for match in season.matches:
+            yield from self.iter_match(match)
+
+    def _season_header(self, season : VolleySeason) -> List[str]:
+        return ['=' * self.WIDTH, f'SEASON: {season.league}'.center(self.WIDTH), '=' * self.WIDTH,
+                '']
+
+    def iter_match(self, match : VolleyMatch) -> Iterator[str]:
+        """Yields the report lines of a match, same lines as add_match() joins."""
+        with METRICS.stage('render', match._metrics_scope):
+            msg = self._match_lines(match)
+        yield from msg
+
+    def _match_lines(self, match : VolleyMatch) -> List[str]:
         match_num = match.match_num
-        match_opp = match.opponent['name']
+        match_opp = match.opponent_name
 
         msg = []
         msg.append('*' * self.WIDTH)
@@ -78,29 +321,33 @@ class VolleyReportText():
         msg += self._create_stats3(match)
         msg.append('')
 
-        return '\n'.join(msg)
+        return msg
 
     def _create_game_lineups(self, lineups : List[List[int]], roster : VolleyRoster) -> List[str]:
         msg = []
         msg.append(('   '  + '-'*10 + ' NET ' + '-'*10 + '  ') * 3)
         msg.append(('   _' + ' '*23 + '_  ') * 3)
 
+        # games left out of the stats may have no lineup, show an empty court for them
+        names = [[roster.get_player_name(num)[:self.NAME_W].center(self.NAME_W) for num in lineup]
+                 if lineup else [' ' * self.NAME_W] * 6 for lineup in lineups]
+
         line = ''
-        for lineup in lineups:
+        for name in names:
             line += '  | '
-            line += f'{roster.get_player_name(lineup[1])[:self.NAME_W].center(self.NAME_W)} '
-            line += f'{roster.get_player_name(lineup[2])[:self.NAME_W].center(self.NAME_W)} '
-            line += f'{roster.get_player_name(lineup[3])[:self.NAME_W].center(self.NAME_W)} | '
+            line += f'{name[1]} '
+            line += f'{name[2]} '
+            line += f'{name[3]} | '
         msg.append(line)
 
         msg.append(('  | ' + ' '*23 + ' | ') * 3)
 
         line = ''
-        for lineup in lineups:
+        for name in names:
             line += '  |_'
-            line += f'{roster.get_player_name(lineup[4])[:self.NAME_W].center(self.NAME_W)} '
-            line += f'{roster.get_player_name(lineup[5])[:self.NAME_W].center(self.NAME_W)} '
-            line += f'{roster.get_player_name(lineup[0])[:self.NAME_W].center(self.NAME_W)}_| '
+            line += f'{name[4]} '
+            line += f'{name[5]} '
+            line += f'{name[0]}_| '
         msg.append(line)
 
         return msg
@@ -131,14 +378,7 @@ class VolleyReportText():
         return msg
 
     def _create_stats1(self, match : VolleyMatch) -> List[str]:
-        msg = []
-
-        tabulate.MIN_PADDING = 0
-        headers = ['Name', 'Total Games', 'T Det Games', 'Serve Rots.', 'Miss Serve', 'Out Balls',
-                   'Into Net', 'Bad Pass', 'Net T (Tot.)', 'Errors (Tot.)']
-        widths = [14, 5, 5, 5, 5, 5, 4, 4, 6, 6]
-        align  = ["left"] + ["right"] * 9
-        data   = []
+        data = []
 
         for player, stats in match.match_stats.player_stats.items():
             fmt = [f'({str(player).rjust(2)}) {match.roster.get_player_name(player)}']
@@ -154,23 +394,10 @@ class VolleyReportText():
 
             data.append(fmt)
 
-        # "pretty"
-        # "fancy_grid"
-        msg = tabulate.tabulate(data, headers=headers, tablefmt="fancy_grid",
-                       maxcolwidths=widths, maxheadercolwidths=widths, colalign=align
-                       ).split('\n')
-
-        return msg
+        return self.STATS1_TABLE.render(data, self.renderer)
 
     def _create_stats2(self, match : VolleyMatch) -> List[str]:
-        msg = []
-
-        tabulate.MIN_PADDING = 0
-        headers = ['Name', 'Total Games', 'Serve Rots.', 'Unret Serv', 'Recov', 'Pts/ Serve',
-                   'Pts/ Game', '+/- Stats']
-        widths = [14, 5, 5, 5, 5, 5, 4, 7]
-        align  = ["left"] + ["right"] * 6 + ["center"]
-        data   = []
+        data = []
 
         for player, stats in match.match_stats.player_stats.items():
             fmt = [f'({str(player).rjust(2)}) {match.roster.get_player_name(player)}']
@@ -185,23 +412,10 @@ class VolleyReportText():
 
             data.append(fmt)
 
-        # "pretty"
-        # "fancy_grid"
-        # "presto"
-        msg = tabulate.tabulate(data, headers=headers, tablefmt="presto",
-                       maxcolwidths=widths, maxheadercolwidths=widths, colalign=align,
-                       floatfmt='.2f'
-                       ).split('\n')
-        return msg
+        return self.STATS2_TABLE.render(data, self.renderer)
 
     def _create_stats3(self, match : VolleyMatch) -> List[str]:
-        msg = []
-
-        tabulate.MIN_PADDING = 0
-        headers = ['Name', '% (Normalized)\n   RB      RF      CF      LF      LB      CB    ',
-                   '% (Normalized)\n    BR   |    FR   ']
-        align  = ["left"] + ["center"] * 2
-        data   = []
+        data = []
 
         for player, stats in match.match_stats.player_stats.items():
             fmt = [f'({str(player).rjust(2)}) {match.roster.get_player_name(player)}']
@@ -210,8 +424,8 @@ class VolleyReportText():
 
             data.append(fmt)
 
-        # "pretty"
-        # "fancy_grid"
-        msg = tabulate.tabulate(data, headers, tablefmt="presto", colalign=align).split('\n')
+        return self.STATS3_TABLE.render(data, self.renderer)
 
-        return msg
+def _render_matches(report : VolleyReportText, matches : List[VolleyMatch]) -> List[str]:
+    # worker side of the batch render, module level so it can be sent to a process pool
+    return ['\n'.join(report.iter_match(match)) for match in matches]
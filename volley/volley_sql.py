@@ -0,0 +1,386 @@
+'''Volleyball SQL Store module
+
+Optional SQLite storage of loaded seasons, so years of data can be kept between runs and queried
+without loading every season into memory. Seasons go in once (through the YAML loader or as
+VolleySeason objects) and come back either as a VolleySeason rebuilt from the stored sheet data,
+or as VolleyStats / PlayerStats summed by SQL over any set of games.
+
+Tables:
+    seasons         league, season, year and source of every season
+    players         roster of every season
+    matches         match number and opponent (name indexed, raw sheet entry kept as JSON)
+    games           game flags, lineup and score tokens (JSON), final score, team counters
+    player_stats    computed stats of every player of every included game, one column per
+                    PlayerStats vector slot (games played in tenths, like the vector)
+    trio_stats      computed back row / front row trio +/- of every included game
+
+Rows are inserted in batches inside one transaction per season. Indexes cover the season,
+opponent and jersey columns the queries filter on. Only the stats vector is stored,
+served_scores and serve_runs of PlayerStats built from SQL are empty.
+'''
+import json
+import sqlite3
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .volley_loader import load_season
+from .volley_match import VolleyMatch, VolleySeason
+from .volley_metrics import METRICS
+from .volley_player import VolleyRoster
+from .volley_stats import PlayerStats, VolleyStats, _add_trio
+
+SCHEMA_VERSION = 1
+
+# games per executemany() batch
+BATCH_SIZE = 500
+
+STAT_COLUMNS = tuple(f'{field}_{side}' for field in PlayerStats.PAIR_FIELDS
+                     for side in ('plus', 'minus')) + PlayerStats.COUNT_FIELDS
+
+BACK_ROW  = 0
+FRONT_ROW = 1
+
+_SCHEMA = f'''
+CREATE TABLE IF NOT EXISTS meta (
+    key     TEXT PRIMARY KEY,
+    value   TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS seasons (
+    id      INTEGER PRIMARY KEY,
+    league  TEXT NOT NULL,
+    season  TEXT NOT NULL,
+    year    INTEGER NOT NULL,
+    name    TEXT NOT NULL,
+    source  TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS players (
+    season_id   INTEGER NOT NULL REFERENCES seasons(id),
+    jersey      INTEGER NOT NULL,
+    name        TEXT NOT NULL,
+    gender      TEXT NOT NULL,
+    status      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS matches (
+    id          INTEGER PRIMARY KEY,
+    season_id   INTEGER NOT NULL REFERENCES seasons(id),
+    match_num   INTEGER NOT NULL,
+    opponent    TEXT NOT NULL,
+    sheet       TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS games (
+    id              INTEGER PRIMARY KEY,
+    match_id        INTEGER NOT NULL REFERENCES matches(id),
+    season_id       INTEGER NOT NULL REFERENCES seasons(id),
+    game_num        INTEGER NOT NULL,
+    full            INTEGER NOT NULL,
+    serve           INTEGER NOT NULL,
+    include         INTEGER NOT NULL,
+    lineup          TEXT NOT NULL,
+    team_scores     TEXT NOT NULL,
+    oppo_scores     TEXT NOT NULL,
+    final_score     TEXT,
+    detailed        TEXT,
+    team_score      INTEGER NOT NULL,
+    oppo_score      INTEGER NOT NULL,
+    won             INTEGER NOT NULL,
+    untouched_balls     INTEGER NOT NULL,
+    rotational_fault    INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS player_stats (
+    game_id     INTEGER NOT NULL REFERENCES games(id),
+    jersey      INTEGER NOT NULL,
+    {', '.join(f'{col} REAL NOT NULL' for col in STAT_COLUMNS)}
+);
+CREATE TABLE IF NOT EXISTS trio_stats (
+    game_id     INTEGER NOT NULL REFERENCES games(id),
+    row         INTEGER NOT NULL,
+    jersey_a    INTEGER NOT NULL,
+    jersey_b    INTEGER NOT NULL,
+    jersey_c    INTEGER NOT NULL,
+    plus        INTEGER NOT NULL,
+    minus       INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS players_season   ON players(season_id, jersey);
+CREATE INDEX IF NOT EXISTS matches_season   ON matches(season_id);
+CREATE INDEX IF NOT EXISTS matches_opponent ON matches(opponent);
+CREATE INDEX IF NOT EXISTS games_season     ON games(season_id);
+CREATE INDEX IF NOT EXISTS games_match      ON games(match_id);
+CREATE INDEX IF NOT EXISTS player_stats_jersey ON player_stats(jersey, game_id);
+CREATE INDEX IF NOT EXISTS player_stats_game   ON player_stats(game_id);
+CREATE INDEX IF NOT EXISTS trio_stats_game     ON trio_stats(game_id);
+'''
+
+class SeasonStore():
+    '''SQLite store of seasons and their computed stats, see module documentation.
+
+        Params:
+            path        (str): database file, ':memory:' for a store that lives with the object
+    '''
+    def __init__(self, path : str = ':memory:') -> None:
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+        self._check_meta()
+
+    def __enter__(self) -> "SeasonStore":
+        return self
+
+    def __exit__(self, *exc : Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        '''Closes the database.'''
+        self.conn.close()
+
+    ### Ingestion
+
+    def ingest(self, season : VolleySeason, source : str = '') -> int:
+        '''Stores a season with its games and their computed stats.
+
+            Returns:
+                season_id -> int
+        '''
+        with METRICS.stage('sql_ingest', season._metrics_scope), self.conn:
+            cur = self.conn.execute(
+                'INSERT INTO seasons (league, season, year, name, source) VALUES (?, ?, ?, ?, ?)',
+                (season.league_name, season.season_name, season.year, season.league, source))
+            season_id : int = cur.lastrowid  # type: ignore[assignment]
+
+            self.conn.executemany(
+                'INSERT INTO players (season_id, jersey, name, gender, status) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [(season_id, player.number, player.name, player.gender, player.status)
+                 for player in season.roster.players])
+
+            batch = _Batch(self.conn)
+            for match in season.matches:
+                cur = self.conn.execute(
+                    'INSERT INTO matches (season_id, match_num, opponent, sheet) '
+                    'VALUES (?, ?, ?, ?)',
+                    (season_id, match.match_num, match.opponent_name, json.dumps(match.opponent)))
+                match_id : int = cur.lastrowid  # type: ignore[assignment]
+
+                for game in match.games:
+                    batch.add(season_id, match_id, game)
+            batch.flush()
+
+        return season_id
+
+    def ingest_seasons(self, seasons : Iterable[VolleySeason]) -> List[int]:
+        '''Stores several seasons, see ingest().'''
+        return [self.ingest(season) for season in seasons]
+
+    def ingest_files(self, paths : Iterable[str], use_cache : bool = True,
+                     validate : bool = True) -> List[int]:
+        '''Loads score sheets one at a time through load_season() and stores them, so only one
+        season is in memory at once.'''
+        return [self.ingest(load_season(path, use_cache=use_cache, validate=validate), path)
+                for path in paths]
+
+    ### Queries
+
+    def seasons(self) -> List[Tuple[int, str, str]]:
+        '''Returns (season_id, name, source) of every stored season.'''
+        return list(self.conn.execute('SELECT id, name, source FROM seasons ORDER BY id'))
+
+    def opponents(self, season_id : Optional[int] = None) -> List[str]:
+        '''Names of the opponents played, in the order they were first played.'''
+        sql  = 'SELECT opponent FROM matches'
+        args : List[Any] = []
+        if season_id is not None:
+            sql += ' WHERE season_id = ?'
+            args.append(season_id)
+        sql += ' GROUP BY opponent ORDER BY MIN(id)'
+        return [row[0] for row in self.conn.execute(sql, args)]
+
+    def load(self, season_id : int) -> VolleySeason:
+        '''Rebuilds a stored season from its sheet data, stats are computed again on access.'''
+        row = self.conn.execute('SELECT league, season, year FROM seasons WHERE id = ?',
+                                (season_id,)).fetchone()
+        if row is None:
+            raise KeyError(f'no season {season_id}')
+
+        roster = VolleyRoster()
+        for jersey, name, gender, status in self.conn.execute(
+                'SELECT jersey, name, gender, status FROM players WHERE season_id = ? '
+                'ORDER BY rowid', (season_id,)):
+            roster.add_player(name, gender, status, jersey)
+
+        season  = VolleySeason(row[0], row[1], row[2], roster)
+        matches : Dict[int, VolleyMatch] = {}
+        for match_id, sheet in self.conn.execute(
+                'SELECT id, sheet FROM matches WHERE season_id = ? ORDER BY id', (season_id,)):
+            matches[match_id] = VolleyMatch(json.loads(sheet), roster)
+
+        for (match_id, game_num, full, serve, include, lineup, team, oppo, final,
+             detailed) in self.conn.execute(
+                'SELECT match_id, game_num, full, serve, include, lineup, team_scores, '
+                'oppo_scores, final_score, detailed FROM games WHERE season_id = ? ORDER BY id',
+                (season_id,)):
+            matches[match_id].add_game({
+                'game': game_num, 'full': bool(full), 'serve': bool(serve),
+                'include': bool(include), 'lineup': json.loads(lineup),
+                'team_scores': json.loads(team), 'opponent_scores': json.loads(oppo),
+                'final_score': json.loads(final) if final is not None else None,
+                'detailed': json.loads(detailed) if detailed is not None else None})
+
+        for match in matches.values():
+            season.add_match(match)
+        return season
+
+    def stats(self, season_id : Optional[int] = None, match_id : Optional[int] = None,
+              opponent : Optional[str] = None, jersey : Optional[int] = None) -> VolleyStats:
+        '''Sums the stats of the included games matching every given filter in SQL.
+
+            Params:
+                season_id   (int): optional, games of a season
+
+                match_id    (int): optional, games of a match (matches.id)
+
+                opponent    (str): optional, games against an opponent
+
+                jersey      (int): optional, games the player was in the lineup for
+
+            Returns:
+                stats -> VolleyStats
+                    MATCH level for one match, SEASON for one season, ALL_TIME otherwise, same
+                    players, +/-, counters and trios as summing the games' VolleyStats
+        '''
+        where, args = _game_filter(season_id, match_id, opponent, jersey)
+        stats = VolleyStats()
+
+        wins, losses, untouched, faults = self.conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(1 - won), 0), COALESCE(SUM(untouched_balls), 0), '
+            f'COALESCE(SUM(rotational_fault), 0) FROM games g WHERE {where}', args).fetchone()
+        wins -= losses
+        if not wins + losses:
+            return stats
+
+        if match_id is not None:
+            stats.stats_type = VolleyStats.MATCH
+        elif season_id is not None:
+            stats.stats_type = VolleyStats.SEASON
+        else:
+            stats.stats_type = VolleyStats.ALL_TIME
+        stats.valid            = True
+        stats.final_team_score = wins
+        stats.final_oppo_score = losses
+        stats.won              = wins > losses
+        stats.untouched_balls  = untouched
+        stats.rotational_fault = faults
+
+        for num, vec in self._player_rows(where, args):
+            stats.player_stats[num] = PlayerStats._from_vector(num, vec)
+
+        # trios first seen first, like the sums of VolleyStats
+        for row, trio_a, trio_b, trio_c, plus, minus in self.conn.execute(
+                'SELECT row, jersey_a, jersey_b, jersey_c, SUM(plus), SUM(minus) '
+                'FROM trio_stats t JOIN games g ON g.id = t.game_id '
+                f'WHERE {where} GROUP BY row, jersey_a, jersey_b, jersey_c '
+                'ORDER BY MIN(t.rowid)', args):
+            if row == BACK_ROW:
+                _add_trio(stats.back_row_stats, stats.back_row_index,
+                          (trio_a, trio_b, trio_c), plus, minus)
+            else:
+                _add_trio(stats.front_row_stats, stats.front_row_index,
+                          (trio_a, trio_b, trio_c), plus, minus)
+
+        return stats
+
+    def player_stats(self, jersey : int, season_id : Optional[int] = None,
+                     opponent : Optional[str] = None) -> PlayerStats:
+        '''Sums one player's stats over the included games matching the filters in SQL.'''
+        where, args = _game_filter(season_id, None, opponent, None)
+        for num, vec in self._player_rows(where + ' AND p.jersey = ?', args + [jersey]):
+            return PlayerStats._from_vector(num, vec)
+        return PlayerStats(jersey)
+
+    def _player_rows(self, where : str, args : List[Any]) -> Iterator[Tuple[int, array]]:
+        sums = ', '.join(f'SUM(p.{col})' for col in STAT_COLUMNS)
+        # players first seen first, like the sums of VolleyStats
+        for row in self.conn.execute(
+                f'SELECT p.jersey, {sums} FROM player_stats p JOIN games g ON g.id = p.game_id '
+                f'WHERE {where} GROUP BY p.jersey ORDER BY MIN(p.rowid)', args):
+            yield row[0], array('d', row[1:])
+
+    def _check_meta(self) -> None:
+        meta = dict(self.conn.execute('SELECT key, value FROM meta'))
+        layout = json.dumps(STAT_COLUMNS)
+        if not meta:
+            with self.conn:
+                self.conn.executemany('INSERT INTO meta (key, value) VALUES (?, ?)',
+                                      [('version', str(SCHEMA_VERSION)), ('layout', layout)])
+        elif meta.get('version') != str(SCHEMA_VERSION) or meta.get('layout') != layout:
+            raise ValueError(f'{self.path} was written with another schema or stats layout')
+
+class _Batch():
+    '''Game, player stats and trio rows waiting for one executemany() each'''
+
+    def __init__(self, conn : sqlite3.Connection) -> None:
+        self.conn   = conn
+        self.games  : List[Tuple[Any, ...]] = []
+        self.stats  : List[List[Tuple[Any, ...]]] = []
+        self.trios  : List[List[Tuple[Any, ...]]] = []
+        self.next_id = (conn.execute('SELECT COALESCE(MAX(id), 0) FROM games').fetchone()[0]
+                        + 1)
+
+    def add(self, season_id : int, match_id : int, game : Any) -> None:
+        game_id = self.next_id
+        self.next_id += 1
+
+        stats = game.game_stats
+        self.games.append((
+            game_id, match_id, season_id, game.game, int(bool(game.full)),
+            int(bool(game.serve_start)), int(bool(game.include)), json.dumps(game.lineup),
+            json.dumps(game.team_scores), json.dumps(game.oppo_scores),
+            json.dumps(game.final_score) if game.final_score is not None else None,
+            json.dumps(game.detailed) if game.detailed is not None else None,
+            stats.final_team_score, stats.final_oppo_score, int(stats.won),
+            stats.untouched_balls, stats.rotational_fault))
+
+        players : List[Tuple[Any, ...]] = []
+        trios   : List[Tuple[Any, ...]] = []
+        if game.include and stats.valid:
+            for num, player in stats.player_stats.items():
+                players.append((game_id, num, *player._vec))
+            for row, table in ((BACK_ROW, stats.back_row_stats),
+                               (FRONT_ROW, stats.front_row_stats)):
+                for trio, (plus, minus) in table.items():
+                    trios.append((game_id, row, *trio, plus, minus))
+        self.stats.append(players)
+        self.trios.append(trios)
+
+        if len(self.games) >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.games:
+            return
+        self.conn.executemany(f'INSERT INTO games VALUES ({", ".join("?" * 17)})', self.games)
+        self.conn.executemany(
+            f'INSERT INTO player_stats (game_id, jersey, {", ".join(STAT_COLUMNS)}) '
+            f'VALUES ({", ".join("?" * (len(STAT_COLUMNS) + 2))})',
+            [row for rows in self.stats for row in rows])
+        self.conn.executemany('INSERT INTO trio_stats VALUES (?, ?, ?, ?, ?, ?, ?)',
+                              [row for rows in self.trios for row in rows])
+        self.games.clear()
+        self.stats.clear()
+        self.trios.clear()
+
+def _game_filter(season_id : Optional[int], match_id : Optional[int], opponent : Optional[str],
+                 jersey : Optional[int]) -> Tuple[str, List[Any]]:
+    where = ['g.include = 1']
+    args  : List[Any] = []
+    if season_id is not None:
+        where.append('g.season_id = ?')
+        args.append(season_id)
+    if match_id is not None:
+        where.append('g.match_id = ?')
+        args.append(match_id)
+    if opponent is not None:
+        where.append('g.match_id IN (SELECT id FROM matches WHERE opponent = ?)')
+        args.append(opponent)
+    if jersey is not None:
+        where.append('g.id IN (SELECT game_id FROM player_stats WHERE jersey = ?)')
+        args.append(jersey)
+    return ' AND '.join(where), args
@@ -1,8 +1,10 @@
 '''Volleyball Stats module'''
-from typing import List, Dict, Tuple, TypedDict, Optional
+from typing import List, Dict, Tuple, TypedDict, Optional, Iterable, Iterator, Sequence
 
-from operator import add
+from array import array
+from operator import add, sub
 from .volley_player import VolleyRoster
+from .volley_metrics import METRICS
 
 PLUS  = 0
 MINUS = 1
@@ -37,90 +39,197 @@ class DetailStatsType(TypedDict):
     recoveries          : Dict[str, int]
     roster              : VolleyRoster
 
+class StatPair():
+    ''' View onto a plus/minus pair stored inside a PlayerStats vector.
+
+    Behaves like the two element list it replaces: indexing, item assignment and iteration all
+    read and write straight through to the backing vector.
+    '''
+    __slots__ = ('_vec', '_idx')
+
+    def __init__(self, vec : array, idx : int) -> None:
+        self._vec = vec
+        self._idx = idx
+
+    def __getitem__(self, side : int) -> int:
+        if side < 0:
+            side += 2
+        if side not in (PLUS, MINUS):
+            raise IndexError('stat pair index out of range')
+        return int(self._vec[self._idx + side])
+
+    def __setitem__(self, side : int, value : int) -> None:
+        if side < 0:
+            side += 2
+        if side not in (PLUS, MINUS):
+            raise IndexError('stat pair index out of range')
+        self._vec[self._idx + side] = value
+
+    def __iter__(self) -> Iterator[int]:
+        yield int(self._vec[self._idx])
+        yield int(self._vec[self._idx + 1])
+
+    def __len__(self) -> int:
+        return 2
+
+    def __eq__(self, other: object) -> bool:
+        try:
+            return list(self) == list(other)  # type: ignore[call-overload]
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+class _PairSlot():
+    ''' Descriptor exposing a StatPair view of a PlayerStats vector '''
+    __slots__ = ('index',)
+
+    def __init__(self, index : int) -> None:
+        self.index = index
+
+    def __get__(self, obj : Optional["PlayerStats"], objtype : Optional[type] = None):
+        if obj is None:
+            return self
+        return StatPair(obj._vec, self.index)
+
+    def __set__(self, obj : "PlayerStats", value : Sequence[int]) -> None:
+        obj._vec[self.index]     = value[0]
+        obj._vec[self.index + 1] = value[1]
+
+class _CountSlot():
+    ''' Descriptor exposing a single counter of a PlayerStats vector '''
+    __slots__ = ('index', 'scale')
+
+    def __init__(self, index : int, scale : int = 1) -> None:
+        self.index = index
+        self.scale = scale
+
+    def __get__(self, obj : Optional["PlayerStats"], objtype : Optional[type] = None):
+        if obj is None:
+            return self
+        if self.scale != 1:
+            return obj._vec[self.index] / self.scale
+        return int(obj._vec[self.index])
+
+    def __set__(self, obj : "PlayerStats", value : float) -> None:
+        if self.scale != 1:
+            value = round(value * self.scale)
+        obj._vec[self.index] = value
+
 class PlayerStats():
     ''' Class representing Player Statistics kept throughout kept VolleyStats
+
+    All counters live in one fixed-layout float vector (`_vec`) so that merging two players is a
+    single element-wise add. The named attributes (`rb_pm`, `kills`, ...) are views onto it.
     '''
     ROTATION = ['RB', 'RF', 'CF', 'LF', 'LB', 'CB']
 
+    # rotation pairs must stay first and in ROTATION order, add_points_to_rotation() relies on it
+    PAIR_FIELDS = ('rb_pm', 'rf_pm', 'cf_pm', 'lf_pm', 'lb_pm', 'cb_pm',
+                   'front_row_pm', 'back_row_pm', 'pm_stats')
+    COUNT_FIELDS = ('total_serves', 'total_serve_points', 'total_games_played',
+                    'total_detailed_games',
+                    'missed_serves',        # objective stat
+                    'unreturned_serves',    # objective stat
+                    'shanked_receives', 'good_receives', 'digs',
+                    'bad_pass', 'bad_sets',
+                    'doubles',              # objective stat
+                    'out_balls',            # objective stat
+                    'into_net', 'kills', 'blocks',
+                    'net_touches',          # objective stat
+                    'positional_faults', 'errors', 'recoveries')
+    # fractional counters are kept as whole multiples of 1/scale so that adding and subtracting
+    # them is exact, games played count in tenths (HALF_GAME is 0.6)
+    SCALED_FIELDS = {'total_games_played' : 10}
+
+    # per player detailed stats of the score sheets, the tail of COUNT_FIELDS
+    DETAIL_FIELDS = COUNT_FIELDS[COUNT_FIELDS.index('missed_serves'):]
+
+    VECTOR_LEN = 2 * len(PAIR_FIELDS) + len(COUNT_FIELDS)
+    _ZERO = array('d', bytes(8 * VECTOR_LEN))
+
+    # detailed stat name -> position in a detail vector, the vector is added at DETAIL_IDX
+    DETAIL_IDX   = VECTOR_LEN - len(DETAIL_FIELDS)
+    DETAIL_SLOTS = {name: slot for slot, name in enumerate(DETAIL_FIELDS)}
+    DETAILED_GAMES_IDX = 2 * len(PAIR_FIELDS) + COUNT_FIELDS.index('total_detailed_games')
+
+    FRONT_ROW_IDX = 2 * PAIR_FIELDS.index('front_row_pm')
+    BACK_ROW_IDX  = 2 * PAIR_FIELDS.index('back_row_pm')
+    PM_IDX        = 2 * PAIR_FIELDS.index('pm_stats')
+    BACK_ROW_POS  = (0, 4, 5)
+    FRONT_ROW_POS = (1, 2, 3)
+
+    __slots__ = ('jersey_num', '_vec', 'served_scores', 'serve_runs')
+
     def __init__(self, num : int) -> None:
         self.jersey_num = num
+        self._vec = array('d', self._ZERO)
 
-        self.rb_pm = [0, 0]
-        self.rf_pm = [0, 0]
-        self.cf_pm = [0, 0]
-        self.lf_pm = [0, 0]
-        self.lb_pm = [0, 0]
-        self.cb_pm = [0, 0]
-        self._rotation_pm = [self.rb_pm, self.rf_pm, self.cf_pm, self.lf_pm, self.lb_pm, self.cb_pm]
-
-        self.front_row_pm = [0, 0]
-        self.back_row_pm  = [0, 0]
-        self.pm_stats     = [0, 0]
-
-        self.total_serves  = 0
         self.served_scores : List[int]  = []
         self.serve_runs    : List[int]  = []
 
-        self.total_serve_points : int   = 0
-        self.total_games_played : float = 0
+    @classmethod
+    def _from_vector(cls, num : int, vec : array) -> "PlayerStats":
+        obj = cls.__new__(cls)
+        obj.jersey_num    = num
+        obj._vec          = vec
+        obj.served_scores = []
+        obj.serve_runs    = []
+        return obj
 
-        self.points_per_game  : float   = 0
-        self.points_per_serve : float   = 0
+    def __add__(self, other: "PlayerStats") -> "PlayerStats":
 
-        self.total_detailed_games : int    = 0
+        if self.jersey_num != other.jersey_num:
+            msg = f"players don't match: {self.jersey_num} vs. {other.jersey_num}"
+            raise Exception(ValueError, msg)
 
-        self.missed_serves     : int    = 0     # objective stat
-        self.unreturned_serves : int    = 0     # objective stat
+        return PlayerStats._from_vector(self.jersey_num, array('d', map(add, self._vec, other._vec)))
 
-        self.shanked_receives  : int    = 0
-        self.good_receives     : int    = 0
-        self.digs              : int    = 0
+    def __iadd__(self, other: "PlayerStats") -> "PlayerStats":
 
-        self.bad_pass          : int    = 0
-        self.bad_sets          : int    = 0
-        self.doubles           : int    = 0     # objective stat
+        if self.jersey_num != other.jersey_num:
+            msg = f"players don't match: {self.jersey_num} vs. {other.jersey_num}"
+            raise Exception(ValueError, msg)
 
-        self.out_balls         : int    = 0     # objective stat
-        self.into_net          : int    = 0
-        self.kills             : int    = 0
-        self.blocks            : int    = 0
-        self.net_touches       : int    = 0     # objective stat
-        self.positional_faults : int    = 0
-        self.errors            : int    = 0
-        self.recoveries        : int    = 0
+        # slice assignment keeps the vector (and any outstanding views) in place
+        self._vec[:] = array('d', map(add, self._vec, other._vec))
+        return self
 
-    def __add__(self, other: "PlayerStats") -> "PlayerStats":
+    def __isub__(self, other: "PlayerStats") -> "PlayerStats":
 
         if self.jersey_num != other.jersey_num:
             msg = f"players don't match: {self.jersey_num} vs. {other.jersey_num}"
             raise Exception(ValueError, msg)
 
-        obj = PlayerStats(self.jersey_num)
+        self._vec[:] = array('d', map(sub, self._vec, other._vec))
+        return self
 
-        for i, _ in enumerate(obj._rotation_pm):
-            obj._rotation_pm[i] = list(map(add, self._rotation_pm[i], other._rotation_pm[i]))
+    def __bool__(self) -> bool:
+        # a player without any counter set never took part in the stats
+        return any(self._vec)
 
-        obj.front_row_pm = list(map(add, self.front_row_pm, other.front_row_pm))
-        obj.back_row_pm = list(map(add, self.back_row_pm, other.back_row_pm))
-        obj.pm_stats = list(map(add, self.pm_stats, other.pm_stats))
+    def copy(self) -> "PlayerStats":
+        '''Returns a copy of the counters of this player.'''
+        return PlayerStats._from_vector(self.jersey_num, array('d', self._vec))
 
-        obj.total_serves = self.total_serves + other.total_serves
-        obj.total_serve_points  = self.total_serve_points + other.total_serve_points
-        obj.total_games_played  = self.total_games_played + other.total_games_played
+    @property
+    def _rotation_pm(self) -> List[StatPair]:
+        return [StatPair(self._vec, 2 * i) for i in range(len(self.ROTATION))]
 
-        try:
-            obj.points_per_game = obj.total_serve_points / obj.total_games_played
-            obj.points_per_serve = obj.total_serve_points / obj.total_serves
-        except ZeroDivisionError as exc:
-            if obj.total_serve_points == 0:
-                if obj.total_games_played == 0:
-                    obj.points_per_game = 0
-                if obj.total_serves == 0:
-                    obj.points_per_serve = 0
-            else:
-                raise exc
+    @property
+    def points_per_game(self) -> float:
+        '''Served points per game played'''
+        if not self.total_games_played:
+            return 0
+        return self.total_serve_points / self.total_games_played
 
-        return obj
+    @property
+    def points_per_serve(self) -> float:
+        '''Served points per serve rotation'''
+        if not self.total_serves:
+            return 0
+        return self.total_serve_points / self.total_serves
 
     def _print_pos_stats(self) -> str:
         ret = ""
@@ -129,7 +238,7 @@ class PlayerStats():
             ret += f"+{stat[0]:>2}/-{abs(stat[1]):<2} "
         return ret[:-1]
 
-    def _normalize(self, sta: List[int]) -> List[int]:
+    def _normalize(self, sta: Sequence[int]) -> List[int]:
         return [round((sta[0] / self.pm_stats[0]) * 100), round((sta[1] / self.pm_stats[1]) * 100)]
 
     def add_points_to_rotation(self, rotation : str, points : int) -> None:
@@ -138,22 +247,59 @@ class PlayerStats():
 
         If points are positive, stats are assumed to be PLUS, else stats are assume to be MINUS.
         '''
+        self.add_points_to_position(self.ROTATION.index(rotation), points)
+
+    def add_points_to_position(self, pos : int, points : int) -> None:
+        '''Same as add_points_to_rotation() but takes the rotation's index in ROTATION.'''
         side = PLUS
         if points < 0:
             side = MINUS
 
-        self._rotation_pm[self.ROTATION.index(rotation)][side] += points
-
-        if rotation in (self.ROTATION[0], self.ROTATION[4], self.ROTATION[5]):
-            self.back_row_pm[side]  += points
-
-        if rotation in (self.ROTATION[1], self.ROTATION[2], self.ROTATION[3]):
-            self.front_row_pm[side] += points
+        vec = self._vec
+        vec[2 * pos + side] += points
 
-        self.pm_stats[side] += points
-
-    def add_details(self, details: DetailStatsType) -> None:
-        pass
+        if pos in self.BACK_ROW_POS:
+            vec[self.BACK_ROW_IDX + side]  += points
+        else:
+            vec[self.FRONT_ROW_IDX + side] += points
+
+        vec[self.PM_IDX + side] += points
+
+    def add_position_points(self, plus : Sequence[int], minus : Sequence[int]) -> None:
+        '''Adds PLUS and MINUS points for every rotation at once, both indexed like ROTATION.'''
+        vec = self._vec
+        for pos, (pts_p, pts_m) in enumerate(zip(plus, minus)):
+            vec[2 * pos]     += pts_p
+            vec[2 * pos + 1] += pts_m
+
+        back_p = back_m = 0
+        for pos in self.BACK_ROW_POS:
+            back_p += plus[pos]
+            back_m += minus[pos]
+        total_p = sum(plus)
+        total_m = sum(minus)
+
+        vec[self.BACK_ROW_IDX]      += back_p
+        vec[self.BACK_ROW_IDX + 1]  += back_m
+        vec[self.FRONT_ROW_IDX]     += total_p - back_p
+        vec[self.FRONT_ROW_IDX + 1] += total_m - back_m
+        vec[self.PM_IDX]            += total_p
+        vec[self.PM_IDX + 1]        += total_m
+
+    def add_details(self, counts : Sequence[float]) -> None:
+        '''Adds a detailed game: counts holds one value per DETAIL_FIELDS entry and is added to
+        the detail counters as one slice.'''
+        vec   = self._vec
+        start = self.DETAIL_IDX
+        vec[start:] = array('d', map(add, vec[start:], counts))
+        vec[self.DETAILED_GAMES_IDX] += 1
+
+for _i, _name in enumerate(PlayerStats.PAIR_FIELDS):
+    setattr(PlayerStats, _name, _PairSlot(2 * _i))
+for _i, _name in enumerate(PlayerStats.COUNT_FIELDS):
+    setattr(PlayerStats, _name, _CountSlot(2 * len(PlayerStats.PAIR_FIELDS) + _i,
+                                           PlayerStats.SCALED_FIELDS.get(_name, 1)))
+del _i, _name
 
 
 class VolleyStats():
@@ -168,8 +314,12 @@ class VolleyStats():
     ALL_TIME    = 3
 
     def __init__(self, lineup : Optional[List[int]] = None) -> None:
+        # +/- of every back row / front row trio seen on court, keyed by the sorted jerseys
         self.back_row_stats  : Dict[Tuple[int, int, int], List[int]] = {}
         self.front_row_stats : Dict[Tuple[int, int, int], List[int]] = {}
+        # jersey -> trios of the tables above the player is part of
+        self.back_row_index  : Dict[int, List[Tuple[int, int, int]]] = {}
+        self.front_row_index : Dict[int, List[Tuple[int, int, int]]] = {}
         self.player_stats : Dict[int, PlayerStats]   = {}
 
         self.final_team_score = 0
@@ -187,33 +337,132 @@ class VolleyStats():
                 self.player_stats[num] = PlayerStats(num)
 
     def __add__(self, other: "VolleyStats") -> "VolleyStats":
+        '''Returns a new aggregate of both operands, same as accumulating them with +=.
+
+        An aggregate above the level of other (a match plus one of its games) is copied and other
+        accumulated into the copy, any other pair is accumulated into a new NULL aggregate.
+        '''
+        METRICS.count('stats_add')
+        if self.valid and self.stats_type > other.stats_type:
+            obj = self.copy()
+        else:
+            obj = VolleyStats()
+            obj += self
+        obj += other
+        return obj
+
+    def copy(self) -> "VolleyStats":
+        '''Returns a copy of these stats that shares no counters with them.'''
         obj = VolleyStats()
+        obj.back_row_stats  = {trio: list(pair) for trio, pair in self.back_row_stats.items()}
+        obj.front_row_stats = {trio: list(pair) for trio, pair in self.front_row_stats.items()}
+        obj.back_row_index  = {num: list(trios) for num, trios in self.back_row_index.items()}
+        obj.front_row_index = {num: list(trios) for num, trios in self.front_row_index.items()}
+        obj.player_stats    = {num: player.copy() for num, player in self.player_stats.items()}
+        for player, orig in zip(obj.player_stats.values(), self.player_stats.values()):
+            player.served_scores = list(orig.served_scores)
+            player.serve_runs    = list(orig.serve_runs)
+
+        obj.final_team_score = self.final_team_score
+        obj.final_oppo_score = self.final_oppo_score
+        obj.won              = self.won
+        obj.untouched_balls  = self.untouched_balls
+        obj.rotational_fault = self.rotational_fault
+        obj.stats_type       = self.stats_type
+        obj.valid            = self.valid
+        return obj
 
-        # if both VolleyStats objects are NULL, return a NULL object
-        if not self.valid and not other.valid:
-            return obj
+    def __iadd__(self, other: "VolleyStats") -> "VolleyStats":
+        '''Accumulates other into this object without rebuilding it.
 
-        # calculate type of result
-        obj.stats_type = _calculate_new_stats_type(self, other)
-        # calculate final team score
-        obj.final_team_score, obj.final_oppo_score = _calculate_new_final_score(self, other)
+        The first valid operand fixes the level of the accumulator to the level above it (games
+        accumulate into a MATCH, matches into a SEASON, ...). NULL stats and games that are not
+        included (not valid) contribute nothing. Only the counters are summed, served_scores and
+        serve_runs stay with the game stats.
+        '''
+        METRICS.count('stats_iadd')
+        if not other.valid:
+            return self
+
+        if not self.valid:
+            self.stats_type = min(other.stats_type + 1, VolleyStats.ALL_TIME)
+            self.valid = True
+
+        team_score, oppo_score = _calculate_score_contribution(other)
+        self.final_team_score += team_score
+        self.final_oppo_score += oppo_score
+        self.won = self.final_team_score > self.final_oppo_score
+
+        self.untouched_balls  += other.untouched_balls
+        self.rotational_fault += other.rotational_fault
+
+        for num, stats in other.player_stats.items():
+            player = self.player_stats.get(num)
+            if player is None:
+                self.player_stats[num] = stats.copy()
+            else:
+                player += stats
 
-        # ‼ Defining WINS equal to more WINS than LOSSES in games, matches, seasons
-        if obj.final_team_score > obj.final_oppo_score:
-            obj.won = True
+        self._merge_trios(other)
 
-        # combine the stats of players across multiple games
-        for num in set(list(self.player_stats.keys()) + list(other.player_stats.keys())):
-            obj.player_stats[num] = self.player_stats.get(num, PlayerStats(num)) \
-                                  + other.player_stats.get(num, PlayerStats(num))
+        return self
 
-        obj.valid = True
+    def __isub__(self, other: "VolleyStats") -> "VolleyStats":
+        '''Removes other from this accumulator, the reverse of __iadd__.
 
+        Used to correct an aggregate when one of its games changes. Players and trios left
+        without any stats are dropped. Like __iadd__ it leaves served_scores and serve_runs alone,
+        those are kept by game stats only and are empty in every aggregate.
+        '''
+        self._take_out(other)
+        self._drop_empty()
+        return self
+
+    def _take_out(self, other: "VolleyStats") -> None:
+        '''__isub__ keeping players without stats, so a player taken out and added back by a
+        correction keeps its place (and the order of the report tables).'''
+        METRICS.count('stats_isub')
+        if not other.valid or not self.valid:
+            return
+
+        team_score, oppo_score = _calculate_score_contribution(other)
+        self.final_team_score -= team_score
+        self.final_oppo_score -= oppo_score
+        self.won = self.final_team_score > self.final_oppo_score
+
+        self.untouched_balls  -= other.untouched_balls
+        self.rotational_fault -= other.rotational_fault
+
+        for num, stats in other.player_stats.items():
+            player = self.player_stats.get(num)
+            if player is not None:
+                player -= stats
+
+        for trio, (plus, minus) in other.back_row_stats.items():
+            _add_trio(self.back_row_stats, self.back_row_index, trio, -plus, -minus)
+        for trio, (plus, minus) in other.front_row_stats.items():
+            _add_trio(self.front_row_stats, self.front_row_index, trio, -plus, -minus)
+
+    def _drop_empty(self) -> None:
+        '''Drops players left without any stats by _take_out().'''
+        empty = [num for num, player in self.player_stats.items() if not player]
+        for num in empty:
+            del self.player_stats[num]
+
+    def _merge_trios(self, other: "VolleyStats") -> None:
+        for trio, (plus, minus) in other.back_row_stats.items():
+            _add_trio(self.back_row_stats, self.back_row_index, trio, plus, minus)
+        for trio, (plus, minus) in other.front_row_stats.items():
+            _add_trio(self.front_row_stats, self.front_row_index, trio, plus, minus)
+
+    @classmethod
+    def sum(cls, iterable: Iterable["VolleyStats"]) -> "VolleyStats":
+        '''Reduces a sequence of stats into a single newly allocated aggregate.'''
+        obj = cls()
+        for stats in iterable:
+            obj += stats
         return obj
 
-    # def __iadd__(self, other: "VolleyStats") -> "VolleyStats":
-    #     return self.__add__(other)
-
     def __str__(self) -> str:
         return _print_stats(self)
 
@@ -231,22 +480,20 @@ class VolleyStats():
         if p_m == MINUS:
             score *= -1
 
-        # TODO: process backrow/frontrow tuples
-
         # if processing positive (team) scores, every first point we gain on the return is part of
         # the old rotation, we then rotate and all points followed are from successful serves
         # the only exception is at the beginning of the game if the team starts by serving, then all
         # points gained before the return are from successful serves
         if p_m == PLUS and not beg:
+            if not scores:
+                raise ValueError('team serve run has no side-out point')
             rotation = rotation[-1:] + rotation[:-1]
-            for i, jersey_num in enumerate(rotation):
-                self.player_stats[jersey_num].add_points_to_rotation(PlayerStats.ROTATION[i], 1)
+            self.add_rotation_points(rotation, 1)
             rotation = rotation[1:] + rotation[:1]
             scores.pop(0)
             score -= 1
 
-        for i, jersey_num in enumerate(rotation):
-            self.player_stats[jersey_num].add_points_to_rotation(PlayerStats.ROTATION[i], score)
+        self.add_rotation_points(rotation, score)
 
         # assign serving stats to server position when processing positive (team) scores
         if p_m == PLUS:
@@ -254,9 +501,49 @@ class VolleyStats():
             self.player_stats[rotation[0]].serve_runs.append(score)
             self.player_stats[rotation[0]].total_serves += 1
 
-    def add_details(self, stats: DetailStatsType) -> None:
+    def add_rotation_points(self, rotation: List[int], points: int) -> None:
+        '''Adds points to every player of the rotation at their position, and to the rotation's
+        back row and front row trios. Negative points are MINUS points.'''
+        for i, jersey_num in enumerate(rotation):
+            self.player_stats[jersey_num].add_points_to_position(i, points)
+
+        self.add_trio_points(rotation, points, points)
+
+    def add_trio_points(self, rotation: List[int], plus: int, minus: int) -> None:
+        '''Adds plus (>= 0) and minus (<= 0) points to the back row and front row trios of the
+        rotation. Nothing is recorded for trios when there are no points.'''
+        if not plus and not minus:
+            return
+        plus  = max(plus, 0)
+        minus = min(minus, 0)
+
+        back  = tuple(sorted(rotation[pos] for pos in PlayerStats.BACK_ROW_POS))
+        front = tuple(sorted(rotation[pos] for pos in PlayerStats.FRONT_ROW_POS))
+        _add_trio(self.back_row_stats, self.back_row_index, back, plus, minus)
+        _add_trio(self.front_row_stats, self.front_row_index, front, plus, minus)
+
+    def best_trios(self, jersey_num: int, front: bool = False, count: int = 3
+                   ) -> List[Tuple[Tuple[int, int, int], List[int]]]:
+        '''Returns the best back row (or front row) trios a player was part of by +/- difference.
+
+            Returns:
+                trios -> list()
+                    (trio, [plus, minus]) tuples, best first
+        '''
+        table = self.front_row_stats if front else self.back_row_stats
+        index = self.front_row_index if front else self.back_row_index
+
+        trios = [(trio, list(table[trio])) for trio in index.get(jersey_num, [])]
+        trios.sort(key=lambda item: item[1][PLUS] + item[1][MINUS], reverse=True)
+        return trios[:count]
+
+    def add_details(self, stats: DetailStatsType, roster: Optional[VolleyRoster] = None) -> None:
         """
         Function adds detailed stats recorded by hand from video review to game and player stats
+
+        The sheet's per player counters are gathered into one detail vector per player (laid out
+        like PlayerStats.DETAIL_FIELDS) and each vector is added in one go. The roster can be
+        passed instead of being stored in stats.
         """
         if self.stats_type != VolleyStats.GAME:
             raise TypeError('Detailed stats can only be added to Volleyball Games')
@@ -264,17 +551,12 @@ class VolleyStats():
         self.untouched_balls    = stats['untouched_balls']
         self.rotational_fault   = stats['rotational_fault']
 
-        roster = stats['roster']
-        for stat, val in stats.items():
-            if isinstance(val, dict):
-                for player, count in val.items():
-                    num = roster.get_player_num(player)
-                    if num == -1 or num not in list(self.player_stats.keys()):
-                        raise ValueError(f'{player} player not found for on Game')
-                    setattr(self.player_stats[num], stat, count)
+        if roster is None:
+            roster = stats['roster']
+        vectors = _detail_vectors(stats, roster, self.player_stats)
 
-        for player, _ in self.player_stats.items():
-            self.player_stats[player].total_detailed_games += 1
+        for num, player in self.player_stats.items():
+            player.add_details(vectors.get(num, _NO_DETAILS))
 
     def finish_game(self, full : bool) -> None:
         '''At the end of each game calculate remaining stats for each player after all points are
@@ -287,17 +569,6 @@ class VolleyStats():
             else:
                 player.total_games_played += self.HALF_GAME
 
-            try:
-                player.points_per_game = player.total_serve_points / player.total_games_played
-                player.points_per_serve = player.total_serve_points / player.total_serves
-            except ZeroDivisionError as exc:
-                if player.total_serve_points == 0:
-                    if player.total_games_played == 0:
-                        player.points_per_game = 0
-                    if player.total_serves == 0:
-                        player.points_per_serve = 0
-                else:
-                    raise exc
         # validate these stats
         self.valid = True
 
@@ -305,50 +576,59 @@ class VolleyStats():
         """Function prints the provided Match's Statistics."""
         print(_print_stats(self))
 
-def _calculate_new_stats_type(left : VolleyStats, right : VolleyStats) -> int:
-    if (left.stats_type == left.GAME and right.stats_type == right.GAME) or \
-       (left.stats_type == left.MATCH and right.stats_type == right.GAME) or \
-       (left.stats_type == left.GAME and right.stats_type == right.MATCH):
-        return VolleyStats.MATCH
-    if (left.stats_type == left.MATCH and right.stats_type == right.MATCH):
-        return VolleyStats.SEASON
-
-    return VolleyStats.ALL_TIME
-
-def _calculate_new_final_score(left : VolleyStats, right : VolleyStats) -> Tuple[int, int]:
-    team_score = 0
-    oppo_score = 0
-
-    # TODO: BUG: if one of the games is the "NULL" stats, it will add a count to the oppo score
-    # since won is false by default
-    if (left.stats_type == left.GAME and right.stats_type == right.GAME):
-        if left.won:
-            team_score += 1
-        else:
-            oppo_score += 1
-        if right.won:
-            team_score += 1
-        else:
-            oppo_score += 1
-    if (left.stats_type == left.MATCH and right.stats_type == right.GAME):
-        team_score = left.final_team_score
-        oppo_score = left.final_oppo_score
-        if right.won:
-            team_score += 1
-        else:
-            oppo_score += 1
-    if (left.stats_type == left.GAME and right.stats_type == right.MATCH):
-        team_score = right.final_team_score
-        oppo_score = right.final_oppo_score
-        if left.won:
-            team_score += 1
-        else:
-            oppo_score += 1
-    if (left.stats_type == left.MATCH and right.stats_type == right.MATCH):
-        team_score = left.final_team_score + right.final_team_score
-        oppo_score = left.final_oppo_score + right.final_oppo_score
-
-    return (team_score, oppo_score)
+_NO_DETAILS = (0,) * len(PlayerStats.DETAIL_FIELDS)
+
+def _detail_vectors(stats : DetailStatsType, roster : VolleyRoster,
+                    players : Dict[int, PlayerStats]) -> Dict[int, List[float]]:
+    slots   = PlayerStats.DETAIL_SLOTS
+    vectors : Dict[int, List[float]] = {}
+    for stat, val in stats.items():
+        if not isinstance(val, dict):
+            continue
+        slot = slots.get(stat)
+        if slot is None:
+            raise ValueError(f'{stat} is not a detailed stat')
+
+        for player, count in val.items():
+            num = roster.get_player_num(player)
+            if num not in players:
+                raise ValueError(f'{player} player not found for on Game')
+            vec = vectors.get(num)
+            if vec is None:
+                vec = vectors[num] = list(_NO_DETAILS)
+            # a blank entry on the sheet (`'Name': }`) is loaded as None
+            vec[slot] = count or 0
+
+    return vectors
+
+def _add_trio(table : Dict[Tuple[int, int, int], List[int]],
+              index : Dict[int, List[Tuple[int, int, int]]],
+              trio : Tuple[int, int, int], plus : int, minus : int) -> None:
+    pair = table.get(trio)
+    if pair is None:
+        pair = table[trio] = [0, 0]
+        # a jersey listed twice (sheet error) must not index the trio twice
+        for jersey_num in set(trio):
+            index.setdefault(jersey_num, []).append(trio)
+    pair[PLUS]  += plus
+    pair[MINUS] += minus
+
+    if pair == [0, 0]:
+        # trio only held stats that were taken out again
+        del table[trio]
+        for jersey_num in set(trio):
+            index[jersey_num].remove(trio)
+            if not index[jersey_num]:
+                del index[jersey_num]
+
+def _calculate_score_contribution(stats : VolleyStats) -> Tuple[int, int]:
+    # a game counts as a single win or loss, higher levels carry their game win/loss totals
+    if stats.stats_type == stats.GAME:
+        if stats.won:
+            return (1, 0)
+        return (0, 1)
+
+    return (stats.final_team_score, stats.final_oppo_score)
 
 def _print_stats(self: VolleyStats) -> str:
             # game = self.games[0]
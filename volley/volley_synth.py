@@ -0,0 +1,192 @@
+'''Volleyball Synthetic Season module
+
+Generates season score sheets in the same YAML layout as the hand-entered sheets in scores/, at
+any scale, for benchmarks and load testing. Games are played out rally by rally, so score lists
+hold the same 'R'/'X' token sequences a scorekeeper would write down:
+
+    - the serving side scores a point on every rally it wins
+    - a side losing its serve closes its run with 'R', the other side scores the side-out point
+    - the side winning the last rally of the game closes its run with 'X'
+
+The same seed always gives the same sheet. Sheets are written match by match, so generating a
+season of any size runs in constant memory.
+'''
+import random
+from io import StringIO
+from typing import Any, Dict, List, TextIO, Tuple
+
+import yaml
+
+from .volley_stats import PlayerStats
+
+LEAGUE_MENS = 'mens'
+LEAGUE_COED = 'coed'
+
+# per player detail counters, same as the detailed sections of the hand-entered sheets
+DETAIL_FIELDS = PlayerStats.DETAIL_FIELDS
+
+FIRST_NAMES = ('Holly', 'Madysen', 'Reba', 'Rasheda', 'Pooja', 'Markus', 'Lee', 'Jose', 'Ian',
+               'Reid', 'Jacob', 'Paul', 'Will', 'Josh', 'Pineapple', 'Ana', 'Kai', 'Noor', 'Sam',
+               'Tess')
+TEAM_NAMES  = ('Smash Bros', 'Net Defense', 'Please Dink Responsibly', 'Prior Service',
+               'Live and Let Dive', 'To Kill a Blocking Nerd', 'Softer Serves',
+               'Exponential Spikes', 'Volleynomials', 'Sugar & Spike')
+
+class SeasonSynth():
+    '''Synthetic season score sheet generator.
+
+        Params:
+            matches     (int): number of matches in the season
+
+            players     (int): roster size, at least 6 (12 for coed leagues, half of each gender)
+
+            league      (str): LEAGUE_MENS (opponents as dicts) or LEAGUE_COED (opponents as names,
+                gender alternating lineups)
+
+            seed        (int): random seed, the same seed generates the same sheet
+
+            detailed  (float): fraction of games with a detailed stats section
+
+            side_out  (float): chance of the receiving side winning a rally
+    '''
+    def __init__(self, matches : int = 10, players : int = 12, league : str = LEAGUE_MENS,
+                 seed : int = 0, detailed : float = 0.25, side_out : float = 0.55) -> None:
+        if league not in (LEAGUE_MENS, LEAGUE_COED):
+            raise ValueError(f'unknown league: {league}')
+        if players < (12 if league == LEAGUE_COED else 6):
+            raise ValueError(f'not enough players for a {league} lineup: {players}')
+
+        self.matches  = matches
+        self.players  = players
+        self.league   = league
+        self.seed     = seed
+        self.detailed = detailed
+        self.side_out = side_out
+
+    def write(self, stream : TextIO) -> None:
+        '''Writes the season sheet to a text stream.'''
+        rand   = random.Random(self.seed)
+        roster = self._roster(rand)
+
+        header = {'season': 'synthetic', 'year': 2000 + self.seed % 100,
+                  'league': self.league.upper(), 'roster': roster}
+        stream.write(yaml.safe_dump(header, sort_keys=False))
+
+        players = [player for group in roster.values() for player in group]
+        teams   = []
+        for idx in range(max(8, self.matches // 10)):
+            name = TEAM_NAMES[idx % len(TEAM_NAMES)]
+            if idx >= len(TEAM_NAMES):
+                name += f' {idx // len(TEAM_NAMES) + 1}'
+            teams.append({'name': name, 'rank': idx + 1})
+
+        stream.write('matches:\n')
+        for _ in range(self.matches):
+            match = self._match(rand, roster, players, teams)
+            stream.write(yaml.safe_dump([match], sort_keys=False, default_flow_style=None,
+                                        width=1 << 16))
+
+    def season(self) -> Dict[str, Any]:
+        '''Returns the season sheet as parsed YAML, same as yaml.safe_load() of write().'''
+        stream = StringIO()
+        self.write(stream)
+        return yaml.safe_load(stream.getvalue())
+
+    def _roster(self, rand : random.Random) -> Dict[str, List[Dict[str, Any]]]:
+        jerseys = rand.sample(range(max(100, self.players * 2)), self.players)
+
+        players = []
+        for idx, jersey in enumerate(jerseys):
+            name = FIRST_NAMES[idx % len(FIRST_NAMES)]
+            if idx >= len(FIRST_NAMES):
+                name += str(idx // len(FIRST_NAMES) + 1)
+            status = 'full' if rand.random() < 0.75 else 'sub'
+            players.append({'name': name, 'status': status, 'jersey': jersey})
+
+        if self.league == LEAGUE_COED:
+            half = self.players // 2
+            return {'females': players[:half], 'males': players[half:]}
+        return {'players': players}
+
+    def _lineup(self, rand : random.Random, roster : Dict[str, List[Dict[str, Any]]]
+                ) -> List[int]:
+        if self.league == LEAGUE_COED:
+            females = rand.sample(roster['females'], 3)
+            males   = rand.sample(roster['males'], 3)
+            return [player['jersey'] for pair in zip(females, males) for player in pair]
+        return [player['jersey'] for player in rand.sample(roster['players'], 6)]
+
+    def _match(self, rand : random.Random, roster : Dict[str, List[Dict[str, Any]]],
+               players : List[Dict[str, Any]], teams : List[Dict[str, Any]]) -> List[Any]:
+        team = rand.choice(teams)
+        opponent : Any = dict(team) if self.league == LEAGUE_MENS else team['name']
+
+        # stronger opponents win more of their rallies
+        edge  = (len(teams) / 2 - team['rank']) / (len(teams) * 10)
+        match : List[Any] = [{'opponent': opponent}]
+        serve = rand.random() < 0.5
+        for game in (1, 2, 3):
+            full   = game < 3
+            lineup = self._lineup(rand, roster)
+            # the first serve alternates between the games of a match, like the real sheets
+            if game > 1:
+                serve = not serve
+            team_scores, oppo_scores = self._rallies(rand, serve, 25 if full else 15, edge)
+
+            sheet = {'game': game, 'full': full, 'serve': serve, 'include': True,
+                     'lineup': lineup, 'team_scores': team_scores,
+                     'opponent_scores': oppo_scores,
+                     'final_score': [_final(team_scores), _final(oppo_scores)],
+                     'detailed': None}
+            if rand.random() < self.detailed:
+                sheet['detailed'] = self._details(rand, lineup, players)
+            match.append(sheet)
+
+        return match
+
+    def _rallies(self, rand : random.Random, serve : bool, target : int, edge : float
+                 ) -> Tuple[List[Any], List[Any]]:
+        team_scores : List[Any] = []
+        oppo_scores : List[Any] = []
+        team = oppo = 0
+        team_serving = serve
+
+        while True:
+            side_out = self.side_out + (edge if team_serving else -edge)
+            team_won = (rand.random() >= side_out) == team_serving
+
+            if team_won:
+                if not team_serving:
+                    oppo_scores.append('R')
+                    team_serving = True
+                team += 1
+                team_scores.append(team)
+            else:
+                if team_serving:
+                    team_scores.append('R')
+                    team_serving = False
+                oppo += 1
+                oppo_scores.append(oppo)
+
+            if max(team, oppo) >= target and abs(team - oppo) >= 2:
+                (team_scores if team_won else oppo_scores).append('X')
+                return team_scores, oppo_scores
+
+    def _details(self, rand : random.Random, lineup : List[int], players : List[Dict[str, Any]]
+                 ) -> Dict[str, Any]:
+        names = {player['jersey']: player['name'] for player in players}
+        details : Dict[str, Any] = {'untouched_balls': rand.randint(0, 8), 'four_hits': 0,
+                                    'rotational_fault': int(rand.random() < 0.1)}
+        for field in DETAIL_FIELDS:
+            details[field] = {names[num]: rand.randint(1, 4) for num in lineup
+                              if rand.random() < 0.3}
+        return details
+
+def _final(scores : List[Any]) -> int:
+    return max((score for score in scores if isinstance(score, int)), default=0)
+
+def write_season(path : str, matches : int = 10, players : int = 12, league : str = LEAGUE_MENS,
+                 seed : int = 0, detailed : float = 0.25) -> None:
+    '''Writes a synthetic season score sheet to a file, see SeasonSynth for the parameters.'''
+    with open(path, 'w', encoding='utf-8') as file:
+        SeasonSynth(matches, players, league, seed, detailed).write(file)
@@ -0,0 +1,246 @@
+'''Volleyball Table module
+
+Fixed-layout text tables for the reports. A TableLayout is compiled once per table (headers
+wrapped, alignments and border pieces looked up) and renders rows with plain string operations,
+same output as tabulate.tabulate() with MIN_PADDING = 0 for the 'fancy_grid' and 'presto' styles.
+
+Layouts hold no state while rendering, so one layout can be used from several threads. Cells the
+fast path does not handle exactly like tabulate (non ASCII text, text that parses as a number,
+missing values) send the whole table through tabulate instead.
+'''
+import textwrap
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import tabulate
+
+RENDER_FAST     = 'fast'
+RENDER_TABULATE = 'tabulate'
+RENDERERS       = (RENDER_FAST, RENDER_TABULATE)
+
+# (begin, fill, sep, end) of the lines above/below the header, between rows and below the table,
+# (begin, sep, end) of the header and data rows, None when the style has no such line
+STYLES : Dict[str, Dict[str, Optional[Tuple[str, ...]]]] = {
+    'fancy_grid' : {'above'   : ('╒', '═', '╤', '╕'),
+                    'header'  : ('╞', '═', '╪', '╡'),
+                    'between' : ('├', '─', '┼', '┤'),
+                    'below'   : ('╘', '═', '╧', '╛'),
+                    'row'     : ('│', '│', '│')},
+    'presto'     : {'above'   : None,
+                    'header'  : ('', '-', '+', ''),
+                    'between' : None,
+                    'below'   : None,
+                    'row'     : ('', '|', '')},
+}
+
+PADDING = 1
+
+# tabulate reads its padding from a module global, calls going through it are serialized
+_TABULATE_LOCK = threading.Lock()
+
+class TableLayout():
+    '''Compiled column layout of a report table.
+
+        Params:
+            headers         (list): column headers, may hold '\\n'
+
+            style            (str): 'fancy_grid' or 'presto'
+
+            widths          (list): optional, max width of each column's cells (wrapped)
+
+            header_widths   (list): optional, max width of each column's header (wrapped)
+
+            align           (list): 'left', 'right' or 'center' per column
+
+            floatfmt         (str): format of float columns
+    '''
+    def __init__(self, headers : Sequence[str], style : str,
+                 widths : Optional[Sequence[int]] = None,
+                 header_widths : Optional[Sequence[int]] = None,
+                 align : Optional[Sequence[str]] = None, floatfmt : str = 'g') -> None:
+        if style not in STYLES:
+            raise ValueError(f'unknown table style: {style}')
+
+        self.headers       = list(headers)
+        self.style         = style
+        self.widths        = list(widths) if widths is not None else None
+        self.header_widths = list(header_widths) if header_widths is not None else None
+        self.align         = list(align) if align is not None else ['left'] * len(self.headers)
+        self.floatfmt      = floatfmt
+
+        cols = len(self.headers)
+        self._fmt         = STYLES[style]
+        self._wrap_widths = _expand(self.widths, cols)
+        self._wrappers    = [_wrapper(width) if width is not None else None
+                             for width in self._wrap_widths]
+
+        # headers never change, wrap them once
+        header_wrap  = _expand(self.header_widths, cols)
+        self._header = [_wrap(str(header), _wrapper(width)) if width is not None else str(header)
+                        for header, width in zip(self.headers, header_wrap)]
+        self._header_lines = [header.splitlines() or [''] for header in self._header]
+        self._header_width = [max(len(line) for line in lines) for lines in self._header_lines]
+        self._plain_header = all(_is_plain(header) for header in self._header)
+
+    def render(self, rows : Sequence[Sequence[Any]], renderer : str = RENDER_FAST) -> List[str]:
+        '''Renders the rows into table lines.'''
+        if renderer == RENDER_FAST and self._plain_header:
+            lines = self._render_fast(rows)
+            if lines is not None:
+                return lines
+        return self.render_tabulate(rows)
+
+    def render_tabulate(self, rows : Sequence[Sequence[Any]]) -> List[str]:
+        '''Renders the rows with tabulate, the reference output of the fast renderer.'''
+        with _TABULATE_LOCK:
+            min_padding = tabulate.MIN_PADDING
+            tabulate.MIN_PADDING = 0
+            try:
+                table = tabulate.tabulate(rows, headers=self.headers, tablefmt=self.style,
+                                          maxcolwidths=self.widths,
+                                          maxheadercolwidths=self.header_widths,
+                                          colalign=self.align, floatfmt=self.floatfmt)
+            finally:
+                tabulate.MIN_PADDING = min_padding
+
+        return table.split('\n')
+
+    def _render_fast(self, rows : Sequence[Sequence[Any]]) -> Optional[List[str]]:
+        cols = len(self.headers)
+        if any(len(row) != cols for row in rows):
+            return None
+
+        # column types, int < float < str like tabulate, None if tabulate has to decide
+        types = []
+        for col in range(cols):
+            col_type : type = int
+            for row in rows:
+                value_type = _cell_type(row[col])
+                if value_type is None:
+                    return None
+                if value_type is str or (value_type is float and col_type is int):
+                    col_type = value_type
+            types.append(col_type)
+
+        # format, wrap and strip every cell
+        cells : List[List[List[str]]] = []
+        for row in rows:
+            cell_row = []
+            for col, value in enumerate(row):
+                if types[col] is float:
+                    text = format(float(value), self.floatfmt)
+                elif types[col] is int:
+                    text = str(value)
+                else:
+                    text = f'{value}'
+                    if not _is_plain(text):
+                        return None
+                    if self._wrappers[col] is not None and not isinstance(value, (int, float)):
+                        text = _wrap(text, self._wrappers[col])
+                cell_row.append(text.strip().splitlines())
+            cells.append(cell_row)
+
+        widths = [max([width] + [len(line) for row in cells for line in row[col]])
+                  for col, width in enumerate(self._header_width)]
+
+        # an empty table aligns its headers left
+        aligns = self.align if rows else ['left'] * cols
+
+        fmt   = self._fmt
+        lines = []
+        if fmt['above']:
+            lines.append(_line(fmt['above'], widths))
+
+        lines += _row_lines(fmt['row'], self._header_lines, widths, aligns)
+
+        if fmt['header']:
+            lines.append(_line(fmt['header'], widths))
+
+        for idx, row in enumerate(cells):
+            if idx and fmt['between']:
+                lines.append(_line(fmt['between'], widths))
+            lines += _row_lines(fmt['row'], row, widths, aligns)
+
+        if fmt['below']:
+            lines.append(_line(fmt['below'], widths))
+
+        return lines
+
+def _expand(widths : Optional[List[int]], cols : int) -> List[Optional[int]]:
+    if widths is None:
+        return [None] * cols
+    return (widths + [None] * cols)[:cols]
+
+class _TableWrapper(textwrap.TextWrapper):
+    '''TextWrapper cutting long words at the width like tabulate, without looking for a hyphen
+    to break at first.
+    '''
+    def _handle_long_word(self, reversed_chunks : List[str], cur_line : List[str], cur_len : int,
+                          width : int) -> None:
+        space_left = 1 if width < 1 else width - cur_len
+
+        if self.break_long_words and space_left > 0:
+            chunk = reversed_chunks[-1]
+            cur_line.append(chunk[:space_left])
+            reversed_chunks[-1] = chunk[space_left:]
+        elif not cur_line:
+            cur_line.append(reversed_chunks.pop())
+
+def _wrapper(width : int) -> textwrap.TextWrapper:
+    return _TableWrapper(width=width, break_long_words=True, break_on_hyphens=True)
+
+def _wrap(text : str, wrapper : textwrap.TextWrapper) -> str:
+    # short single words are the common case and come out of the wrapper unchanged
+    if len(text) <= wrapper.width and text and text.strip() == text and '\n' not in text:
+        return text
+    return '\n'.join('\n'.join(wrapper.wrap(line)) for line in text.splitlines()
+                     if line.strip() != '')
+
+def _is_plain(text : str) -> bool:
+    # printable ASCII and newlines, widths are then plain len()
+    return text.isascii() and text.replace('\n', '').isprintable()
+
+def _cell_type(value : Any) -> Optional[type]:
+    value_type = type(value)
+    if value_type is int or value_type is float:
+        return value_type
+    if value is None or value_type is bool or isinstance(value, (bytes, str)) and not value:
+        return None
+    if hasattr(value, 'isoformat'):
+        return str
+
+    # anything tabulate could read as a number or a bool
+    try:
+        float(value.replace(',', '') if isinstance(value, str) else value)
+    except (ValueError, TypeError):
+        pass
+    else:
+        return None
+    if value in ('True', 'False'):
+        return None
+
+    return str
+
+def _pad(text : str, width : int, align : str) -> str:
+    if align == 'right':
+        return text.rjust(width)
+    if align == 'center':
+        return f'{text:^{width}}'
+    return text.ljust(width)
+
+def _line(fmt : Tuple[str, ...], widths : List[int]) -> str:
+    begin, fill, sep, end = fmt
+    return (begin + sep.join(fill * (width + 2 * PADDING) for width in widths) + end).rstrip()
+
+def _row_lines(fmt : Tuple[str, ...], cells : List[List[str]], widths : List[int],
+               aligns : List[str]) -> List[str]:
+    begin, sep, end = fmt
+    pad    = ' ' * PADDING
+    height = max(len(lines) for lines in cells)
+
+    lines = []
+    for idx in range(height):
+        line = [pad + (_pad(lines[idx], width, align) if idx < len(lines) else ' ' * width) + pad
+                for lines, width, align in zip(cells, widths, aligns)]
+        lines.append((begin + sep.join(line) + end).rstrip())
+    return lines
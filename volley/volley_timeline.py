@@ -0,0 +1,231 @@
+'''Volleyball Rally Timeline module
+
+Decodes a game's two score lists into one timeline of its rallies in play order, in a single
+pass that walks both lists at once: serve runs of the team and the opponent alternate, starting
+with whoever served first, and each run is read off its own list as it comes up. Only closed runs
+(ended by 'R'/'X') are decoded, same as the rotation engines.
+
+The timeline is stored as one typed array per column:
+
+    side        PLUS (0) if the team won the rally, MINUS (1) if the opponent did
+    server      jersey of the team's server, -1 when the opponent served
+    team_score  team score after the rally
+    oppo_score  opponent score after the rally
+    offset      rotation of the team the rally is credited to, the lineup shifted by offset
+
+Court positions are the ones the rotation engines credit the rally to: a side-out point won by
+the team goes to the rotation before the team rotates to serve. Who played which position, the
+score and the server at any rally are read straight from the columns, in O(1).
+'''
+from array import array
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+from .volley_stats import PlayerStats, PLUS, MINUS
+
+COURT_POS = len(PlayerStats.ROTATION)
+
+END_TOKENS = ('R', 'r', 'X', 'x')
+
+# (side, server, team_score, oppo_score, court)
+Rally = Tuple[int, int, int, int, Tuple[int, ...]]
+
+class RallyTimeline():
+    '''Rallies of one game in play order, see module documentation.
+
+        Attributes:
+            lineup          (list): starting lineup, indexed like PlayerStats.ROTATION
+
+            serve_start     (bool): whether the team served first
+
+            side           (array): column, one entry per rally
+
+            server         (array): column
+
+            team_score     (array): column
+
+            oppo_score     (array): column
+
+            offset         (array): column
+
+            team_runs      (array): points of every closed team serve run, in run order
+
+            oppo_runs      (array): points of every closed opponent serve run, in run order
+
+            final_score    (tuple): highest team and opponent points on the score lists, points
+                of unclosed runs included
+
+            team_tokens     (list): team score list the timeline was decoded from
+
+            team_index     (array): position in team_tokens of every point of the team's closed
+                runs, in rally order, for the points as written on the sheet
+    '''
+    __slots__ = ('lineup', 'serve_start', 'side', 'server', 'team_score', 'oppo_score', 'offset',
+                 'team_runs', 'oppo_runs', 'final_score', 'team_tokens', 'team_index', '_courts')
+
+    def __init__(self, lineup : List[int], serve_start : bool) -> None:
+        self.lineup      = list(lineup)
+        self.serve_start = serve_start
+
+        self.side       = array('b')
+        self.server     = array('h')
+        self.team_score = array('H')
+        self.oppo_score = array('H')
+        self.offset     = array('b')
+
+        self.team_runs  = array('i')
+        self.oppo_runs  = array('i')
+        self.final_score = (0, 0)
+        self.team_tokens : Sequence[Union[str, int]] = ()
+        self.team_index  = array('i')
+
+        # the six rotations of the lineup, a rally's court is courts[offset]
+        self._courts = [tuple(self.lineup[off:] + self.lineup[:off])
+                        for off in range(COURT_POS)] if len(self.lineup) == COURT_POS else []
+
+    @classmethod
+    def decode(cls, lineup : List[int], serve_start : bool,
+               team_scores : Sequence[Union[str, int]],
+               oppo_scores : Sequence[Union[str, int]]) -> "RallyTimeline":
+        '''Decodes the score lists of a game into its timeline.'''
+        timeline = cls(lineup, serve_start)
+
+        # receiving teams start one rotation back
+        start = 0 if serve_start else -1
+
+        timeline.team_tokens = team_scores
+        team = _RunReader(team_scores, timeline.team_index)
+        oppo = _RunReader(oppo_scores)
+        team_turn = serve_start
+
+        side   = timeline.side
+        server = timeline.server
+        t_col  = timeline.team_score
+        o_col  = timeline.oppo_score
+        offset = timeline.offset
+
+        team_pts = oppo_pts = 0
+        last_server = -1
+        while True:
+            # the other side takes over once one side has no closed run left
+            if team_turn and team.done:
+                team_turn = False
+            if not team_turn and oppo.done:
+                if team.done:
+                    break
+                team_turn = True
+
+            points = (team if team_turn else oppo).next_run()
+            if points is None:
+                continue
+
+            if team_turn:
+                run = len(timeline.team_runs)
+                timeline.team_runs.append(points)
+
+                court = (start + run) % COURT_POS
+                serving = timeline.lineup[court] if timeline._courts else -1
+                for point in range(points):
+                    team_pts += 1
+                    side.append(PLUS)
+                    t_col.append(team_pts)
+                    o_col.append(oppo_pts)
+                    if point == 0 and not (run == 0 and serve_start):
+                        # side-out, opponent served and the point goes to the previous rotation
+                        server.append(-1)
+                        offset.append((court - 1) % COURT_POS)
+                    else:
+                        server.append(serving)
+                        offset.append(court)
+                last_server = serving
+            else:
+                run = len(timeline.oppo_runs)
+                timeline.oppo_runs.append(points)
+
+                court = (start + run) % COURT_POS
+                for point in range(points):
+                    oppo_pts += 1
+                    side.append(MINUS)
+                    # first point of an opponent run is lost on the team's serve
+                    server.append(last_server if point == 0 else -1)
+                    t_col.append(team_pts)
+                    o_col.append(oppo_pts)
+                    offset.append(court)
+                last_server = -1
+
+            team_turn = not team_turn
+
+        timeline.final_score = (team.high, oppo.high)
+        return timeline
+
+    def __len__(self) -> int:
+        return len(self.side)
+
+    def __iter__(self) -> Iterator[Rally]:
+        for rally in range(len(self.side)):
+            yield self.rally(rally)
+
+    def rally(self, rally : int) -> Rally:
+        '''Returns (side, server, team_score, oppo_score, court) of a rally.'''
+        return (self.side[rally], self.server[rally], self.team_score[rally],
+                self.oppo_score[rally], self.court(rally))
+
+    def court(self, rally : int) -> Tuple[int, ...]:
+        '''Jerseys on court at a rally, indexed like PlayerStats.ROTATION'''
+        return self._courts[self.offset[rally]]
+
+    def player_at(self, rally : int, pos : Union[int, str]) -> int:
+        '''Jersey playing a position (index or name from PlayerStats.ROTATION) at a rally'''
+        if isinstance(pos, str):
+            pos = PlayerStats.ROTATION.index(pos)
+        return self.lineup[(self.offset[rally] + pos) % COURT_POS]
+
+    def position_of(self, rally : int, jersey_num : int) -> Optional[int]:
+        '''Position index of a jersey at a rally, None if the player was not on court'''
+        if jersey_num not in self.lineup:
+            return None
+        return (self.lineup.index(jersey_num) - self.offset[rally]) % COURT_POS
+
+    def score(self, rally : int) -> Tuple[int, int]:
+        '''Team and opponent score after a rally'''
+        return self.team_score[rally], self.oppo_score[rally]
+
+    def progression(self) -> Tuple[array, array]:
+        '''Team and opponent score after every rally, for score progression charts'''
+        return self.team_score, self.oppo_score
+
+class _RunReader():
+    '''Cursor over one score list handing out its closed serve runs, every token is read once'''
+    __slots__ = ('tokens', 'pos', 'done', 'high', 'index')
+
+    def __init__(self, tokens : Sequence[Union[str, int]], index : Optional[array] = None
+                 ) -> None:
+        self.tokens = tokens
+        self.pos    = 0
+        self.done   = False
+        self.high   = 0
+        # optional, gets the position of every point of a closed run
+        self.index  = index
+
+    def next_run(self) -> Optional[int]:
+        '''Moves past the next closed run and returns its number of points, None (and done) when
+        the list holds no further closed run. Points after the last 'R'/'X' are not part of any
+        run but count for the high score.'''
+        tokens = self.tokens
+        index  = self.index
+        points = 0
+        while self.pos < len(tokens):
+            token = tokens[self.pos]
+            self.pos += 1
+            if token in END_TOKENS:
+                return points
+            if str(token).isdigit():
+                self.high = max(self.high, int(token))
+            if index is not None:
+                index.append(self.pos - 1)
+            points += 1
+
+        if index is not None and points:
+            # points after the last 'R'/'X' are not part of a run
+            del index[-points:]
+        self.done = True
+        return None
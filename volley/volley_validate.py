@@ -0,0 +1,332 @@
+'''Volleyball Score Sheet Validation module
+
+Checks every game of a season in one pass over its score lists, before any stats are computed,
+and reports all problems at once with their location (sheet, match, game).
+
+Errors are problems the stats can't be computed from (the rotation engines would fail or credit
+points to the wrong rotation). Games with errors are left out of the stats (include = False)
+when validate_season() is asked to exclude them. Warnings are reported only.
+
+Errors:
+    bad_token       score list entry that is neither a point nor 'R'/'X'
+    score_order     points not counting up by one (swapped or missing points)
+    empty_run       serve run without its side-out point (e.g. 'R' after 'R')
+    lineup          lineup without 6 different jerseys of the roster
+    details         detailed stats missing team counters, with unknown counters or naming players
+                    not in the lineup
+
+Warnings:
+    serve_runs      team and opponent serve runs ('R' counts) don't alternate
+    after_end       tokens after an 'X'
+    game_length     winner short of the game's target (25 full, 15 half) or past it
+    win_by_2        game won by less than 2 points
+    final_score     recorded final score differs from the score lists
+    serve_order     first serve not alternating between the games of a match
+    coed_lineup     coed lineup not alternating between genders
+'''
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from .volley_match import VolleyGame, VolleyMatch, VolleySeason
+from .volley_player import VolleyRoster
+from .volley_stats import PlayerStats
+
+ERROR   = 'error'
+WARNING = 'warning'
+
+FULL_GAME = 25
+HALF_GAME = 15
+
+END_TOKENS  = ('R', 'r', 'X', 'x')
+LAST_TOKENS = ('X', 'x')
+
+COURT_POS = 6
+
+TEAM_COUNTERS = ('untouched_balls', 'rotational_fault')
+
+# (league, match number, position in the match) of a validated game, game numbers come from the
+# sheet and two games of a match can share one
+GameKey = Tuple[str, Optional[int], int]
+
+class ValidationIssue():
+    '''One problem found on a score sheet.
+
+        Attributes:
+            severity    (str): ERROR or WARNING
+            code        (str): kind of problem, see module documentation
+            message     (str): description
+            source      (str): sheet the game comes from
+            match       (int): match number, None for season wide problems
+            game        (int): game number, None for match wide problems
+    '''
+    def __init__(self, severity : str, code : str, message : str, source : str = '',
+                 match : Optional[int] = None, game : Optional[int] = None) -> None:
+        self.severity = severity
+        self.code     = code
+        self.message  = message
+        self.source   = source
+        self.match    = match
+        self.game     = game
+
+    def __str__(self) -> str:
+        return f'{self.location}: {self.severity}: [{self.code}] {self.message}'
+
+    def __repr__(self) -> str:
+        return f'ValidationIssue({self})'
+
+    @property
+    def location(self) -> str:
+        '''Sheet, match and game of the issue'''
+        parts = [self.source or '<season>']
+        if self.match is not None:
+            parts.append(f'match {self.match}')
+        if self.game is not None:
+            parts.append(f'game {self.game}')
+        return ' '.join(parts)
+
+class ValidationReport():
+    '''All issues found on one or more seasons.'''
+
+    def __init__(self) -> None:
+        self.issues : List[ValidationIssue] = []
+        # games with errors by (league, match number, position in the match), which survives the
+        # snapshot pickle round trip where object identities do not
+        self.invalid_games : Set[GameKey] = set()
+        self.games = 0
+
+    def __str__(self) -> str:
+        return '\n'.join(str(issue) for issue in self.issues)
+
+    def __bool__(self) -> bool:
+        '''True when no errors were found'''
+        return not self.invalid_games
+
+    @property
+    def errors(self) -> List[ValidationIssue]:
+        '''Issues keeping a game out of the stats'''
+        return [issue for issue in self.issues if issue.severity == ERROR]
+
+    @property
+    def warnings(self) -> List[ValidationIssue]:
+        '''Issues reported only'''
+        return [issue for issue in self.issues if issue.severity == WARNING]
+
+    def is_valid(self, game : VolleyGame, match_num : Optional[int] = None) -> bool:
+        '''Whether the game had no errors, match_num is only needed for a game without a match
+        and has to be the one it was validated with. A game is found by its position in its
+        match, so games must not be reordered between validating and asking.'''
+        return _game_key(game, match_num) not in self.invalid_games
+
+    def extend(self, other : "ValidationReport") -> None:
+        '''Adds the issues of another report.'''
+        self.issues += other.issues
+        self.invalid_games |= other.invalid_games
+        self.games += other.games
+
+def validate_season(season : VolleySeason, source : str = '', exclude : bool = True
+                    ) -> ValidationReport:
+    '''Validates every included game of a season.
+
+        Params:
+            season  (VolleySeason): season to validate
+
+            source           (str): name of the sheet, used in the issue locations
+
+            exclude         (bool): set include = False on games with errors, so they are left out
+                of the stats and never reach the rotation engines
+    '''
+    report = ValidationReport()
+    coed   = _is_coed(season.roster)
+
+    for match in season.matches:
+        validate_match(match, report, source, coed)
+
+    if exclude:
+        for match in season.matches:
+            for game in match.games:
+                if not report.is_valid(game):
+                    game.include = False
+
+    return report
+
+def validate_seasons(seasons : Sequence[VolleySeason], sources : Optional[Sequence[str]] = None,
+                     exclude : bool = True) -> ValidationReport:
+    '''Validates several seasons into one report, see validate_season().'''
+    report = ValidationReport()
+    for idx, season in enumerate(seasons):
+        source = sources[idx] if sources is not None else season.league
+        report.extend(validate_season(season, source, exclude))
+    return report
+
+def validate_match(match : VolleyMatch, report : ValidationReport, source : str = '',
+                   coed : bool = False) -> None:
+    '''Validates the included games of a match into the report.'''
+    last_serve : Optional[bool] = None
+    for game in match.games:
+        if not game.include:
+            last_serve = None
+            continue
+
+        validate_game(game, report, source, match.match_num, coed)
+
+        if last_serve is not None and game.serve_start == last_serve:
+            _add(report, WARNING, 'serve_order',
+                 f'{"serves" if game.serve_start else "receives"} first again after game '
+                 f'{game.game - 1}', source, match.match_num, game.game)
+        last_serve = game.serve_start
+
+def validate_game(game : VolleyGame, report : ValidationReport, source : str = '',
+                  match_num : Optional[int] = None, coed : bool = False) -> bool:
+    '''Validates one game into the report, tells whether the game is free of errors.'''
+    issues : List[Tuple[str, str, str]] = []
+    report.games += 1
+
+    _check_lineup(game, coed, issues)
+
+    team_runs, team_final, team_end = _scan_scores(game.team_scores, 'team', issues)
+    oppo_runs, oppo_final, oppo_end = _scan_scores(game.oppo_scores, 'opponent', issues)
+
+    # every run but the opening serve of the game starts with its side-out point
+    _check_runs(team_runs, game.serve_start, 'team', issues)
+    _check_runs(oppo_runs, not game.serve_start, 'opponent', issues)
+
+    # serve runs alternate, the side serving first has as many runs or one more
+    team_r = len(team_runs) - team_end
+    oppo_r = len(oppo_runs) - oppo_end
+    first, second = (team_r, oppo_r) if game.serve_start else (oppo_r, team_r)
+    if not 0 <= first - second <= 1:
+        issues.append((WARNING, 'serve_runs',
+                       f'team lost the serve {team_r} times, opponent {oppo_r} times'))
+
+    _check_length(game, team_final, oppo_final, issues)
+
+    if game.detailed:
+        _check_details(game, issues)
+
+    valid = True
+    for severity, code, message in issues:
+        _add(report, severity, code, message, source, match_num, game.game)
+        if severity == ERROR:
+            valid = False
+    if not valid:
+        report.invalid_games.add(_game_key(game, match_num))
+
+    return valid
+
+def _game_key(game : VolleyGame, match_num : Optional[int]) -> GameKey:
+    match = game.match
+    if match is None:
+        # a game on its own has no position, its number tells it from the other games validated
+        # with the same match_num
+        return ('', match_num, game.game)
+    season = match.season
+    pos    = next(idx for idx, other in enumerate(match.games) if other is game)
+    return (season.league if season is not None else '', match.match_num, pos)
+
+def _add(report : ValidationReport, severity : str, code : str, message : str, source : str,
+         match_num : Optional[int], game_num : Optional[int]) -> None:
+    report.issues.append(ValidationIssue(severity, code, message, source, match_num, game_num))
+
+def _is_coed(roster : VolleyRoster) -> bool:
+    genders = {player.gender for player in roster.players}
+    return 'f' in genders and 'm' in genders
+
+def _check_lineup(game : VolleyGame, coed : bool, issues : List[Tuple[str, str, str]]) -> None:
+    lineup = game.lineup
+    if not isinstance(lineup, list) or len(lineup) != COURT_POS or len(set(lineup)) != COURT_POS:
+        issues.append((ERROR, 'lineup', f'lineup needs {COURT_POS} different jerseys: {lineup}'))
+        return
+
+    players = [game.roster.get_player(num) for num in lineup]
+    missing = [num for num, player in zip(lineup, players) if player is None]
+    if missing:
+        issues.append((ERROR, 'lineup', f'jerseys not on the roster: {missing}'))
+        return
+
+    if coed:
+        genders = [player.gender for player in players]  # type: ignore[union-attr]
+        if any(genders[idx] == genders[idx - 1] for idx in range(COURT_POS)):
+            issues.append((WARNING, 'coed_lineup',
+                           f'lineup does not alternate genders: {"".join(genders)}'))
+
+def _scan_scores(scores : List[Union[str, int]], side : str, issues : List[Tuple[str, str, str]]
+                 ) -> Tuple[List[int], int, int]:
+    '''Single pass over a score list.
+
+        Returns:
+            (runs, final, ended) -> (list, int, int)
+                points of every closed run, last point and 1 if the list was closed by 'X'
+    '''
+    runs  : List[int] = []
+    run   = 0
+    final = 0
+    ended = 0
+    for idx, token in enumerate(scores):
+        if ended:
+            issues.append((WARNING, 'after_end', f'{side} scores go on after X at entry {idx}'))
+            break
+
+        if token in END_TOKENS:
+            runs.append(run)
+            run = 0
+            if token in LAST_TOKENS:
+                ended = 1
+            continue
+
+        if isinstance(token, bool) or not (isinstance(token, int) or str(token).isdigit()):
+            issues.append((ERROR, 'bad_token', f'{side} scores entry {idx} is {token!r}'))
+            continue
+
+        point = int(token)
+        if point != final + 1:
+            issues.append((ERROR, 'score_order',
+                           f'{side} scores entry {idx} is {point}, expected {final + 1}'))
+        final = point
+        run += 1
+
+    return runs, final, ended
+
+def _check_runs(runs : List[int], serves_first : bool, side : str,
+                issues : List[Tuple[str, str, str]]) -> None:
+    for idx, points in enumerate(runs):
+        if not points and not (idx == 0 and serves_first):
+            issues.append((ERROR, 'empty_run', f'{side} serve run {idx + 1} has no side-out point'))
+            return
+
+def _check_length(game : VolleyGame, team : int, oppo : int,
+                  issues : List[Tuple[str, str, str]]) -> None:
+    target = FULL_GAME if game.full else HALF_GAME
+    high, low = max(team, oppo), min(team, oppo)
+
+    if high < target:
+        issues.append((WARNING, 'game_length',
+                       f'{team}-{oppo} ends short of {target} for a '
+                       f'{"full" if game.full else "half"} game'))
+    elif high > target and high - low != 2:
+        issues.append((WARNING, 'game_length', f'{team}-{oppo} goes on past {target}'))
+
+    if high - low < 2:
+        issues.append((WARNING, 'win_by_2', f'{team}-{oppo} is not won by 2'))
+
+    recorded = game.final_score
+    if recorded is not None and (not isinstance(recorded, (list, tuple))
+                                 or list(recorded) != [team, oppo]):
+        issues.append((WARNING, 'final_score',
+                       f'final score recorded as {recorded}, score lists give [{team}, {oppo}]'))
+
+def _check_details(game : VolleyGame, issues : List[Tuple[str, str, str]]) -> None:
+    details : Dict[str, Any] = game.detailed  # type: ignore[assignment]
+
+    missing = [key for key in TEAM_COUNTERS if key not in details]
+    if missing:
+        issues.append((ERROR, 'details', f'detailed stats without {", ".join(missing)}'))
+
+    lineup = set(game.lineup) if isinstance(game.lineup, list) else set()
+    for stat, counts in details.items():
+        if not isinstance(counts, dict):
+            continue
+        if stat not in PlayerStats.DETAIL_SLOTS:
+            issues.append((ERROR, 'details', f'{stat} is not a detailed stat'))
+            continue
+        for name in counts:
+            if game.roster.get_player_num(name) not in lineup:
+                issues.append((ERROR, 'details', f'{stat} names {name}, not in the lineup'))